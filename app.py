@@ -1,24 +1,48 @@
 import os
 
-from flask import Flask, render_template, request, flash, redirect, session, g, url_for, abort
+from flask import Flask, render_template, request, flash, redirect, session, g, url_for, abort, jsonify
 from flask_debugtoolbar import DebugToolbarExtension
 from sqlalchemy.exc import IntegrityError
 from functools import wraps
 from werkzeug.datastructures import ImmutableDict
 from urllib.parse import urlparse
 from flask_wtf.csrf import CSRFProtect
-from cryptography.fernet import Fernet
+from cryptography.fernet import Fernet, InvalidToken
 import requests
 
-from forms import RegisterForm, LoginForm, UserEditForm, UserPasswordForm, ModlistAddForm, ModlistEditForm, ModlistAddModForm
-from models import db, connect_db, User, Modlist, Mod, Game
+from forms import RegisterForm, LoginForm, UserEditForm, UserPasswordForm, ModlistAddForm, ModlistEditForm, ModlistAddModForm, ModlistBulkModsForm
+from models import db, connect_db, User, Modlist, Mod, Game, game_modlist, modlist_mod
 
 from nexus_api import get_all_games_nxs, get_mods_of_type_nxs, get_mod_nxs, endorse_mod_nxs, track_mod_nxs
-from utilities import get_all_games_db, get_game_db, get_empty_modlists, get_tracked_modlist_db, get_recent_modlists_by_game, get_public_modlists_by_game, filter_nxs_data, filter_nxs_mod_page, update_all_games_db, update_list_mods_db, link_mods_to_game, add_mod_modlist_choices, flash_modlist_action_messages, check_modlist_uneditable, update_tracked_mods_from_nexus, get_tracked_not_keep_db, paginate_tracked_mods, paginate_modlist_mods
+from cache import cache
+from cache_invalidation import register_invalidation_handler, notify_invalidation, start_invalidation_listener
+from games_catalogue import OTHER_LETTER, get_games_catalogue, invalidate_games_catalogue, prebuild_body
+from jobs import ACTIVE_JOB_STATUSES, job_handler, enqueue_job, start_job_workers
+from server_session import ServerSessionInterface
+from tracked_mods_store import store_tracked_mod_ids, get_tracked_mod_ids, handle_tracked_mods_invalidation
+from user_cache import get_cached_user, set_cached_user, invalidate_cached_user, clear_cached_users
+from utilities import get_current_user_db, get_game_db, get_tracked_modlist_db, get_modlists_by_game, get_public_modlists_by_game, filter_nxs_data, filter_nxs_mod_page, update_all_games_db, update_list_mods_db, link_mods_to_game, add_mod_modlist_choices, add_mod_to_modlists_db, bulk_modlist_mods_db, get_editable_modlists_db, flash_modlist_action_messages, check_modlist_uneditable, update_tracked_mod_db, get_tracked_not_keep_db, get_tracked_mods_db, paginate_tracked_mods, paginate_modlist_mods, search_mods_db, typeahead_games_db, typeahead_mods_db, TYPEAHEAD_LIMIT
+from tracked_sync import is_tracked_sync_stale, get_tracked_sync_job, get_latest_tracked_sync_job, get_running_tracked_sync_job, start_tracked_sync, run_tracked_sync
+from write_behind import mod_upsert_buffer
 
 CURR_USER_KEY = "curr_user"
+# the encrypted Nexus API key lives in its own cookie, never in the sessions table
+API_KEY_COOKIE_NAME = "nexus_api_key"
+TRACKED_MODS_VERSION_KEY = "tracked_mods_version"
+TRACKED_MODS_RECONCILE_KEY = "tracked_mods_reconcile"
+ENDORSEMENTS_KEY = "endorsements"
+MAX_SESSION_ENDORSEMENTS = 50
 ORDER = "update"
 PER_PAGE = "25"
+ALL_GAMES_PAGE_CARDS = 10 # popular game cards rendered before 'See More' is clicked
+GAMES_API_MAX_AGE = 365 * 24 * 3600 # seconds, for /api/games urls with the current version
+# seconds a rendered logged out all-games page is kept in the cache, also 
+# bounds how long a shared cache serves pages rendered by an older deploy
+ALL_GAMES_PAGE_TTL = 3600
+OTHER_LETTER_URL = 'other' # url of OTHER_LETTER's games list, '#' can't be in a path
+TYPEAHEAD_MIN_LENGTH = 3 # shorter prefixes match too many names for the trigram indexes to help
+TYPEAHEAD_MAX_LIMIT = 20
+TYPEAHEAD_MAX_AGE = 300 # seconds browsers may reuse a typeahead response
 
 app = Flask(__name__)
 
@@ -32,6 +56,8 @@ app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', "it's a secret")
 app.config['WTF_CSRF_ENABLED'] = True
 app.config["SQLALCHEMY_ENGINE_OPTIONS"] = { "pool_pre_ping": True, }
 csrf = CSRFProtect(app)
+# session cookie only holds an id, session data is kept in the db
+app.session_interface = ServerSessionInterface()
 # toolbar = DebugToolbarExtension(app)
 
 connect_db(app)
@@ -43,6 +69,35 @@ if encryption_key is None:
     raise RuntimeError("Encryption key not found in environment variables")
 cipher_suite = Fernet(encryption_key)
 
+# each worker drops its cached copies when another worker commits changes
+CACHE_INVALIDATION_LISTENER = os.environ.get('CACHE_INVALIDATION_LISTENER', 'true').lower() != 'false'
+
+
+def invalidate_cached_modlists(tag_kind, key):
+    """Drop cache entries tagged with the modlist or user's modlists 
+    in key. Routes also call it after their commit, since the worker 
+    that sends an event may get it after its next request. key None 
+    comes from a listener reconnect: only a per-process cache is 
+    cleared, a shared cache was kept current by the other workers' 
+    listeners."""
+
+    if key is not None:
+        cache.invalidate_tag(f'{tag_kind}:{key}')
+    elif not cache.is_shared:
+        cache.clear()
+
+
+register_invalidation_handler('games', lambda key: invalidate_games_catalogue())
+register_invalidation_handler('user', lambda key: clear_cached_users() if key is None else invalidate_cached_user(key))
+register_invalidation_handler('modlist', lambda key: invalidate_cached_modlists('modlist', key))
+register_invalidation_handler('user_modlists', lambda key: invalidate_cached_modlists('user_modlists', key))
+register_invalidation_handler('tracked_mods', handle_tracked_mods_invalidation)
+
+# background job worker threads run in each web worker, set to 0
+# when jobs are run by separate worker.py processes instead
+app.config['JOB_WORKER_THREADS'] = int(os.environ.get('JOB_WORKER_THREADS', 1))
+
+
 ##############################################################################
 # Custom decorators
 
@@ -82,12 +137,15 @@ def set_listview_query_vals(f):
 def get_api_headers(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        encrypted_api_key = session.get('user_api_key')
-        if not encrypted_api_key:
-            flash("Nexus API key not found. Please login and enter your Nexus account's personal API key. API key is not saved to our server, so it must be entered every time you log in to ModList. If logged in to Nexus, the key can be found at the bottom of this page: https://next.nexusmods.com/settings/api-keys", "danger")
+        encrypted_api_key = request.cookies.get(API_KEY_COOKIE_NAME)
+        try:
+            user_api_key = cipher_suite.decrypt(encrypted_api_key.encode()).decode() if encrypted_api_key else None
+        except InvalidToken:
+            user_api_key = None
+        if not user_api_key:
+            flash("Nexus API key not found. Please login and enter your Nexus account's personal API key. API key is only kept encrypted in your browser for the session (and by a background sync until it finishes), so it must be entered every time you log in to ModList. If logged in to Nexus, the key can be found at the bottom of this page: https://next.nexusmods.com/settings/api-keys", "danger")
             do_logout()
             return redirect(url_for('login', next=request.url))
-        user_api_key = cipher_suite.decrypt(encrypted_api_key).decode()
         headers = {'apikey': user_api_key}
         return f(*args, **kwargs, headers=headers)
     return decorated_function
@@ -96,15 +154,46 @@ def get_api_headers(f):
 ##############################################################################
 # User signup / login / extra login functions / logout
 
+@app.before_request
+def start_cache_invalidation_listener():
+    """Start this worker's cache invalidation listener on its first request."""
+
+    if CACHE_INVALIDATION_LISTENER:
+        start_invalidation_listener(db.engine)
+
+
+@app.before_request
+def start_background_job_workers():
+    """Start this worker's background job threads on its first request."""
+
+    start_job_workers(app, app.config['JOB_WORKER_THREADS'])
+
+
+@app.before_request
+def start_mod_write_behind():
+    """Start this worker's buffered mod upsert flusher on its first request."""
+
+    mod_upsert_buffer.start_flusher(app)
+
+
 @app.before_request
 def add_user_to_g():
-    """If we're logged in, add curr user to Flask global."""
+    """If we're logged in, add curr user to Flask global.
+
+    g.user is a read-only snapshot from this process' user cache 
+    when one is cached, otherwise the user is loaded from the db 
+    and cached. Use get_current_user_db() for the live User object."""
 
     if CURR_USER_KEY in session:
-        g.user = db.session.execute(
-            db.select(User)
-            .where(User.id==session[CURR_USER_KEY])
-            ).scalars().first()
+        user_id = session[CURR_USER_KEY]
+        g.user = get_cached_user(user_id)
+
+        if g.user is None:
+            user = db.session.execute(
+                db.select(User)
+                .where(User.id==user_id)
+                ).scalars().first()
+            g.user = set_cached_user(user) if user else None
     else:
         g.user = None
 
@@ -115,42 +204,201 @@ def do_login(user):
     Returns Exception if error occurs during Nexus API call
     or db update."""
 
+    session.regenerate()
     session[CURR_USER_KEY] = user.id
+    # login loads a fresh snapshot, in case an edit's invalidation was missed
+    invalidate_cached_user(user.id)
 
 
 def do_api_key_encryption(user_api_key):
     """Encrypt user's Nexus personal API key provided 
-    at login and add to session"""
+    at login, set in the API key cookie with the response. 
+    Only the browser holds the encrypted key, it isn't 
+    stored in the sessions table."""
+
+    g.api_key_cookie = cipher_suite.encrypt(user_api_key.encode()).decode()
+
+
+@app.after_request
+def store_api_key_cookie(response):
+    """Set or delete the API key cookie when login or 
+    logout changed it during the request. It is a browser 
+    session cookie with the session cookie's flags."""
+
+    if 'api_key_cookie' not in g:
+        return response
+
+    cookie_options = {
+        'domain': app.session_interface.get_cookie_domain(app),
+        'path': app.session_interface.get_cookie_path(app),
+        'secure': app.session_interface.get_cookie_secure(app),
+        'samesite': app.session_interface.get_cookie_samesite(app),
+        'httponly': True
+    }
+
+    if g.api_key_cookie is None:
+        if API_KEY_COOKIE_NAME in request.cookies:
+            response.delete_cookie(API_KEY_COOKIE_NAME, **cookie_options)
+    else:
+        response.set_cookie(API_KEY_COOKIE_NAME, g.api_key_cookie, **cookie_options)
+
+    return response
+
 
-    encrypted_api_key = cipher_suite.encrypt(user_api_key.encode())
-    session['user_api_key'] = encrypted_api_key
+def get_encrypted_api_key(headers):
+    """Encrypt user's Nexus personal API key for a 
+    background job's payload, stored in the jobs table.
+
+    Returns encrypted key str."""
+
+    return cipher_suite.encrypt(headers['apikey'].encode()).decode()
+
+
+def get_job_headers(payload):
+    """Decrypt API key in a background job's payload.
+
+    Returns Nexus API request headers."""
+
+    return {'apikey': cipher_suite.decrypt(payload['api_key'].encode()).decode()}
+
+
+def do_endorsement_store(mod_id, endorse_status):
+    """Remember endorsement status requested for mod until Nexus 
+    reports it, keeping only the MAX_SESSION_ENDORSEMENTS most 
+    recent so the session doesn't grow with every endorsement."""
+
+    endorsements = session.get(ENDORSEMENTS_KEY, {})
+    endorsements.pop(str(mod_id), None)
+    endorsements[str(mod_id)] = endorse_status
+
+    for old_mod_id in list(endorsements)[:-MAX_SESSION_ENDORSEMENTS]:
+        del endorsements[old_mod_id]
+
+    session[ENDORSEMENTS_KEY] = endorsements
 
 
 def do_games_list_update(headers):
-    """Use list of all games from Nexus API 
-    to update all Games in db"""
+    """Queue a background job updating all Games in db 
+    from Nexus' list of all games. Only one is queued 
+    at a time however many users log in."""
 
     try:
-        nexus_games = get_all_games_nxs(headers=headers)
-        db_ready_games = filter_nxs_data(nexus_games, 'games')
-        update_all_games_db(db_ready_games)
+        enqueue_job('games_list_update', {'api_key': get_encrypted_api_key(headers)}, dedup_key='games_list_update')
+        db.session.commit()
     except:
+        db.session.rollback()
         flash("Problem occurred refreshing games list from Nexus.\nDisplayed games list may be out of date or incomplete.\nLog out and back in to reattempt.", "danger")
 
 
 def do_tracked_mods_update(user, headers):
-    """Use mods from Nexus Tracking Centre to update 
-    user's Nexus Tracked Mods modlist and add 
-    list of tracked mod ids to session"""
+    """Queue a background sync of user's Nexus Tracked Mods 
+    modlist with the Nexus Tracking Centre, and store the 
+    modlist's current tracked mod ids for the session. The 
+    sync's 'tracked_mods' invalidation event drops the stored 
+    ids in every worker when it finishes, so the session 
+    reloads the synced ones."""
+
+    try:
+        start_tracked_sync(user.id, get_encrypted_api_key(headers))
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        print(f"Function: do_tracked_mods_update()\nCould not queue sync of user #{user.id}'s tracked modlist; error: ", e)
+        flash("Problem occurred syncing your tracked mods with Nexus.\nUse the 'Re-Sync Tracked Mods to Nexus' button on your Nexus Tracked Mods modlist to reattempt.", "danger")
+
+    do_tracked_mod_ids_store(user.id, get_tracked_mods_db(user.id, just_ids=True))
+
+
+def do_tracked_mod_ids_store(user_id, tracked_mod_ids):
+    """Store user's tracked mod ids server-side, 
+    session only keeps the store's version token."""
+
+    session[TRACKED_MODS_VERSION_KEY] = store_tracked_mod_ids(user_id, tracked_mod_ids)
+
+
+def get_session_tracked_mod_ids():
+    """Get signed-in user's tracked mod ids stored for the session, 
+    reloaded from their Nexus Tracked Mods modlist if needed.
+
+    Returns frozenset of mod ids, or None if not synced this session."""
+
+    return get_tracked_mod_ids(
+        g.user.id, 
+        session.get(TRACKED_MODS_VERSION_KEY), 
+        lambda user_id: get_tracked_mods_db(user_id, just_ids=True)
+    )
+
+
+def make_prebuilt_response(prebuilt, mimetype, immutable=False):
+    """Response sending a PrebuiltBody's bytes, gzipped when the 
+    browser accepts it, with a strong ETag so revalidations are 
+    answered 304. immutable responses may be cached for a year, 
+    use it for urls that change when the body does. Others must 
+    be revalidated each time they are used.
 
-    tracked_mod_ids = update_tracked_mods_from_nexus(user.id, headers=headers)
-    session['tracked_mod_ids'] = tracked_mod_ids
+    Returns Response."""
+
+    gzipped = request.accept_encodings['gzip'] > 0
+
+    response = app.response_class(prebuilt.body_gzip if gzipped else prebuilt.body, mimetype=mimetype)
+    if gzipped:
+        response.content_encoding = 'gzip'
+    response.vary.add('Accept-Encoding')
+    # each encoding is a different representation, so gets its own strong ETag
+    response.set_etag(f'{prebuilt.etag}-gzip' if gzipped else prebuilt.etag)
+
+    response.cache_control.public = True
+    if immutable:
+        response.cache_control.max_age = GAMES_API_MAX_AGE
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.no_cache = True
+
+    return response.make_conditional(request)
+
+
+def render_all_games_page(catalogue):
+    """Renders all-games page for the games catalogue. Only the first 
+    popular game cards are rendered, the rest of the games and each 
+    letter's games are fetched by home.js from versioned urls.
+
+    Returns rendered page str."""
+
+    games_version = catalogue.games_json.etag
+
+    letter_urls = {
+        letter: url_for('games_letter_api', letter=OTHER_LETTER_URL if letter == OTHER_LETTER else letter, v=games_version)
+        for letter in catalogue.by_letter
+    }
+
+    return render_template(
+        'games/all-games.html', 
+        games_list=catalogue.games_data[:ALL_GAMES_PAGE_CARDS], 
+        games_url=url_for('games_api', v=games_version), 
+        letter_urls=letter_urls
+    )
+
+
+def get_prebuilt_all_games_page(catalogue):
+    """Gets all-games page as logged out visitors see it, rendered 
+    by the first logged out request for each games catalogue and 
+    stored in the cache, so serving it again needs no db query or 
+    template render.
+
+    Returns PrebuiltBody of the page."""
+
+    return cache.get_or_set(
+        f'all_games_page:{catalogue.games_json.etag}',
+        lambda: prebuild_body(render_all_games_page(catalogue).encode()),
+        ttl=ALL_GAMES_PAGE_TTL
+    )
 
 
 def do_logout():
     """Logout user."""
 
     session.clear()
+    g.api_key_cookie = None
 
     if CURR_USER_KEY in session:
         del session[CURR_USER_KEY]
@@ -197,12 +445,7 @@ def signup():
                 flash("An error occurred. Please try again.", 'danger')
             return render_template('users/signup.html', form=form)
 
-        modlist = Modlist.new_modlist(
-            name='Nexus Tracked Mods', 
-            description="This modlist automatically populates with all the mods in your Nexus account's Tracking Centre.", 
-            private=True,
-            user=user
-        )
+        modlist = Modlist.new_tracked_modlist(user)
         db.session.add(modlist)
         db.session.commit()
 
@@ -282,15 +525,78 @@ def show_tracked_modlist_page(tab='tracked-mods', page=1, per_page=25, order="up
     """
 
     if tab == 'tracked-sync':
-        tracked_mod_ids = update_tracked_mods_from_nexus(g.user.id, headers=headers)
-        session['tracked_mod_ids'] = tracked_mod_ids
+        session.pop(TRACKED_MODS_RECONCILE_KEY, None)
+        try:
+            _, is_new_job = start_tracked_sync(g.user.id, get_encrypted_api_key(headers))
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"Page: show_tracked_modlist_page\nFunction: start_tracked_sync()\nCould not queue sync of user #{g.user.id}'s tracked modlist; error: ", e)
+            flash("Problem occurred starting a sync with your Nexus Tracking Centre, please try again.", 'danger')
+        else:
+            if not is_new_job:
+                flash("A sync with your Nexus Tracking Centre is already running, showing its progress.", 'info')
+            else:
+                flash("Syncing your Nexus Tracked Mods modlist with your Nexus Tracking Centre. This page will update when the sync is done.", 'info')
         return redirect(url_for('show_tracked_modlist_page', tab='tracked-mods'))
 
     page_mods = paginate_tracked_mods(g.user.id, page, per_page, order=order, tab=tab)
 
     tracked_modlist = get_tracked_modlist_db(g.user.id)
 
-    return render_template("users/modlist-tracked.html", page_mods=page_mods, page=page, per_page=per_page, order=order, tab=tab, modlist=tracked_modlist)
+    # page shows db state right away, a sync put off by track_mod() 
+    # or an out of date last sync is done in the background
+    reconcile_requested = session.pop(TRACKED_MODS_RECONCILE_KEY, None)
+    if reconcile_requested or is_tracked_sync_stale(tracked_modlist):
+        try:
+            start_tracked_sync(g.user.id, get_encrypted_api_key(headers))
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"Page: show_tracked_modlist_page\nFunction: start_tracked_sync()\nCould not queue sync of user #{g.user.id}'s tracked modlist; error: ", e)
+
+    # the bulk add picker only offers modlists the page's mods can be added to
+    page_game_ids = {game.id for mod in page_mods.items for game in mod.for_games}
+    editable_modlists = get_editable_modlists_db(g.user.id, game_ids=page_game_ids)
+
+    sync_job = get_running_tracked_sync_job(g.user.id)
+
+    return render_template("users/modlist-tracked.html", page_mods=page_mods, page=page, per_page=per_page, order=order, tab=tab, modlist=tracked_modlist, editable_modlists=editable_modlists, sync_job=sync_job)
+
+
+@app.route('/api/users/modlists/tracked-sync/status')
+@login_required
+def tracked_sync_status():
+    """Polled by the tracked modlist page while a background 
+    sync with Nexus runs.
+    
+    Returns JSON: {'running': bool, 'last_synced': ISO datetime str or None, 
+    'job': user's latest sync job dict, whatever its status, or None}"""
+
+    tracked_modlist = get_tracked_modlist_db(g.user.id)
+    last_synced = tracked_modlist.last_synced if tracked_modlist else None
+    sync_job = get_latest_tracked_sync_job(g.user.id)
+
+    return jsonify({
+        'running': sync_job is not None and sync_job['status'] in ACTIVE_JOB_STATUSES,
+        'last_synced': last_synced.isoformat() if last_synced else None,
+        'job': sync_job
+    })
+
+
+@app.route('/api/users/modlists/tracked-sync/jobs/<int:job_id>')
+@login_required
+def tracked_sync_job_status(job_id):
+    """Progress of one tracked modlist sync job with Nexus.
+    
+    Returns JSON job dict: {'id', 'status': 'queued', 'running', 'done' or 'failed', 
+    'tracked', 'missing', 'fetched', 'unpublished', 'errors', 'started_at', 'finished_at'}"""
+
+    sync_job = get_tracked_sync_job(job_id)
+    if sync_job is None or sync_job['user_id'] != g.user.id:
+        abort(404, f"Sync job '{job_id}' could not be found. Finished sync jobs are only kept for a few days.")
+
+    return jsonify(sync_job)
 
 
 @app.route('/users/modlists/keep-tracked-mods/mods/<int:mod_id>/<string:keep_action>', methods=["POST"])
@@ -399,8 +705,8 @@ def modlist_delete_mod(modlist_id, mod_id):
     """Remove mod from modlist.
 
     - db is searched for mod and modlist.
-    - if mod is found in list of mods contained in modlist, 
-      delete mod from modlist.
+    - modlist_mod row for mod and modlist is deleted directly, 
+      without loading the mods contained in modlist.
     """
 
     modlist = db.get_or_404(Modlist, modlist_id, description=f"Sorry, we couldn't find a modlist with ID #{modlist_id}.<br>We either encountered an issue retrieving the data from our database, or the modlist does not exist.<br>Please check that the correct modlist id is being requested and try again.")
@@ -412,35 +718,91 @@ def modlist_delete_mod(modlist_id, mod_id):
 
     else:
         mod = db.get_or_404(Mod, mod_id, description=f"Sorry, we couldn't find a mod with ID #{mod_id}.<br>We either encountered an issue retrieving the data from our database, or the mod does not exist.<br>Please check that the correct mod id is being requested and try again.")
+        mod_name = mod.name
+        modlist_name = modlist.name
+        modlist_user_id = modlist.user_id
+
         try:
-            if mod in modlist.mods:
-                modlist.mods.remove(mod)
-            else:
-                flash(f"Can't delete mod from modlist. {mod.name} not found in {modlist.name}.", 'danger')
-                return redirect(url_for('show_modlist_page', user_id=modlist.user_id, modlist_id=modlist_id))
+            # deletes the modlist_mod row directly and un-assigns the game if modlist is left empty
+            deleted_ids = bulk_modlist_mods_db(modlist_id, [mod_id], 'delete').changed_ids
+        except Exception as e:
+            flash(f"Error removing {mod_name} from {modlist_name}, please try again.", 'danger')
+            return redirect(url_for('show_modlist_page', user_id=modlist_user_id, modlist_id=modlist_id))
 
-            db.session.commit()
+        if not deleted_ids:
+            flash(f"Can't delete mod from modlist. {mod_name} not found in {modlist_name}.", 'danger')
+            return redirect(url_for('show_modlist_page', user_id=modlist_user_id, modlist_id=modlist_id))
 
+    flash(f'{mod_name} successfully removed from {modlist_name}!', 'success')
+
+    return redirect(url_for('show_modlist_page', user_id=modlist_user_id, modlist_id=modlist_id))
+
+
+@app.route('/users/modlists/mods/bulk/<string:bulk_action>', methods=["POST"])
+@login_required
+def modlist_bulk_mods(bulk_action):
+    """Add or remove several mods to/from a modlist at once.
+
+    - Form takes the modlist id, and list of mod ids from 
+      multi-select checkboxes on modlist and tracked mods pages.
+    - Only 'add' or 'delete' are valid bulk actions.
+    - Redirects once to 'next' page, or to the modlist page.
+    """
+
+    if bulk_action not in ['add', 'delete']:
+        description = f"The action '{bulk_action}' in the requested url is not valid. Please use 'add' or 'delete' to change which mods are in the modlist."
+        abort(400, description)
+
+    next_page = request.args.get('next')
+
+    form = ModlistBulkModsForm()
+
+    if not form.validate_on_submit():
+        flash("Select a modlist and at least one mod to add to or remove from the modlist.", 'danger')
+        if next_page:
+            parsed_url = urlparse(next_page)
+            if parsed_url.netloc == '' or parsed_url.scheme in ['http', 'https']:
+                return redirect(next_page)
+        return redirect(url_for('show_tracked_modlist_page', tab='tracked-mods'))
+
+    modlist_id = form.modlist_id.data
+    mod_ids = form.mod_ids.data
+
+    modlist = db.get_or_404(Modlist, modlist_id, description=f"Sorry, we couldn't find a modlist with ID #{modlist_id}.<br>We either encountered an issue retrieving the data from our database, or the modlist does not exist.<br>Please check that the correct modlist id is being requested and try again.")
+    modlist_name = modlist.name
+    modlist_user_id = modlist.user_id
+
+    is_invalid = check_modlist_uneditable(modlist, g.user.id)
+    if is_invalid:
+        flash(is_invalid, "danger")
+
+    else:
+        try:
+            changed_ids, other_game_ids = bulk_modlist_mods_db(modlist_id, mod_ids, bulk_action)
+        except ValueError as e:
+            flash(f"{e} No mods were changed in '{modlist_name}'.", 'danger')
         except Exception as e:
-            db.session.rollback()
-            print("Error deleting mod from modlist in db - modlist_delete_mod(): ", e)
-            flash(f"Error removing {mod.name} from {modlist.name}, please try again.", 'danger')
-            return redirect(url_for('show_modlist_page', user_id=modlist.user_id, modlist_id=modlist_id))
+            flash(f"An error occurred while saving changes to '{modlist_name}'. Please try again.", 'danger')
+        else:
+            unchanged_count = len(set(mod_ids)) - len(changed_ids)
+            if bulk_action == 'add':
+                flash(f"{len(changed_ids)} mod(s) successfully added to '{modlist_name}'.", 'success')
+                if other_game_ids:
+                    flash(f"{len(other_game_ids)} mod(s) were not added because they are for a different game than '{modlist_name}'.", 'warning')
+                if unchanged_count - len(other_game_ids):
+                    flash(f"{unchanged_count - len(other_game_ids)} mod(s) were not added because they are already in '{modlist_name}'.", 'warning')
+            else:
+                flash(f"{len(changed_ids)} mod(s) successfully removed from '{modlist_name}'.", 'success')
+                if unchanged_count:
+                    flash(f"{unchanged_count} mod(s) were not removed because they were not found in '{modlist_name}'.", 'warning')
 
-    flash(f'{mod.name} successfully removed from {modlist.name}!', 'success')
-    
-    if len(modlist.mods) <= 0:
-        for game in modlist.for_games:
-            try:
-                modlist.for_games.remove(game)
-                db.session.commit()
-            except Exception as e:
-                print("Page: modlist_delete_mod, Function: modlist.for_games.remove(game)\nFailed to un-assign modlist's game assignment, error: ", e)
-                abort(500, f"Only mod was removed from modlist, but an error was encountered removing modlist's assignment to {game.name}.<br>Modlist will still only take mods for {game.name}.<br>Options to resolve future issues with this modlist are:<br>1. Add and remove a mod to reattempt game assignment removal<br>2. Delete this modlist and make a new one.")
+    if next_page:
+        parsed_url = urlparse(next_page)
+        if parsed_url.netloc == '' or parsed_url.scheme in ['http', 'https']:
+            return redirect(next_page)
+    return redirect(url_for('show_modlist_page', user_id=modlist_user_id, modlist_id=modlist_id))
 
-    return redirect(url_for('show_modlist_page', user_id=modlist.user_id, modlist_id=modlist_id))
 
-    
 @app.route('/users/modlists/<int:modlist_id>/edit', methods=["GET", "POST"])
 @login_required
 def edit_modlist(modlist_id):
@@ -475,7 +837,9 @@ def edit_modlist(modlist_id):
             modlist.description=form.description.data,
             modlist.private=form.private.data
 
+            notify_invalidation('modlist', modlist.id)
             db.session.commit()
+            invalidate_cached_modlists('modlist', modlist.id)
 
         except ValueError as e:
             db.session.rollback()
@@ -505,9 +869,9 @@ def edit_modlist(modlist_id):
 def delete_modlist(modlist_id):
     """Delete user's modlist.
 
-    - db is searched for user and modlist.
-    - if modlist is found in list of user's modlists, 
-      delete modlist.
+    - db is searched for modlist.
+    - if modlist belongs to user, delete modlist and let 
+      db delete cascades clear its mods and game assignment.
     """
 
     modlist = db.get_or_404(Modlist, modlist_id, description=f"Sorry, we couldn't find a modlist with ID #{modlist_id}.<br>We either encountered an issue retrieving the data from our database, or the modlist does not exist.<br>Please check that the correct modlist id is being requested and try again.")
@@ -517,26 +881,25 @@ def delete_modlist(modlist_id):
         flash(is_invalid, "danger")
         return redirect(url_for('show_modlist_page', user_id=modlist.user_id, modlist_id=modlist_id))
 
-    user = db.session.execute(
-        db.select(User)
-        .options(db.selectinload(User.modlists))
-        .where(User.id == g.user.id)
-    ).scalars().first()
+    modlist_name = modlist.name
+
     try:
-        # Remove all mods related to this modlist from modlist_mod table
-        if modlist.mods:
-            modlist.mods.clear()
-        # Delete the modlist itself
-        db.session.delete(modlist)
+        # Delete the modlist directly and let db delete cascades clear its modlist_mod and game_modlist rows
+        db.session.execute(
+            db.delete(Modlist)
+            .where(Modlist.id == modlist_id)
+        )
+        notify_invalidation('modlist', modlist_id)
         db.session.commit()
+        invalidate_cached_modlists('modlist', modlist_id)
 
     except Exception as e:
         db.session.rollback()
         print("Error deleting modlist from db - delete_modlist(): ", e)
-        flash(f"An error occurred and modlist '{modlist.name}' was not deleted.\nPlease try again.", 'danger')
-        return redirect(url_for('show_modlist_page', user_id=modlist.user_id, modlist_id=modlist_id))
+        flash(f"An error occurred and modlist '{modlist_name}' was not deleted.\nPlease try again.", 'danger')
+        return redirect(url_for('show_modlist_page', user_id=g.user.id, modlist_id=modlist_id))
 
-    flash(f"Success! Modlist '{modlist.name}' has been deleted!", 'success')
+    flash(f"Success! Modlist '{modlist_name}' has been deleted!", 'success')
     return redirect(url_for("show_user_page", user_id=g.user.id))
 
 
@@ -565,32 +928,26 @@ def modlist_add_mod(mod_id):
         encountered_error = []
 
         modlists = db.session.scalars(db.select(Modlist).where(Modlist.id.in_(modlist_ids))).all()
+
+        # modlist names are read before the commit expires the loaded modlists
+        owned_modlist_names = {}
         for modlist in modlists:
-            
             if modlist.user_id != g.user.id:
                 unowned_modlists.append(f"'{modlist.name}'")
-                continue
-
-            if mod in modlist.mods:
-                already_in_modlists.append(f"'{modlist.name}'")
-                continue
-
-            try:
-                modlist.mods.append(mod)
-                modlist.mark_nsfw_if_nsfw(mod)
-                for game in mod.for_games:
-                    game = db.get_or_404(Game, game.id, description=f"Sorry, we couldn't find a game with ID #{game.id}.<br>We either encountered an issue retrieving the data from our database, or the game does not exist.<br>Please check that the correct game id is being requested and try again.")
-                    modlist.assign_modlist_for_games(game)
-                modlist.update_mlist_tstamp()
-
-                db.session.commit()
+            else:
+                owned_modlist_names[modlist.id] = modlist.name
 
-            except Exception as e:
-                db.session.rollback()
-                print(f"Error adding mod to modlist in db - modlist_add_mod():  {e}\nError context: mod.name: {mod.name}; modlist.name: {modlist.name}")
-                encountered_error.append(f"'{modlist.name}'")
-            
-            successfully_added.append(modlist.name)
+        try:
+            added_ids = add_mod_to_modlists_db(mod, list(owned_modlist_names))
+        except Exception as e:
+            print(f"Error func: modlist_add_mod({mod_id})\nError detail: {e}")
+            encountered_error = [f"'{name}'" for name in owned_modlist_names.values()]
+        else:
+            for modlist_id, name in owned_modlist_names.items():
+                if modlist_id in added_ids:
+                    successfully_added.append(name)
+                else:
+                    already_in_modlists.append(f"'{name}'")
 
         flash_modlist_action_messages(mod.name, successfully_added, unowned_modlists, already_in_modlists, encountered_error)
 
@@ -635,10 +992,12 @@ def new_modlist():
                 name=form.name.data,
                 description=form.description.data,
                 private=form.private.data,
-                user=g.user
+                user=get_current_user_db()
             )
             db.session.add(modlist)
+            notify_invalidation('user_modlists', g.user.id)
             db.session.commit()
+            invalidate_cached_modlists('user_modlists', g.user.id)
 
         except ValueError as e:
             db.session.rollback()
@@ -676,15 +1035,16 @@ def show_user_page(user_id):
 
     if not g.user or g.user.id != int(user_id):
 
-        modlists_by_game = get_public_modlists_by_game(user_id)
+        public_modlists = get_public_modlists_by_game(user_id)
 
-        return render_template('users/profile-public.html', user=user, modlists_by_game=modlists_by_game)
+        return render_template('users/profile-public.html', user=user, modlists_by_game=public_modlists['modlists_by_game'], preview_mods=public_modlists['preview_mods'])
         
-    empty_modlists = get_empty_modlists(g.user.id)
-    modlists_by_game = get_recent_modlists_by_game(g.user.id)
-
+    profile_modlists = get_modlists_by_game(g.user.id)
+    empty_modlists = profile_modlists['empty_modlists']
+    modlists_by_game = profile_modlists['modlists_by_game']
+    preview_mods = profile_modlists['preview_mods']
 
-    return render_template('users/profile-user.html', user=user, empty_modlists=empty_modlists, modlists_by_game=modlists_by_game)
+    return render_template('users/profile-user.html', user=user, empty_modlists=empty_modlists, modlists_by_game=modlists_by_game, preview_mods=preview_mods)
 
 
 @app.route('/users/edit', methods=["GET", "POST"])
@@ -702,9 +1062,10 @@ def edit_profile():
             return redirect(url_for('edit_profile'))
 
         try:
-            g.user.username = form.username.data
-            g.user.email = form.email.data
-            g.user.hide_nsfw = form.hide_nsfw.data
+            user.username = form.username.data
+            user.email = form.email.data
+            user.hide_nsfw = form.hide_nsfw.data
+            notify_invalidation('user', user.id)
             db.session.commit()
         
         except IntegrityError as e:
@@ -715,6 +1076,8 @@ def edit_profile():
                 flash("Email already used - each email can only be used on one account", 'danger')
             return redirect(url_for('edit_profile'))
 
+        # other workers drop it on the 'user' notification sent with the commit
+        invalidate_cached_user(g.user.id)
         flash(f"Success! Edits to {form.username.data} saved.", 'success')
 
         return redirect(url_for('show_user_page', user_id=g.user.id))
@@ -749,6 +1112,7 @@ def edit_password():
         try:
             hashed_password = user.hash_new_password(form.new_password.data)
             user.password = hashed_password
+            notify_invalidation('user', user.id)
             db.session.commit()
         except Exception as e:
             db.session.rollback()
@@ -756,6 +1120,8 @@ def edit_password():
             flash("Error saving new password. Please try again.", 'danger')
             return render_template('users/password.html', form=form, user=g.user)
 
+        # other workers drop it on the 'user' notification sent with the commit
+        invalidate_cached_user(user.id)
         flash("Success! New password saved.", 'success')
 
         return redirect(url_for('show_user_page', user_id=g.user.id))
@@ -777,6 +1143,7 @@ def delete_user():
     try:
         # Delete user and let db delete cascades clear user's assets
         db.session.delete(user)
+        notify_invalidation('user', user.id)
         db.session.commit()
 
     except Exception as e:
@@ -784,13 +1151,16 @@ def delete_user():
         print("Error deleting user from db - delete_user(): \n", e, "\nAttempting asset deletion before user deletion.")
 
         try:
-            # Clear all assets associated with the user from the db
+            # Clear all assets associated with the user from the db,
+            # association rows with bulk deletes so no collection is loaded
+            user_modlist_ids = db.select(Modlist.id).where(Modlist.user_id == user.id)
+            db.session.execute(modlist_mod.delete().where(modlist_mod.c.modlist_id.in_(user_modlist_ids)))
+            db.session.execute(game_modlist.delete().where(game_modlist.c.modlist_id.in_(user_modlist_ids)))
             for modlist in user.modlists:
-                modlist.mods.clear()
-                modlist.for_games.clear()
                 db.session.delete(modlist)
             # Finally, delete the user
             db.session.delete(user)
+            notify_invalidation('user', g.user.id)
             db.session.commit()
             
         except Exception as e:
@@ -799,6 +1169,7 @@ def delete_user():
             flash("An error occurred and your user account was not deleted. Please try again.", "danger")
             return redirect(url_for('show_user_page', user_id=g.user.id))
 
+    invalidate_cached_user(g.user.id)
     do_logout()
     flash(f"Success! User account '{username}' has been deleted!", 'success')
 
@@ -826,7 +1197,6 @@ def show_mod_page(game_domain_name, mod_id, headers=None):
     """
     
     nexus_mod = get_mod_nxs(game_domain_name, mod_id, headers=headers)
-    tracked_mod_ids = None
 
     try:
         # update mod in db from relevant data in API response object
@@ -834,9 +1204,18 @@ def show_mod_page(game_domain_name, mod_id, headers=None):
         if not game:
             raise AttributeError(f"No Game object returned from get_game_db(). Game could not be found using '{game_domain_name}'")
         db_ready_mods = filter_nxs_data([nexus_mod], 'mods')
-        update_list_mods_db(db_ready_mods)
-        link_mods_to_game(db_ready_mods, game)
-        db.session.commit()
+
+        # a mod already in db is refreshed by the write-behind buffer, a new 
+        # one is written now so it can be added to a modlist from this page
+        mod_in_db = db.session.execute(
+            db.select(db.exists().where(Mod.id.in_([mod['id'] for mod in db_ready_mods])))
+        ).scalar()
+        if mod_in_db:
+            mod_upsert_buffer.add(db_ready_mods, game.id)
+        elif db_ready_mods:
+            update_list_mods_db(db_ready_mods)
+            link_mods_to_game(db_ready_mods, game)
+            db.session.commit()
     except Exception as e:
         # above try block not necessary for page display, continue to display page
         db.session.rollback()
@@ -844,18 +1223,19 @@ def show_mod_page(game_domain_name, mod_id, headers=None):
 
     # Pull relevant data out of API response object to populate page
     page_ready_mod = filter_nxs_mod_page(nexus_mod)
-    if str(mod_id) in session:
-        if session[str(mod_id)] != page_ready_mod['user_endorsed']:
+    endorsements = session.get(ENDORSEMENTS_KEY, {})
+    if str(mod_id) in endorsements:
+        if endorsements[str(mod_id)] != page_ready_mod['user_endorsed']:
             page_ready_mod['user_endorsed'] = "Not-Updated"
         else:
-            del session[str(mod_id)]
+            del endorsements[str(mod_id)]
+            session[ENDORSEMENTS_KEY] = endorsements
 
     if not page_ready_mod:
         description = 'Mod data could not be retrieved from Nexus.<br>Please ensure requested game domain and mod id are correct and try again.'
         abort(404, description)
 
-    if 'tracked_mod_ids' in session:
-        tracked_mod_ids = session['tracked_mod_ids']
+    tracked_mod_ids = get_session_tracked_mod_ids()
 
     return render_template('games/mod.html', game=game, mod=page_ready_mod, tracked_mod_ids=tracked_mod_ids)
 
@@ -883,6 +1263,8 @@ def show_game_page(game_domain_name, headers=None):
         {'mod_cat': 'latest_updated', 'section_title':'Latest Updated Mods'}
     ]
 
+    page_mods = {}
+
     for cat in mod_categories:
         nxs_category = get_mods_of_type_nxs(game, cat['mod_cat'], headers=headers)
         
@@ -892,14 +1274,15 @@ def show_game_page(game_domain_name, headers=None):
             try:
                 db_ready_data = filter_nxs_data(nxs_category, 'mods')
                 cat['data'] = db_ready_data
-                update_list_mods_db(db_ready_data)
-                link_mods_to_game(db_ready_data, game)
-                db.session.commit()
+                page_mods.update((mod['id'], mod) for mod in db_ready_data)
 
             except Exception as e:
-                db.session.rollback()
                 print(f"Error func: show_game_page({game_domain_name})\nError detail: {e}")
 
+    # page is rendered from Nexus' data, the write-behind 
+    # buffer saves the mods to the db after the response
+    mod_upsert_buffer.add(page_mods.values(), game.id)
+
     return render_template('games/game.html', game=game, mod_categories=mod_categories)
 
 
@@ -908,17 +1291,169 @@ def show_all_games_page():
     """Show list of popular games Nexus hosts mods for, and 
     an alphabet menu to see list of games starting with that letter.
     Click a game to go to that game page.
+
+    Logged out visitors without flashed messages get the page 
+    pre-rendered for the current games catalogue.
     """ 
 
     try:
-        games_list = get_all_games_db()
+        catalogue = get_games_catalogue()
     except Exception as e:
+        db.session.rollback()
         print("Error getting games from db: ", e)
         flash("Problem occurred fetching games list, refresh page to reattempt.", 'warning')
-        return render_template('games/all-games.html', games_list=[{'name':"Error"}])
+        return render_template('games/all-games.html', games_list=[{'name':"Error"}], games_url=url_for('games_api'), letter_urls={})
+
+    if g.user or session.get('_flashes'):
+        return render_all_games_page(catalogue)
+
+    response = make_prebuilt_response(get_prebuilt_all_games_page(catalogue), 'text/html')
+    # logged in visitors get a different page at the same url
+    response.vary.add('Cookie')
+
+    return response
 
-    else:
-        return render_template('games/all-games.html', games_list=games_list)
+
+@app.route('/api/games')
+def games_api():
+    """Every game hosted on Nexus, ordered by downloads, for the 
+    all-games page's more popular games button.
+
+    Serves the games catalogue's pre-serialized JSON. Requests 
+    with 'v' set to the current games version may be cached for 
+    a year, a new games list gets a new version and so a new url.
+
+    Returns JSON: [{'id', 'domain_name', 'name', 'downloads'}]"""
+
+    try:
+        catalogue = get_games_catalogue()
+    except Exception as e:
+        db.session.rollback()
+        print("Error getting games from db - games_api(): ", e)
+        abort(503, "Problem occurred fetching games list, please try again.")
+
+    return make_prebuilt_response(
+        catalogue.games_json, 
+        'application/json', 
+        immutable=request.args.get('v') == catalogue.games_json.etag
+    )
+
+
+@app.route('/api/games/letters/<string:letter>')
+def games_letter_api(letter):
+    """Games whose names start with letter, A-Z or 'other' for 
+    any other first character, ordered by name, for the all-games 
+    page's alphabet menu. Cached like games_api().
+
+    Returns JSON: [{'domain_name', 'name'}]"""
+
+    letter = OTHER_LETTER if letter == OTHER_LETTER_URL else letter.upper()
+
+    try:
+        catalogue = get_games_catalogue()
+    except Exception as e:
+        db.session.rollback()
+        print("Error getting games from db - games_letter_api(): ", e)
+        abort(503, "Problem occurred fetching games list, please try again.")
+
+    if letter not in catalogue.letters_json:
+        abort(404, f"Games are listed by letters A-Z or '{OTHER_LETTER_URL}', not '{letter}'.")
+
+    return make_prebuilt_response(
+        catalogue.letters_json[letter], 
+        'application/json', 
+        immutable=request.args.get('v') == catalogue.games_json.etag
+    )
+
+
+@app.route('/mods/search')
+@login_required
+def search_mods():
+    """Search mods stored in ModList by name, author and summary, 
+    so mods can be found and added to modlists without going back 
+    to Nexus. Only mods someone has viewed or tracked through 
+    ModList are stored.
+
+    Query string: 'q' search text, optional 'game' domain name to 
+    only search that game's mods, and 'after' cursor of the 
+    previous page's last result for the next page.
+    """
+
+    search_text = request.args.get('q', '').strip()
+    game_domain_name = request.args.get('game', '').strip()
+
+    game = None
+    if game_domain_name:
+        game = get_game_db(game_domain_name)
+        if game is None:
+            abort(404, f"Sorry, no game with domain name '{game_domain_name}' was found to search the mods of.")
+
+    # cursor format: '<rank>_<mod id>' of the previous page's last result
+    after = None
+    if request.args.get('after'):
+        try:
+            after_rank, after_mod_id = request.args['after'].split('_')
+            after = (float(after_rank), int(after_mod_id))
+        except ValueError:
+            abort(400, "Invalid search page. Please start the search again from the first page.")
+
+    results, next_cursor = [], None
+    if search_text:
+        try:
+            results, next_cursor = search_mods_db(search_text, game_id=game.id if game else None, after=after)
+        except Exception as e:
+            db.session.rollback()
+            print("Error searching mods - search_mods(): ", e)
+            flash("Problem occurred searching mods, please try again.", 'danger')
+
+    next_page = f'{next_cursor[0]!r}_{next_cursor[1]}' if next_cursor else None
+
+    return render_template('games/mod-search.html', search_text=search_text, game=game, results=results, next_page=next_page, is_first_page=after is None)
+
+
+@app.route('/api/typeahead')
+def typeahead():
+    """Suggestions for search boxes as the user types, matching 
+    game and stored mod names by prefix, substring, or typo 
+    tolerant trigram similarity.
+
+    Query string: 'q' text typed so far, optional 'game' domain 
+    name to only suggest that game's mods, optional 'limit' of 
+    suggestions of each kind.
+
+    Returns JSON: {'q': str, 'games': [{'domain_name', 'name'}], 
+    'mods': [{'id', 'name', 'game_domain_name'}]}"""
+
+    search_text = ' '.join(request.args.get('q', '').split())
+    limit = min(max(request.args.get('limit', TYPEAHEAD_LIMIT, type=int), 1), TYPEAHEAD_MAX_LIMIT)
+    game_domain_name = request.args.get('game', '').strip()
+
+    game = None
+    if game_domain_name:
+        game = get_game_db(game_domain_name)
+        if game is None:
+            abort(404, f"Sorry, no game with domain name '{game_domain_name}' was found to suggest the mods of.")
+
+    suggestions = {'q': search_text, 'games': [], 'mods': []}
+
+    if len(search_text) >= TYPEAHEAD_MIN_LENGTH:
+        try:
+            # games are only suggested when not already searching one game's mods
+            if game is None:
+                suggestions['games'] = typeahead_games_db(search_text, limit=limit)
+            suggestions['mods'] = typeahead_mods_db(search_text, game_id=game.id if game else None, limit=limit)
+
+        except Exception as e:
+            db.session.rollback()
+            print("Error getting suggestions - typeahead(): ", e)
+            return jsonify(suggestions), 503
+
+    response = jsonify(suggestions)
+    # same answer for everyone, browsers and proxies can reuse it
+    response.cache_control.public = True
+    response.cache_control.max_age = TYPEAHEAD_MAX_AGE
+
+    return response
 
 
 ##############################################################################
@@ -940,11 +1475,8 @@ def endorse_mod(game_domain_name, mod_id, endorse_action, headers=None):
     endorsement_requested = endorse_mod_nxs(game_domain_name, mod_id, endorse_action, headers=headers)
     # error handling success or failure message flashed from nexus_api.py
     
-    if endorse_action == 'endorse' and endorsement_requested:
-        session[str(mod_id)] = 'Endorsed'
-
-    if endorse_action == 'abstain' and endorsement_requested:
-        session[str(mod_id)] = 'Abstained'
+    if endorsement_requested:
+        do_endorsement_store(mod_id, 'Endorsed' if endorse_action == 'endorse' else 'Abstained')
 
     return redirect(url_for('show_mod_page', game_domain_name=game_domain_name, mod_id=int(mod_id)))
 
@@ -962,25 +1494,60 @@ def track_mod(game_domain_name, mod_id, track_action, headers=None):
         description = "Invalid URL. Mod endorsement request urls must end with '/add' or '/delete'."
         abort(400, description)
 
-    if track_action == 'add' and 'tracked_mod_ids' in session and mod_id in session['tracked_mod_ids']:
+    tracked_mod_ids = get_session_tracked_mod_ids()
+
+    if track_action == 'add' and tracked_mod_ids is not None and mod_id in tracked_mod_ids:
         flash("Mod is already tracked by your Nexus account. An already tracked mod can not be tracked again. If this is inaccurate, please go to your Nexus Tracked Mods modpage and click the 'Re-Sync Tracked Mods to Nexus' button so we can display current information.", 'warning')
 
-    if track_action == 'delete' and 'tracked_mod_ids' in session and mod_id not in session['tracked_mod_ids']:
+    if track_action == 'delete' and tracked_mod_ids is not None and mod_id not in tracked_mod_ids:
         flash("Mod is already not tracked by your Nexus account. A mod that is not tracked can not be un-tracked. If this is inaccurate, please go to your Nexus Tracked Mods modpage and click the 'Re-Sync Tracked Mods to Nexus' button so we can display current information.", 'warning')
     
     tracking_requested = track_mod_nxs(game_domain_name, mod_id, track_action, headers=headers)
     # error handling success or failure message flashed from nexus_api.py
     
     if tracking_requested:
-        update_tracked_mods_from_nexus(g.user.id, headers=headers)
-        if "tracked_mod_ids" in session and track_action == 'add' and mod_id not in session["tracked_mod_ids"]:
-            session["tracked_mod_ids"].append(mod_id)
-        if "tracked_mod_ids" in session and track_action == 'delete' and mod_id in session["tracked_mod_ids"]:
-            session["tracked_mod_ids"].remove(mod_id)
+        # apply just this mod to tracked modlist, the full sync 
+        # with Nexus waits for the next tracked modlist page view
+        session[TRACKED_MODS_RECONCILE_KEY] = True
+        try:
+            modlist_updated = update_tracked_mod_db(g.user.id, game_domain_name, mod_id, track_action, headers=headers)
+        except Exception as e:
+            print("Error updating tracked modlist - track_mod(): ", e)
+            flash("Your Nexus Tracking Centre was updated, but your Nexus Tracked Mods modlist could not be. It will be synced with Nexus when you next open it.", 'warning')
+        else:
+            if not modlist_updated:
+                flash("Your Nexus Tracking Centre was updated, but this mod could not be added to your Nexus Tracked Mods modlist. It will be synced with Nexus when you next open it.", 'warning')
+            if tracked_mod_ids is not None and track_action == 'add' and mod_id not in tracked_mod_ids:
+                do_tracked_mod_ids_store(g.user.id, tracked_mod_ids | {mod_id})
+            if tracked_mod_ids is not None and track_action == 'delete' and mod_id in tracked_mod_ids:
+                do_tracked_mod_ids_store(g.user.id, tracked_mod_ids - {mod_id})
 
     return redirect(url_for('show_mod_page', game_domain_name=game_domain_name, mod_id=int(mod_id)))
 
 
+##############################################################################
+# Background job handlers, run by jobs.py workers outside of requests
+
+@job_handler('games_list_update')
+def run_games_list_update_job(payload):
+    """Use list of all games from Nexus API 
+    to update all Games in db"""
+
+    nexus_games = get_all_games_nxs(headers=get_job_headers(payload))
+    db_ready_games = filter_nxs_data(nexus_games, 'games')
+    games_updated = update_all_games_db(db_ready_games)
+    if isinstance(games_updated, Exception):
+        raise games_updated
+
+
+@job_handler('tracked_mods_sync')
+def run_tracked_mods_sync_job(payload):
+    """Sync user's Nexus Tracked Mods modlist 
+    with their Nexus Tracking Centre"""
+
+    run_tracked_sync(payload['user_id'], get_job_headers(payload))
+
+
 ##############################################################################
 # Homepage and error pages
 
@@ -998,10 +1565,12 @@ def homepage():
     if not g.user:
         return render_template('home-anon.html')
         
-    empty_modlists = get_empty_modlists(g.user.id)
-    modlists_by_game = get_recent_modlists_by_game(g.user.id)
+    profile_modlists = get_modlists_by_game(g.user.id)
+    empty_modlists = profile_modlists['empty_modlists']
+    modlists_by_game = profile_modlists['modlists_by_game']
+    preview_mods = profile_modlists['preview_mods']
 
-    return render_template('users/profile-user.html', user=g.user, empty_modlists=empty_modlists, modlists_by_game=modlists_by_game)
+    return render_template('users/profile-user.html', user=g.user, empty_modlists=empty_modlists, modlists_by_game=modlists_by_game, preview_mods=preview_mods)
 
 
 @app.errorhandler(400)
@@ -0,0 +1,119 @@
+"""Benchmark: WAL bytes and time of a games refresh where nothing changed
+
+Compares update_all_games_db(), which skips unchanged rows, with
+the unconditional ON CONFLICT DO UPDATE it replaced. Writes
+synthetic games with ids from BENCHMARK_GAME_ID_START and deletes
+them at the end, so point SUPABASE_DB_URL at a test database.
+Run from the repo root:
+
+    SUPABASE_DB_URL=postgresql:///modlist_test FERNET_ENCRYPTION_KEY=... \\
+        python -m benchmarks.noop_games_refresh --games 5000 --runs 5
+
+WAL is measured with pg_current_wal_lsn(), which counts writes by
+every session, so run it against an otherwise idle database."""
+
+import argparse
+from statistics import median
+from time import perf_counter
+from sqlalchemy.dialects.postgresql import insert
+from app import app
+from models import db, Game
+from utilities import update_all_games_db
+
+BENCHMARK_GAME_ID_START = 900_000_000
+
+
+def make_games(count):
+    """Returns count db ready synthetic games."""
+
+    return [
+        {
+            'id': BENCHMARK_GAME_ID_START + n,
+            'domain_name': f'benchmark_game_{n}',
+            'name': f'Benchmark Game {n}',
+            'downloads': n
+        }
+        for n in range(count)
+    ]
+
+
+def unconditional_games_upsert(db_ready_games):
+    """Games upsert as it was before unchanged rows were skipped,
+    every row passed in is rewritten."""
+
+    stmt = insert(Game).values(db_ready_games)
+    stmt = stmt.on_conflict_do_update(
+        constraint="games_pkey",
+        set_={
+            'id': stmt.excluded.id,
+            'domain_name': stmt.excluded.domain_name,
+            'name': stmt.excluded.name,
+            'downloads': stmt.excluded.downloads
+        }
+    )
+    db.session.execute(stmt)
+    db.session.commit()
+
+    return None
+
+
+def measure_refresh(refresh, db_ready_games):
+    """Runs refresh(db_ready_games) once.
+
+    Returns (seconds, WAL bytes written, refresh's return value)."""
+
+    wal_start = db.session.execute(db.text('SELECT pg_current_wal_lsn()')).scalar()
+    db.session.commit()
+
+    start = perf_counter()
+    result = refresh(db_ready_games)
+    seconds = perf_counter() - start
+
+    wal_bytes = db.session.execute(
+        db.text('SELECT pg_wal_lsn_diff(pg_current_wal_lsn(), CAST(:wal_start AS pg_lsn))'),
+        {'wal_start': wal_start}
+    ).scalar()
+    db.session.commit()
+
+    return seconds, int(wal_bytes), result
+
+
+def delete_benchmark_games():
+    db.session.execute(db.delete(Game).where(Game.id >= BENCHMARK_GAME_ID_START))
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure a games refresh where nothing changed.")
+    parser.add_argument('--games', type=int, default=5000, help="synthetic games in the refresh")
+    parser.add_argument('--runs', type=int, default=5, help="runs per strategy, the median is reported")
+    args = parser.parse_args()
+
+    strategies = [
+        ('unconditional upsert', unconditional_games_upsert),
+        ('skip-unchanged upsert', update_all_games_db)
+    ]
+
+    with app.app_context():
+        delete_benchmark_games()
+        db_ready_games = make_games(args.games)
+
+        try:
+            # first refresh inserts the games, the measured ones change nothing
+            update_all_games_db(db_ready_games)
+
+            print(f"No-op refresh of {args.games} games, median of {args.runs} runs")
+            print(f"{'strategy':<24}{'time (ms)':>12}{'WAL (bytes)':>14}  last result")
+
+            for name, refresh in strategies:
+                runs = [measure_refresh(refresh, db_ready_games) for _ in range(args.runs)]
+                seconds = median(run[0] for run in runs)
+                wal_bytes = median(run[1] for run in runs)
+                print(f"{name:<24}{seconds * 1000:>12.1f}{wal_bytes:>14,.0f}  {runs[-1][2]}")
+
+        finally:
+            delete_benchmark_games()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,252 @@
+"""COPY-based bulk loads of games and mods, for catalogue-scale ingests
+
+update_all_games_db() sends every row in one INSERT ... VALUES
+statement and update_list_mods_db() one per chunk, both building
+statements from a list held in memory. For initial population
+and disaster recovery loads, rows are instead streamed from any
+iterable through COPY into a temporary staging table, then merged
+into the real table with one INSERT ... SELECT ... ON CONFLICT DO
+UPDATE that skips unchanged rows. Only STREAM_CHUNK_SIZE characters
+of rows are held in memory at a time, and the merge's counts are
+totalled in the db.
+
+From the repo root, with the app's environment variables set:
+
+    python bulk_loader.py games games.jsonl
+    python bulk_loader.py mods GAME_DOMAIN_NAME mods.jsonl
+
+Each line of the file is one game or mod object as the Nexus API
+returns it, filtered with filter_nxs_data() before loading."""
+
+import argparse
+import json
+from collections import namedtuple
+from time import perf_counter
+from sqlalchemy.dialects.postgresql import insert
+from app import app
+from models import db, Game, Mod, DataVersion, game_mod
+from cache_invalidation import notify_invalidation
+from games_catalogue import GAMES_VERSION_NAME, invalidate_games_catalogue
+from utilities import RETURNING_INSERTED, filter_nxs_data, get_game_db
+
+GAME_COLUMNS = ['id', 'domain_name', 'name', 'downloads']
+MOD_COLUMNS = ['id', 'name', 'summary', 'is_nsfw', 'picture_url', 'updated_timestamp', 'uploaded_by']
+
+STREAM_CHUNK_SIZE = 64 * 1024 # characters of COPY data built per read
+
+
+class BulkLoadStats(namedtuple('BulkLoadStats', ['rows', 'inserted', 'updated', 'unchanged', 'seconds'])):
+    """rows: rows streamed, duplicates of an id included.
+    inserted, updated, unchanged: distinct ids merged in each outcome."""
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+def copy_text_value(value):
+    """Formats value for COPY's text format.
+
+    Returns str."""
+
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+
+    return (
+        str(value)
+        .replace('\\', '\\\\')
+        .replace('\t', '\\t')
+        .replace('\n', '\\n')
+        .replace('\r', '\\r')
+    )
+
+
+class CopyRowStream:
+    """File-like reader of db ready row dicts as COPY text lines,
+    built only as COPY reads them so rows are never all in memory."""
+
+    def __init__(self, rows, columns):
+        self._rows = iter(rows)
+        self._columns = columns
+        self._buffer = ''
+        self.row_count = 0
+
+    def read(self, size=STREAM_CHUNK_SIZE):
+        size = size if size and size > 0 else STREAM_CHUNK_SIZE
+        lines = [self._buffer]
+        length = len(self._buffer)
+
+        while length < size:
+            row = next(self._rows, None)
+            if row is None:
+                break
+            line = '\t'.join(copy_text_value(row.get(column)) for column in self._columns) + '\n'
+            lines.append(line)
+            length += len(line)
+            self.row_count += 1
+
+        data = ''.join(lines)
+        self._buffer = data[size:]
+
+        return data[:size]
+
+
+def stage_rows(model, columns, rows):
+    """Creates a temporary staging table shaped like model's table,
+    dropped on commit, and COPYs rows into it in the current db.session
+    transaction. staged_row records each row's order, so the last
+    row streamed for an id is the one merged.
+
+    Returns (staging Table, number of rows streamed)."""
+
+    table_name = f'{model.__tablename__}_staging'
+
+    db.session.execute(db.text(
+        f'CREATE TEMPORARY TABLE {table_name} '
+        f'(LIKE {model.__tablename__} INCLUDING DEFAULTS, staged_row BIGSERIAL) ON COMMIT DROP'
+    ))
+
+    stream = CopyRowStream(rows, columns)
+    dbapi_connection = db.session.connection().connection.dbapi_connection
+    with dbapi_connection.cursor() as cursor:
+        cursor.copy_expert(f"COPY {table_name} ({', '.join(columns)}) FROM STDIN", stream)
+
+    staging = db.Table(
+        table_name,
+        db.MetaData(),
+        db.Column('staged_row', db.BigInteger),
+        *[db.Column(column, model.__table__.c[column].type) for column in columns]
+    )
+
+    return staging, stream.row_count
+
+
+def merge_staged_rows(model, columns, staging):
+    """Upserts the latest staged row of each id into model's table,
+    only rewriting rows where a column IS DISTINCT FROM the staged value.
+
+    Returns (inserted, updated, unchanged) counts."""
+
+    table = model.__table__
+    update_columns = [column for column in columns if column != 'id']
+
+    latest_staged = (
+        db.select(*[staging.c[column] for column in columns])
+        .distinct(staging.c.id)
+        .order_by(staging.c.id, staging.c.staged_row.desc())
+    )
+
+    stmt = insert(model).from_select(columns, latest_staged)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.id],
+        set_={column: stmt.excluded[column] for column in update_columns},
+        where=db.or_(*[table.c[column].is_distinct_from(stmt.excluded[column]) for column in update_columns])
+    ).returning(RETURNING_INSERTED)
+    upserted = stmt.cte('upserted')
+
+    staged_ids = db.session.execute(
+        db.select(db.func.count(db.distinct(staging.c.id)))
+    ).scalar()
+    inserted, updated = db.session.execute(
+        db.select(
+            db.func.count().filter(upserted.c.inserted),
+            db.func.count().filter(db.not_(upserted.c.inserted))
+        )
+    ).one()
+
+    return inserted, updated, staged_ids - inserted - updated
+
+
+def bulk_load_games_db(db_ready_games):
+    """Loads any number of games, as filtered by filter_nxs_data(),
+    through COPY and one merge. Bumps the games version when any game
+    changed, like update_all_games_db().
+
+    Returns BulkLoadStats if successful, or raises Exception details."""
+
+    start = perf_counter()
+
+    try:
+        staging, rows = stage_rows(Game, GAME_COLUMNS, db_ready_games)
+        inserted, updated, unchanged = merge_staged_rows(Game, GAME_COLUMNS, staging)
+
+        if inserted or updated:
+            DataVersion.bump_version(GAMES_VERSION_NAME)
+            notify_invalidation('games')
+
+        db.session.commit()
+
+    except Exception as e:
+        db.session.rollback()
+        print("Function: bulk_load_games_db()\nFailed to bulk load games into db, error: ", e)
+        raise e
+
+    if inserted or updated:
+        invalidate_games_catalogue()
+
+    return BulkLoadStats(rows, inserted, updated, unchanged, perf_counter() - start)
+
+
+def bulk_load_mods_db(db_ready_mods, game_id=None):
+    """Loads any number of mods, as filtered by filter_nxs_data(),
+    through COPY and one merge, linking them to the game with game_id
+    if one is passed.
+
+    Returns BulkLoadStats if successful, or raises Exception details."""
+
+    start = perf_counter()
+
+    try:
+        staging, rows = stage_rows(Mod, MOD_COLUMNS, db_ready_mods)
+        inserted, updated, unchanged = merge_staged_rows(Mod, MOD_COLUMNS, staging)
+
+        if game_id is not None:
+            db.session.execute(
+                insert(game_mod)
+                .from_select(['game_id', 'mod_id'], db.select(db.literal(game_id), staging.c.id).distinct())
+                .on_conflict_do_nothing()
+            )
+
+        db.session.commit()
+
+    except Exception as e:
+        db.session.rollback()
+        print("Function: bulk_load_mods_db()\nFailed to bulk load mods into db, error: ", e)
+        raise e
+
+    return BulkLoadStats(rows, inserted, updated, unchanged, perf_counter() - start)
+
+
+def read_nexus_jsonl(path, list_type):
+    """Yields db ready rows from a file of one Nexus API
+    object per line, list_type 'games' or 'mods'."""
+
+    with open(path) as file:
+        for line in file:
+            if line.strip():
+                yield from filter_nxs_data([json.loads(line)], list_type)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Bulk load Nexus games or mods from a JSON lines file.")
+    subparsers = parser.add_subparsers(dest='list_type', required=True)
+    games_parser = subparsers.add_parser('games', help="load games")
+    games_parser.add_argument('path', help="file of Nexus game objects, one per line")
+    mods_parser = subparsers.add_parser('mods', help="load mods of one game")
+    mods_parser.add_argument('game_domain_name', help="Nexus domain name of the mods' game")
+    mods_parser.add_argument('path', help="file of Nexus mod objects, one per line")
+    args = parser.parse_args()
+
+    with app.app_context():
+        if args.list_type == 'games':
+            stats = bulk_load_games_db(read_nexus_jsonl(args.path, 'games'))
+        else:
+            game = get_game_db(args.game_domain_name)
+            if game is None:
+                parser.error(f"Game '{args.game_domain_name}' not found in db, load games first.")
+            stats = bulk_load_mods_db(read_nexus_jsonl(args.path, 'mods'), game_id=game.id)
+
+    print(f"{stats.rows} rows in {stats.seconds:.2f}s ({stats.rows_per_second:,.0f} rows/s): "
+          f"{stats.inserted} inserted, {stats.updated} updated, {stats.unchanged} unchanged")
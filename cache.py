@@ -0,0 +1,264 @@
+"""Cache backends for app.py and utilities.py
+
+Both backends share one interface: get, set with a TTL and
+tags, delete, invalidate_tag, clear, and stats() with hit,
+miss and eviction counters.
+
+- LRUCache: bounded in-process cache, one copy per worker.
+- RedisCache: shared by every worker, talks to a Redis-protocol
+  server through a redis-py compatible client (redis.Redis, or
+  fakeredis.FakeRedis in tests). redis is an optional dependency,
+  only imported when CACHE_URL points at a Redis server."""
+
+import os
+import pickle
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic
+
+DEFAULT_CACHE_MAX_SIZE = 4096
+DEFAULT_CACHE_TTL = 300 # seconds
+
+
+class CacheBackend(ABC):
+    """Interface shared by cache backends.
+
+    ttl is in seconds, None uses the backend's default_ttl and 0
+    keeps the entry until evicted. tags group keys so they can be
+    dropped together with invalidate_tag(). is_shared is True for
+    backends every worker reads and writes."""
+
+    is_shared = False
+
+    def __init__(self, default_ttl=DEFAULT_CACHE_TTL):
+        self.default_ttl = default_ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @abstractmethod
+    def get(self, key, default=None):
+        pass
+
+    @abstractmethod
+    def set(self, key, value, ttl=None, tags=()):
+        pass
+
+    @abstractmethod
+    def delete(self, key):
+        pass
+
+    @abstractmethod
+    def invalidate_tag(self, tag):
+        pass
+
+    @abstractmethod
+    def clear(self):
+        pass
+
+    def get_or_set(self, key, make_value, ttl=None, tags=()):
+        """Get cached value of key, or call make_value() and cache
+        what it returns. None is never cached."""
+
+        value = self.get(key)
+        if value is None:
+            value = make_value()
+            if value is not None:
+                self.set(key, value, ttl=ttl, tags=tags)
+
+        return value
+
+    def stats(self):
+        """Returns {'hits', 'misses', 'evictions'} counters."""
+
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions}
+
+    def _ttl(self, ttl):
+        return self.default_ttl if ttl is None else ttl
+
+
+class LRUCache(CacheBackend):
+    """Bounded in-process cache, least recently used
+    entries are evicted once max_size is reached."""
+
+    def __init__(self, max_size=DEFAULT_CACHE_MAX_SIZE, default_ttl=DEFAULT_CACHE_TTL):
+        super().__init__(default_ttl)
+        self.max_size = max_size
+        self._entries = OrderedDict() # {key: (value, expires_at or None, tags)}
+        self._tagged_keys = {} # {tag: set of keys}
+        self._lock = Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            value, expires_at, tags = entry
+            if expires_at is not None and expires_at <= monotonic():
+                self._remove(key)
+                self.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl=None, tags=()):
+        ttl = self._ttl(ttl)
+        expires_at = monotonic() + ttl if ttl else None
+        tags = frozenset(tags)
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = (value, expires_at, tags)
+            for tag in tags:
+                self._tagged_keys.setdefault(tag, set()).add(key)
+
+            while len(self._entries) > self.max_size:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def invalidate_tag(self, tag):
+        with self._lock:
+            for key in list(self._tagged_keys.get(tag, ())):
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tagged_keys.clear()
+
+    def _remove(self, key):
+        """Drop key and its tag links, caller holds the lock."""
+
+        value, expires_at, tags = self._entries.pop(key)
+        for tag in tags:
+            tagged = self._tagged_keys.get(tag)
+            if tagged is not None:
+                tagged.discard(key)
+                if not tagged:
+                    del self._tagged_keys[tag]
+
+
+class RedisCache(CacheBackend):
+    """Cache on a Redis-protocol server, shared by every worker.
+
+    Values are pickled. Each tag is a Redis set of the keys tagged
+    with it, which lives as long as the longest lived of them.
+    Evictions are the server's evicted_keys count, so they cover
+    every client of the server, hits and misses are counted by
+    this process."""
+
+    is_shared = True
+
+    def __init__(self, client, prefix='modlist:', default_ttl=DEFAULT_CACHE_TTL):
+        super().__init__(default_ttl)
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key, default=None):
+        raw = self.client.get(self._key(key))
+        if raw is None:
+            self.misses += 1
+            return default
+
+        self.hits += 1
+        return pickle.loads(raw)
+
+    def set(self, key, value, ttl=None, tags=()):
+        ttl = self._ttl(ttl)
+        cache_key = self._key(key)
+
+        tag_keys = [self._tag_key(tag) for tag in tags]
+
+        # tag sets get the TTL of the entries in them, so sets of 
+        # expired entries don't pile up on the server
+        tag_ttls = []
+        if tag_keys:
+            pipe = self.client.pipeline()
+            for tag_key in tag_keys:
+                pipe.ttl(tag_key)
+            tag_ttls = pipe.execute()
+
+        pipe = self.client.pipeline()
+        pipe.set(cache_key, pickle.dumps(value), ex=ttl or None)
+        for tag_key, tag_ttl in zip(tag_keys, tag_ttls):
+            pipe.sadd(tag_key, cache_key)
+            if not ttl:
+                pipe.persist(tag_key)
+            elif tag_ttl == -2 or 0 <= tag_ttl < ttl: # -2 new set, -1 set kept until deleted
+                pipe.expire(tag_key, ttl)
+        pipe.execute()
+
+    def delete(self, key):
+        self.client.delete(self._key(key))
+
+    def invalidate_tag(self, tag):
+        tag_key = self._tag_key(tag)
+
+        # WATCH the tag set, so a key tagged by another client between 
+        # SMEMBERS and the deletes makes the transaction run again
+        def delete_tagged(pipe):
+            cache_keys = pipe.smembers(tag_key)
+            pipe.multi()
+            if cache_keys:
+                pipe.delete(*cache_keys)
+            pipe.delete(tag_key)
+
+        self.client.transaction(delete_tagged, tag_key)
+
+    def clear(self):
+        cache_keys = list(self.client.scan_iter(match=f'{self.prefix}*'))
+        if cache_keys:
+            self.client.delete(*cache_keys)
+
+    def stats(self):
+        try:
+            self.evictions = int(self.client.info('stats').get('evicted_keys', 0))
+        except Exception as e:
+            print("Function: RedisCache.stats()\nFailed to read evicted_keys from Redis server INFO; error: ", e)
+
+        return super().stats()
+
+    def _key(self, key):
+        return f'{self.prefix}{key}'
+
+    def _tag_key(self, tag):
+        return f'{self.prefix}tag:{tag}'
+
+
+def make_cache(cache_url=None):
+    """Makes cache backend for cache_url.
+
+    - None or 'memory://': LRUCache
+    - 'redis://...' or 'rediss://...': RedisCache, needs redis installed
+
+    Returns CacheBackend, or raises RuntimeError."""
+
+    if not cache_url or cache_url.startswith('memory://'):
+        return LRUCache()
+
+    if cache_url.startswith(('redis://', 'rediss://')):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("CACHE_URL is a Redis server but the redis package is not installed")
+
+        return RedisCache(redis.Redis.from_url(cache_url))
+
+    raise RuntimeError(f"Unsupported CACHE_URL scheme: '{cache_url}'")
+
+
+# cache shared by the app, set CACHE_URL to share it between workers
+cache = make_cache(os.environ.get('CACHE_URL'))
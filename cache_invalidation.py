@@ -0,0 +1,131 @@
+"""Cross-worker cache invalidation over Postgres LISTEN/NOTIFY
+
+Per-process caches (games catalogue, user snapshots, entries in
+an LRUCache) can't see changes committed by other workers. Code
+that changes cached data calls notify_invalidation() inside its
+transaction. Postgres only delivers the notification if that
+transaction commits, and every worker's listener thread then
+calls the handlers registered for the event's kind.
+
+If the listener loses its connection it may miss events, so after
+reconnecting it calls every handler with key None to drop all of
+this worker's cached data. Handlers leave a shared cache (Redis)
+alone, the other workers' listeners keep it current."""
+
+import json
+import os
+import select
+from threading import Lock, Thread
+from time import sleep
+import psycopg2
+from models import db
+
+INVALIDATION_CHANNEL = 'modlist_cache_invalidation'
+LISTENER_POLL_TIMEOUT = 5 # seconds between checks of the listen connection
+LISTENER_MAX_RETRY_WAIT = 60 # seconds
+
+_handlers = {} # {kind: [handler(key)]}
+_listener_pid = None
+_listener_lock = Lock()
+
+
+def register_invalidation_handler(kind, handler):
+    """Call handler(key) when an invalidation event of kind arrives.
+    key is None when all of kind's cached data should be dropped."""
+
+    _handlers.setdefault(kind, []).append(handler)
+
+
+def notify_invalidation(kind, key=None, conn=None):
+    """Queues an invalidation event in the current db transaction,
+    sent to every worker when the caller commits. Pass conn to 
+    send it with a transaction on that connection instead of 
+    db.session's.
+
+    Returns nothing, or raises Exception."""
+
+    payload = json.dumps({'kind': kind, 'key': key})
+
+    (conn or db.session).execute(
+        db.select(db.func.pg_notify(INVALIDATION_CHANNEL, payload))
+    )
+
+
+def dispatch_invalidation(kind, key=None):
+    """Calls this worker's handlers for an invalidation event."""
+
+    for handler in _handlers.get(kind, []):
+        try:
+            handler(key)
+        except Exception as e:
+            print(f"Function: dispatch_invalidation()\nHandler for '{kind}' invalidation of key {key} failed; error: ", e)
+
+
+def dispatch_all_invalidations():
+    """Calls every handler with key None, dropping all cached data."""
+
+    for kind in list(_handlers):
+        dispatch_invalidation(kind)
+
+
+def listen_for_invalidations(dsn):
+    """Listener thread loop: LISTENs on INVALIDATION_CHANNEL and
+    dispatches each notification, reconnecting after failures."""
+
+    retry_wait = 1
+    connected_before = False
+
+    while True:
+        conn = None
+        try:
+            conn = psycopg2.connect(dsn)
+            conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+            with conn.cursor() as cursor:
+                cursor.execute(f'LISTEN {INVALIDATION_CHANNEL};')
+
+            # events sent while disconnected were missed
+            if connected_before:
+                dispatch_all_invalidations()
+            connected_before = True
+            retry_wait = 1
+
+            while True:
+                if select.select([conn], [], [], LISTENER_POLL_TIMEOUT) == ([], [], []):
+                    continue
+
+                conn.poll()
+                while conn.notifies:
+                    notify = conn.notifies.pop(0)
+                    try:
+                        event = json.loads(notify.payload)
+                    except ValueError:
+                        print("Function: listen_for_invalidations()\nIgnoring malformed invalidation payload: ", notify.payload)
+                        continue
+                    dispatch_invalidation(event.get('kind'), event.get('key'))
+
+        except Exception as e:
+            print(f"Function: listen_for_invalidations()\nInvalidation listener connection failed, retrying in {retry_wait}s; error: ", e)
+            if conn is not None and not conn.closed:
+                conn.close()
+            sleep(retry_wait)
+            retry_wait = min(retry_wait * 2, LISTENER_MAX_RETRY_WAIT)
+
+
+def start_invalidation_listener(engine):
+    """Starts this worker's listener thread if it isn't running.
+
+    Safe to call on every request: gunicorn forks workers after
+    the app is imported, so each worker pid starts its own thread."""
+
+    global _listener_pid
+
+    if _listener_pid == os.getpid():
+        return
+
+    with _listener_lock:
+        if _listener_pid == os.getpid():
+            return
+
+        dsn = engine.url.set(drivername='postgresql').render_as_string(hide_password=False)
+        Thread(target=listen_for_invalidations, args=(dsn,), name='cache-invalidation-listener', daemon=True).start()
+        _listener_pid = os.getpid()
@@ -1,6 +1,6 @@
 from flask_wtf import FlaskForm
 from wtforms import validators, widgets
-from wtforms import StringField, PasswordField, TextAreaField, BooleanField, SelectMultipleField
+from wtforms import StringField, PasswordField, TextAreaField, BooleanField, SelectMultipleField, IntegerField
 
 
 class RegisterForm(FlaskForm):
@@ -177,4 +177,21 @@ class ModlistAddModForm(FlaskForm):
         validate_choice=False,
         coerce=int,
         description="Each selected Modlist will have this mod added to it"
-    )
\ No newline at end of file
+    )
+
+class ModlistBulkModsForm(FlaskForm):
+    """Form for adding or removing multiple Mods 
+    to/from a ModList at once"""
+
+    modlist_id = IntegerField(
+        'ModList',
+        [ validators.InputRequired(message="A ModList must be selected.") ],
+        description="ModList the selected Mods will be added to or removed from"
+    )
+    mod_ids = MultiCheckboxField(
+        'Pick one or more Mods',
+        validators=[MultiCheckboxAtLeastOne()], 
+        validate_choice=False,
+        coerce=int,
+        description="Each selected Mod will be added to or removed from the ModList"
+    )
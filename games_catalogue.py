@@ -0,0 +1,172 @@
+"""Per-process catalogue of every game for app.py
+
+Built from the games table in one query and swapped in whole,
+so game lookups and the all-games page skip the db. Rebuilt
+when the 'games' DataVersion row changes, which
+update_all_games_db() bumps whenever game data changes.
+
+The catalogue also holds the games list, and each letter's games
+ordered by name, serialized once as JSON, plain and gzipped, with a
+hash of it as a strong ETag. /api/games sends the same bytes to every
+request for that catalogue."""
+
+import gzip
+import json
+from collections import namedtuple
+from hashlib import sha256
+from threading import Lock
+from time import monotonic
+from types import MappingProxyType
+from models import db, Game, DataVersion
+
+GAMES_VERSION_NAME = 'games'
+# seconds between checks of the games version row, bounds how long a
+# process serves its catalogue if it missed another process' invalidation
+GAMES_VERSION_CHECK_INTERVAL = 600
+
+ALPHABET = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+OTHER_LETTER = '#'
+
+
+# Read-only snapshot of a Game row. Not attached to the db session,
+# query Game directly when relationships are needed.
+CatalogueGame = namedtuple('CatalogueGame', ['id', 'domain_name', 'name', 'downloads'])
+
+# games: CatalogueGames ordered by downloads, most downloaded first
+# games_data: games as dicts, ready for tojson in templates
+# by_domain_name: {domain_name: CatalogueGame}
+# by_letter: {'A'...'Z' or '#': CatalogueGames ordered by name}
+# games_json: PrebuiltBody of games_data as JSON
+# letters_json: {'A'...'Z' or '#': PrebuiltBody of [{'domain_name', 'name'}] ordered by name}
+GamesCatalogue = namedtuple('GamesCatalogue', ['version', 'games', 'games_data', 'by_domain_name', 'by_letter', 'games_json', 'letters_json'])
+
+# Response body built once: its bytes, the bytes gzipped, and
+# a hash of the bytes used as a strong ETag, which only changes
+# when the bytes do.
+PrebuiltBody = namedtuple('PrebuiltBody', ['body', 'body_gzip', 'etag'])
+
+
+_catalogue = None
+_catalogue_checked_at = 0
+_catalogue_lock = Lock()
+
+
+def game_letter(game_name):
+    """Returns alphabet menu letter game is listed under,
+    OTHER_LETTER for names not starting with A-Z."""
+
+    first = game_name[:1].upper()
+
+    return first if first in ALPHABET else OTHER_LETTER
+
+
+def prebuild_body(body):
+    """Compresses and hashes response body bytes.
+
+    Returns PrebuiltBody."""
+
+    return PrebuiltBody(
+        body=body,
+        # mtime=0 so every process compresses the same bytes
+        body_gzip=gzip.compress(body, compresslevel=9, mtime=0),
+        etag=sha256(body).hexdigest()[:32]
+    )
+
+
+def prebuild_json(data):
+    """Returns PrebuiltBody of data as compact JSON."""
+
+    return prebuild_body(json.dumps(data, separators=(',', ':')).encode())
+
+
+def build_games_catalogue(version):
+    """Queries all games and builds a GamesCatalogue
+    for the passed-in games version.
+
+    Returns GamesCatalogue."""
+
+    rows = db.session.execute(
+        db.select(Game.id, Game.domain_name, Game.name, Game.downloads)
+        .order_by(Game.downloads.desc(), Game.id)
+    ).all()
+
+    games = tuple(CatalogueGame(*row) for row in rows)
+
+    by_letter = {letter: [] for letter in ALPHABET + OTHER_LETTER}
+    for game in sorted(games, key=lambda game: game.name.lower()):
+        by_letter[game_letter(game.name)].append(game)
+
+    games_data = tuple(game._asdict() for game in games)
+
+    return GamesCatalogue(
+        version=version,
+        games=games,
+        games_data=games_data,
+        by_domain_name=MappingProxyType({game.domain_name: game for game in games}),
+        by_letter=MappingProxyType({letter: tuple(bucket) for letter, bucket in by_letter.items()}),
+        games_json=prebuild_json(games_data),
+        letters_json=MappingProxyType({
+            letter: prebuild_json([{'domain_name': game.domain_name, 'name': game.name} for game in bucket])
+            for letter, bucket in by_letter.items()
+        })
+    )
+
+
+def get_games_catalogue():
+    """Gets this process' GamesCatalogue, building it on first use
+    and rebuilding it when the games version row has changed. The
+    version row is read at most every GAMES_VERSION_CHECK_INTERVAL.
+
+    Returns GamesCatalogue, or raises Exception if it had to be
+    built and the db queries failed."""
+
+    global _catalogue, _catalogue_checked_at
+
+    catalogue = _catalogue
+    if catalogue is not None and monotonic() < _catalogue_checked_at + GAMES_VERSION_CHECK_INTERVAL:
+        return catalogue
+
+    with _catalogue_lock:
+        # another request may have refreshed it while this one waited
+        if _catalogue is not None and monotonic() < _catalogue_checked_at + GAMES_VERSION_CHECK_INTERVAL:
+            return _catalogue
+
+        version = DataVersion.get_version(GAMES_VERSION_NAME)
+        if _catalogue is None or _catalogue.version != version:
+            _catalogue = build_games_catalogue(version)
+        _catalogue_checked_at = monotonic()
+
+        return _catalogue
+
+
+def get_catalogue_game(domain_name):
+    """Looks up game by Nexus domain name in the catalogue.
+
+    A miss falls back to the db, and if the game is found there
+    the catalogue is behind the db and is rebuilt.
+
+    Returns CatalogueGame, or None if no game has that domain name."""
+
+    game = get_games_catalogue().by_domain_name.get(domain_name)
+    if game is not None:
+        return game
+
+    in_db = db.session.execute(
+        db.select(db.exists().where(Game.domain_name == domain_name))
+    ).scalar()
+    if not in_db:
+        return None
+
+    invalidate_games_catalogue()
+
+    return get_games_catalogue().by_domain_name.get(domain_name)
+
+
+def invalidate_games_catalogue():
+    """Drop this process' catalogue so the next
+    lookup rebuilds it from the db."""
+
+    global _catalogue
+
+    with _catalogue_lock:
+        _catalogue = None
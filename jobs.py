@@ -0,0 +1,308 @@
+"""Durable background job queue for app.py, kept in the jobs table
+
+Slow work (Nexus syncs, bulk upserts) is enqueued by routes as a
+Job row and run by worker threads, either inside the web process
+(JOB_WORKER_THREADS) or in a separate process started with
+worker.py. Jobs survive restarts since they live in the db.
+
+Workers claim jobs with SELECT ... FOR UPDATE SKIP LOCKED, so any
+number of workers can poll the table without claiming the same
+job. A failed job is retried with exponential backoff until it
+has used max_attempts, then it is marked 'failed'. While a job
+runs, its worker refreshes locked_at every JOB_HEARTBEAT_INTERVAL.
+A job whose worker died is claimed again once its lock is
+JOB_LOCK_TIMEOUT old, or marked 'failed' if that was its last attempt.
+
+Jobs enqueued with a dedup_key are skipped while another job with
+that key is queued or running, the caller gets the existing job's id.
+
+A handler can report progress on its job row with save_job_progress(),
+so pages can poll it from any worker.
+
+Payload values in SECRET_PAYLOAD_KEYS (the Fernet encrypted Nexus
+API key) are the only copy of a user's key the server stores, and
+only until the job is done or failed."""
+
+import os
+from datetime import datetime, timedelta, timezone
+from threading import Event, Lock, Thread, local
+from sqlalchemy.dialects.postgresql import insert
+from models import db, Job
+
+JOB_LOCK_TIMEOUT = timedelta(minutes=10)
+JOB_HEARTBEAT_INTERVAL = 60 # seconds between locked_at refreshes of a running job
+JOB_RETRY_BASE_DELAY = 5 # seconds, doubled on each attempt
+JOB_RETRY_MAX_DELAY = 3600 # seconds
+JOB_POLL_INTERVAL = 2 # seconds a worker waits when no job is ready
+# finished jobs are kept this long for inspection, then purged by workers
+FINISHED_JOB_TTL = timedelta(days=7)
+FINISHED_JOB_PURGE_INTERVAL = 3600 # seconds
+
+ACTIVE_JOB_STATUSES = ('queued', 'running')
+# payload values only needed to run the job, removed once it is done or failed
+SECRET_PAYLOAD_KEYS = ('api_key',)
+
+_job_handlers = {} # {kind: handler(payload)}
+_worker_pid = None
+_worker_lock = Lock()
+_running = local() # job_id of the job this worker thread is running
+
+
+def job_handler(kind):
+    """Decorator registering function as the handler for jobs of kind.
+    The handler gets the job's payload dict and runs in an app context,
+    raising an Exception marks the attempt as failed."""
+
+    def register(f):
+        _job_handlers[kind] = f
+        return f
+    return register
+
+
+def enqueue_job(kind, payload=None, dedup_key=None, max_attempts=5, delay=0):
+    """Adds a job to the queue, to run after delay seconds. Commit is
+    left to the caller's transaction, so a job enqueued by a route
+    that rolls back is never run.
+
+    Returns (job id, True if a new job was queued), or raises Exception."""
+
+    stmt = insert(Job).values(
+        kind=kind,
+        payload=payload or {},
+        dedup_key=dedup_key,
+        status='queued',
+        attempts=0,
+        max_attempts=max_attempts,
+        run_at=datetime.now(timezone.utc) + timedelta(seconds=delay)
+    )
+    if dedup_key is not None:
+        stmt = stmt.on_conflict_do_nothing(
+            index_elements=[Job.dedup_key],
+            index_where=Job.status.in_(ACTIVE_JOB_STATUSES)
+        )
+
+    job_id = db.session.execute(stmt.returning(Job.id)).scalar()
+    if job_id is not None:
+        return job_id, True
+
+    existing_job_id = db.session.execute(
+        db.select(Job.id)
+        .where(Job.dedup_key == dedup_key)
+        .where(Job.status.in_(ACTIVE_JOB_STATUSES))
+    ).scalar()
+
+    return existing_job_id, False
+
+
+def claim_job():
+    """Claims the next job that is ready to run, skipping jobs other
+    workers have locked, and commits so the claim is seen by them.
+
+    Returns claimed Job, or None if no job is ready."""
+
+    now = datetime.now(timezone.utc)
+
+    # a worker that died during a job's last attempt leaves no attempt to rerun
+    abandoned_jobs = db.session.execute(
+        db.select(Job)
+        .where(Job.status == 'running')
+        .where(Job.locked_at < now - JOB_LOCK_TIMEOUT)
+        .where(Job.attempts >= Job.max_attempts)
+        .with_for_update(skip_locked=True)
+    ).scalars().all()
+    for job in abandoned_jobs:
+        print(f"Function: claim_job()\nJob #{job.id} '{job.kind}' lost its worker on attempt {job.attempts} of {job.max_attempts}, marking it failed")
+        job.status = 'failed'
+        job.locked_at = None
+        job.finished_at = now
+        job.last_error = 'Worker stopped during the last attempt'
+        job.payload = without_secrets(job.payload)
+
+    next_job_id = (
+        db.select(Job.id)
+        .where(db.or_(
+            db.and_(Job.status == 'queued', Job.run_at <= now),
+            db.and_(
+                Job.status == 'running', 
+                Job.locked_at < now - JOB_LOCK_TIMEOUT, 
+                Job.attempts < Job.max_attempts
+            )
+        ))
+        .order_by(Job.run_at)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+
+    job = db.session.execute(
+        db.update(Job)
+        .where(Job.id == next_job_id)
+        .values(status='running', locked_at=now, attempts=Job.attempts + 1)
+        .returning(Job)
+        .execution_options(synchronize_session=False)
+    ).scalar()
+    db.session.commit()
+
+    return job
+
+
+def get_running_job_id():
+    """Returns id of the job the calling handler is running for, or None."""
+
+    return getattr(_running, 'job_id', None)
+
+
+def save_job_progress(job_id, progress):
+    """Writes progress dict to job's row on its own connection, 
+    so it can be read while the handler's transaction is open. 
+    Also refreshes the job's lock, like a heartbeat.
+
+    Returns nothing, or raises Exception."""
+
+    with db.engine.begin() as conn:
+        conn.execute(
+            db.update(Job)
+            .where(Job.id == job_id)
+            .where(Job.status == 'running')
+            .values(progress=progress, locked_at=datetime.now(timezone.utc))
+        )
+
+
+def keep_job_locked(engine, job_id, stop):
+    """Heartbeat thread: refreshes running job's locked_at every 
+    JOB_HEARTBEAT_INTERVAL seconds until the stop Event is set, 
+    so a long job isn't claimed again by another worker."""
+
+    while not stop.wait(JOB_HEARTBEAT_INTERVAL):
+        try:
+            with engine.begin() as conn:
+                conn.execute(
+                    db.update(Job)
+                    .where(Job.id == job_id)
+                    .where(Job.status == 'running')
+                    .values(locked_at=datetime.now(timezone.utc))
+                )
+        except Exception as e:
+            print(f"Function: keep_job_locked()\nCould not refresh lock of job #{job_id}; error: ", e)
+
+
+def without_secrets(payload):
+    """Returns copy of job payload without its SECRET_PAYLOAD_KEYS."""
+
+    return {key: value for key, value in payload.items() if key not in SECRET_PAYLOAD_KEYS}
+
+
+def retry_delay(attempts):
+    """Returns seconds to wait before retrying a job that has failed attempts times."""
+
+    return min(JOB_RETRY_BASE_DELAY * 2 ** (attempts - 1), JOB_RETRY_MAX_DELAY)
+
+
+def run_job(job):
+    """Runs claimed job's handler, then marks the job done, queues
+    it for a retry, or marks it failed when out of attempts."""
+
+    job_id, kind, payload, attempts, max_attempts = job.id, job.kind, job.payload, job.attempts, job.max_attempts
+
+    stop_heartbeat = Event()
+    Thread(target=keep_job_locked, args=(db.engine, job_id, stop_heartbeat), name=f'job-heartbeat-{job_id}', daemon=True).start()
+
+    try:
+        handler = _job_handlers.get(kind)
+        if handler is None:
+            raise LookupError(f"No handler registered for job kind '{kind}'")
+        _running.job_id = job_id
+        handler(payload)
+        db.session.commit()
+
+    except Exception as e:
+        db.session.rollback()
+        print(f"Function: run_job()\nJob #{job_id} '{kind}' failed on attempt {attempts} of {max_attempts}; error: ", e)
+
+        values = {'locked_at': None, 'last_error': f'{type(e).__name__}: {e}'}
+        if attempts < max_attempts:
+            values.update(status='queued', run_at=datetime.now(timezone.utc) + timedelta(seconds=retry_delay(attempts)))
+        else:
+            values.update(status='failed', finished_at=datetime.now(timezone.utc))
+
+    else:
+        values = {'status': 'done', 'locked_at': None, 'last_error': None, 'finished_at': datetime.now(timezone.utc)}
+
+    finally:
+        _running.job_id = None
+        stop_heartbeat.set()
+
+    if 'finished_at' in values:
+        values['payload'] = without_secrets(payload)
+
+    db.session.execute(db.update(Job).where(Job.id == job_id).values(**values))
+    db.session.commit()
+
+
+def run_next_job():
+    """Claims and runs one ready job.
+
+    Returns True if a job was run, False if none was ready."""
+
+    job = claim_job()
+    if job is None:
+        return False
+
+    run_job(job)
+    return True
+
+
+def purge_finished_jobs():
+    """Deletes done and failed jobs older than FINISHED_JOB_TTL."""
+
+    db.session.execute(
+        db.delete(Job)
+        .where(Job.status.in_(['done', 'failed']))
+        .where(Job.finished_at < datetime.now(timezone.utc) - FINISHED_JOB_TTL)
+    )
+    db.session.commit()
+
+
+def work(app, stop=None, poll_interval=JOB_POLL_INTERVAL):
+    """Worker loop: runs ready jobs one at a time, waiting
+    poll_interval seconds whenever the queue is empty, until
+    the stop Event is set."""
+
+    stop = stop or Event()
+    last_purge = None
+
+    while not stop.is_set():
+        with app.app_context():
+            try:
+                if last_purge is None or datetime.now(timezone.utc) - last_purge > timedelta(seconds=FINISHED_JOB_PURGE_INTERVAL):
+                    purge_finished_jobs()
+                    last_purge = datetime.now(timezone.utc)
+
+                ran_job = run_next_job()
+            except Exception as e:
+                print("Function: work()\nJob worker could not reach the jobs table; error: ", e)
+                ran_job = False
+            finally:
+                db.session.remove()
+
+        if not ran_job:
+            stop.wait(poll_interval)
+
+
+def start_job_workers(app, threads):
+    """Starts threads worker threads in this process if
+    they aren't running. Safe to call on every request,
+    each forked web worker pid starts its own."""
+
+    global _worker_pid
+
+    if threads < 1 or _worker_pid == os.getpid():
+        return
+
+    with _worker_lock:
+        if _worker_pid == os.getpid():
+            return
+
+        for number in range(threads):
+            Thread(target=work, args=(app,), name=f'job-worker-{number}', daemon=True).start()
+        _worker_pid = os.getpid()
@@ -0,0 +1,37 @@
+-- Marks each user's Nexus Tracked Mods modlist with modlists.is_tracked,
+-- replacing lookups by modlist name. db.create_all() does not add columns
+-- to existing tables, so run this once against existing databases:
+--     psql "$SUPABASE_DB_URL" -f migrations/001_add_modlist_is_tracked.sql
+
+BEGIN;
+
+ALTER TABLE modlists
+    ADD COLUMN IF NOT EXISTS is_tracked BOOLEAN NOT NULL DEFAULT false;
+
+-- backfill: oldest 'Nexus Tracked Mods' modlist of each user becomes the tracked modlist
+UPDATE modlists
+SET is_tracked = true
+WHERE id IN (
+    SELECT min(id)
+    FROM modlists
+    WHERE name = 'Nexus Tracked Mods'
+    GROUP BY user_id
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS ix_modlists_user_id_tracked
+    ON modlists (user_id)
+    WHERE is_tracked;
+
+-- users that never got a tracked modlist get one now
+INSERT INTO modlists (name, description, private, has_nsfw, is_tracked, last_updated, user_id)
+SELECT
+    'Nexus Tracked Mods',
+    'This modlist automatically populates with all the mods in your Nexus account''s Tracking Centre.',
+    true, false, true, now(), users.id
+FROM users
+WHERE NOT EXISTS (
+    SELECT 1 FROM modlists
+    WHERE modlists.user_id = users.id AND modlists.is_tracked
+);
+
+COMMIT;
@@ -0,0 +1,9 @@
+-- Version counters for data app processes cache in memory, starting
+-- with the games catalogue. db.create_all() creates this table on new
+-- databases, this is the same table for running deployments:
+--     psql "$SUPABASE_DB_URL" -f migrations/002_add_data_versions.sql
+
+CREATE TABLE IF NOT EXISTS data_versions (
+    name TEXT PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0
+);
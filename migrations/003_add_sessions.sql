@@ -0,0 +1,12 @@
+-- Server-side Flask sessions, the session cookie only holds the id.
+-- db.create_all() creates this table on new databases, this is the
+-- same table for running deployments:
+--     psql "$SUPABASE_DB_URL" -f migrations/003_add_sessions.sql
+
+CREATE TABLE IF NOT EXISTS sessions (
+    id TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    expires_at TIMESTAMP WITH TIME ZONE NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS ix_sessions_expires_at ON sessions (expires_at);
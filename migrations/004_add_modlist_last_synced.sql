@@ -0,0 +1,7 @@
+-- Records when each tracked modlist was last fully synced with the
+-- Nexus Tracking Centre. db.create_all() does not add columns to
+-- existing tables, so run this once against existing databases:
+--     psql "$SUPABASE_DB_URL" -f migrations/004_add_modlist_last_synced.sql
+
+ALTER TABLE modlists
+    ADD COLUMN IF NOT EXISTS last_synced TIMESTAMP WITH TIME ZONE;
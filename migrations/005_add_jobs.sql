@@ -0,0 +1,24 @@
+-- Durable background job queue read by jobs.py workers. db.create_all()
+-- creates it for new databases, run this once against existing ones:
+--     psql "$SUPABASE_DB_URL" -f migrations/005_add_jobs.sql
+
+CREATE TABLE IF NOT EXISTS jobs (
+    id BIGSERIAL PRIMARY KEY,
+    kind TEXT NOT NULL,
+    payload JSON,
+    dedup_key TEXT,
+    status TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 5,
+    run_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+    locked_at TIMESTAMP WITH TIME ZONE,
+    finished_at TIMESTAMP WITH TIME ZONE,
+    last_error TEXT,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now()
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS ix_jobs_dedup_key_active
+    ON jobs (dedup_key) WHERE status IN ('queued', 'running');
+
+CREATE INDEX IF NOT EXISTS ix_jobs_status_run_at
+    ON jobs (status, run_at);
@@ -0,0 +1,13 @@
+-- Full-text search over stored mods. db.create_all() does not add
+-- columns to existing tables, so run this once against existing
+-- databases (rewrites the mods table to fill the new column):
+--     psql "$SUPABASE_DB_URL" -f migrations/006_add_mod_search_vector.sql
+
+ALTER TABLE mods
+    ADD COLUMN IF NOT EXISTS search_vector TSVECTOR GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(uploaded_by, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(summary, '')), 'C')
+    ) STORED;
+
+CREATE INDEX IF NOT EXISTS ix_mods_search_vector ON mods USING GIN (search_vector);
@@ -0,0 +1,9 @@
+-- Trigram indexes for the games and mods typeahead. db.create_all()
+-- installs pg_trgm and creates these on new databases, run this once
+-- against existing databases:
+--     psql "$SUPABASE_DB_URL" -f migrations/007_add_name_trigram_indexes.sql
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS ix_games_name_trgm ON games USING GIN (name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS ix_mods_name_trgm ON mods USING GIN (name gin_trgm_ops);
@@ -0,0 +1,11 @@
+-- Progress counts reported by running jobs, read by pages polling a
+-- job, and an index to find the latest job for a dedup key.
+-- db.create_all() does not add columns to existing tables, so run
+-- this once against existing databases:
+--     psql "$SUPABASE_DB_URL" -f migrations/008_add_job_progress.sql
+
+ALTER TABLE jobs
+    ADD COLUMN IF NOT EXISTS progress JSON;
+
+CREATE INDEX IF NOT EXISTS ix_jobs_dedup_key_id
+    ON jobs (dedup_key, id);
@@ -0,0 +1,8 @@
+-- The encrypted Nexus API key moved from the session data to its own
+-- browser cookie. Sessions stored before that still hold a copy, and
+-- can't be used without the cookie anyway, so delete them (their
+-- users log in again). Run this once against existing databases:
+--     psql "$SUPABASE_DB_URL" -f migrations/009_purge_session_api_keys.sql
+
+DELETE FROM sessions
+    WHERE data LIKE '%"user_api_key"%';
@@ -2,7 +2,9 @@
 
 from flask_bcrypt import Bcrypt
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
+from sqlalchemy import DDL, event
+from sqlalchemy.dialects.postgresql import insert, TSVECTOR
+from sqlalchemy.orm import DeclarativeBase, Mapped, WriteOnlyMapped, mapped_column
 from typing import List, Optional
 from datetime import datetime, timezone
 
@@ -12,6 +14,10 @@ class Base(DeclarativeBase):
 bcrypt = Bcrypt()
 db = SQLAlchemy(model_class=Base)
 
+# trigram indexes on game and mod names need pg_trgm,
+# installed before db.create_all() creates them
+event.listen(db.metadata, 'before_create', DDL('CREATE EXTENSION IF NOT EXISTS pg_trgm'))
+
 ###########################################################
 # Association Tables:
 
@@ -107,11 +113,24 @@ game_modlist = db.Table(
 ###########################################################
 # Model Classes:
 
+TRACKED_MODLIST_NAME = 'Nexus Tracked Mods'
+TRACKED_MODLIST_DESCRIPTION = "This modlist automatically populates with all the mods in your Nexus account's Tracking Centre."
+
 # A list of game mods made by a user.
 class Modlist(db.Model):
 
     __tablename__ = 'modlists'
 
+    # each user has at most one Nexus Tracked Mods modlist
+    __table_args__ = (
+        db.Index(
+            'ix_modlists_user_id_tracked', 
+            'user_id', 
+            unique=True, 
+            postgresql_where=db.text('is_tracked')
+        ),
+    )
+
     id: Mapped[int] = mapped_column(
         primary_key=True,
         autoincrement=True
@@ -130,12 +149,25 @@ class Modlist(db.Model):
         default=False
     )
 
+    # marks the user's Nexus Tracked Mods modlist
+    is_tracked: Mapped[bool] = mapped_column(
+        db.Boolean, 
+        default=False,
+        server_default=db.false()
+    )
+
     last_updated: Mapped[datetime] = mapped_column(
         index=True, 
         default=lambda: datetime.now(timezone.utc)
     )
 
-    mods: Mapped[List['Mod']] = db.relationship(
+    # last full sync of a tracked modlist with the Nexus Tracking Centre
+    last_synced: Mapped[Optional[datetime]] = mapped_column(
+        db.DateTime(timezone=True)
+    )
+
+    # write-only, query with mods.select() or the helpers below
+    mods: WriteOnlyMapped['Mod'] = db.relationship(
         secondary=modlist_mod,
         back_populates='in_modlists',
         passive_deletes=True
@@ -170,6 +202,26 @@ class Modlist(db.Model):
         if mod.is_nsfw:
             self.has_nsfw = True
 
+    def has_mod(self, mod):
+        """Check if mod is in modlist without loading the modlist's mods."""
+
+        stmt = db.select(db.exists()
+            .where(modlist_mod.c.modlist_id == self.id)
+            .where(modlist_mod.c.mod_id == mod.id))
+
+        return db.session.execute(stmt).scalar()
+
+    def count_mods(self):
+        """Count the mods in modlist without loading them."""
+
+        stmt = (
+            db.select(db.func.count())
+            .select_from(modlist_mod)
+            .where(modlist_mod.c.modlist_id == self.id)
+        )
+
+        return db.session.execute(stmt).scalar()
+
     @classmethod
     def new_modlist(cls, name, description, private, user):
         modlist = Modlist(
@@ -180,6 +232,17 @@ class Modlist(db.Model):
             )
         return modlist
 
+    @classmethod
+    def new_tracked_modlist(cls, user):
+        modlist = Modlist(
+                name=TRACKED_MODLIST_NAME,
+                description=TRACKED_MODLIST_DESCRIPTION,
+                private=True,
+                is_tracked=True,
+                user=user
+            )
+        return modlist
+
     def __repr__(self):
         return f'<ModList #{self.id}: "{self.name}", by {self.user.username}>'
 
@@ -190,6 +253,12 @@ class Mod(db.Model):
 
     __tablename__ = 'mods'
 
+    __table_args__ = (
+        db.Index('ix_mods_search_vector', 'search_vector', postgresql_using='gin'),
+        # typeahead prefix, substring and fuzzy name matching
+        db.Index('ix_mods_name_trgm', 'name', postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}),
+    )
+
     # mod id must match the id stored on Nexus
     id: Mapped[int] = mapped_column(
         primary_key=True,
@@ -217,7 +286,22 @@ class Mod(db.Model):
 
     uploaded_by: Mapped[str] = mapped_column(db.Text)
 
-    in_modlists: Mapped[List['Modlist']] = db.relationship(
+    # full-text search document, computed by Postgres on every insert 
+    # and update so each upsert path keeps it current. Name matches 
+    # rank above author matches, which rank above summary matches.
+    search_vector: Mapped[Optional[str]] = mapped_column(
+        TSVECTOR,
+        db.Computed(
+            "setweight(to_tsvector('english', coalesce(name, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(uploaded_by, '')), 'B') || "
+            "setweight(to_tsvector('english', coalesce(summary, '')), 'C')",
+            persisted=True
+        ),
+        deferred=True
+    )
+
+    # write-only, query with in_modlists.select()
+    in_modlists: WriteOnlyMapped['Modlist'] = db.relationship(
         secondary=modlist_mod, 
         back_populates='mods',
         passive_deletes=True
@@ -242,6 +326,11 @@ class Game(db.Model):
 
     __tablename__ = 'games'
 
+    __table_args__ = (
+        # typeahead prefix, substring and fuzzy name matching
+        db.Index('ix_games_name_trgm', 'name', postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}),
+    )
+
     # ID in this model must match Nexus game ID
     id: Mapped[int] = mapped_column(
         primary_key=True,
@@ -262,7 +351,8 @@ class Game(db.Model):
         passive_deletes=True
     )
 
-    subject_of_mods: Mapped[List['Mod']] = db.relationship(
+    # write-only, query with subject_of_mods.select()
+    subject_of_mods: WriteOnlyMapped['Mod'] = db.relationship(
         secondary=game_mod, 
         back_populates='for_games',
         passive_deletes=True
@@ -272,6 +362,76 @@ class Game(db.Model):
         return f'<Game #{self.id}: "{self.name}", #downloads:{self.downloads}>'
 
 
+# Version counter of a dataset app processes keep cached 
+# in memory (e.g. 'games' for the games catalogue). Bumped 
+# in the same transaction as the changes to the dataset.
+class DataVersion(db.Model):
+
+    __tablename__ = 'data_versions'
+
+    name: Mapped[str] = mapped_column(
+        db.Text, 
+        primary_key=True
+    )
+
+    version: Mapped[int] = mapped_column(
+        db.BigInteger, 
+        default=0
+    )
+
+    @classmethod
+    def get_version(cls, name):
+        """Returns current version of dataset, 0 if never bumped."""
+
+        version = db.session.execute(
+            db.select(cls.version)
+            .where(cls.name == name)
+        ).scalar()
+
+        return version or 0
+
+    @classmethod
+    def bump_version(cls, name):
+        """Adds 1 to dataset's version, creating the row if missing.
+        Commit is left to the caller's transaction.
+        
+        Returns new version."""
+
+        stmt = insert(cls).values(name=name, version=1)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[cls.name],
+            set_={'version': cls.version + 1}
+        ).returning(cls.version)
+
+        return db.session.execute(stmt).scalar()
+
+    def __repr__(self):
+        return f'<DataVersion "{self.name}": {self.version}>'
+
+
+# Server-side Flask session data, the session cookie 
+# only holds the session id. See server_session.py
+class StoredSession(db.Model):
+
+    __tablename__ = 'sessions'
+
+    id: Mapped[str] = mapped_column(
+        db.Text, 
+        primary_key=True
+    )
+
+    # session dict serialized by Flask's TaggedJSONSerializer
+    data: Mapped[str] = mapped_column(db.Text)
+
+    expires_at: Mapped[datetime] = mapped_column(
+        db.DateTime(timezone=True), 
+        index=True
+    )
+
+    def __repr__(self):
+        return f'<StoredSession expires:{self.expires_at}>'
+
+
 # User in the system.
 class User(db.Model):
 
@@ -366,6 +526,76 @@ class User(db.Model):
         return False
 
 
+# Durable background job queue, see jobs.py
+class Job(db.Model):
+
+    __tablename__ = 'jobs'
+
+    __table_args__ = (
+        # one queued or running job per dedup key, finished jobs don't block new ones
+        db.Index(
+            'ix_jobs_dedup_key_active', 
+            'dedup_key', 
+            unique=True, 
+            postgresql_where=db.text("status IN ('queued', 'running')")
+        ),
+        db.Index('ix_jobs_status_run_at', 'status', 'run_at'),
+        db.Index('ix_jobs_dedup_key_id', 'dedup_key', 'id'),
+    )
+
+    id: Mapped[int] = mapped_column(
+        db.BigInteger, 
+        primary_key=True, 
+        autoincrement=True
+    )
+
+    kind: Mapped[str] = mapped_column(db.Text)
+
+    payload: Mapped[dict] = mapped_column(
+        db.JSON, 
+        default=dict
+    )
+
+    dedup_key: Mapped[Optional[str]] = mapped_column(db.Text)
+
+    # 'queued', 'running', 'done' or 'failed'
+    status: Mapped[str] = mapped_column(
+        db.Text, 
+        default='queued'
+    )
+
+    attempts: Mapped[int] = mapped_column(
+        db.Integer, 
+        default=0
+    )
+
+    max_attempts: Mapped[int] = mapped_column(
+        db.Integer, 
+        default=5
+    )
+
+    run_at: Mapped[datetime] = mapped_column(
+        db.DateTime(timezone=True), 
+        default=lambda: datetime.now(timezone.utc)
+    )
+
+    locked_at: Mapped[Optional[datetime]] = mapped_column(db.DateTime(timezone=True))
+
+    finished_at: Mapped[Optional[datetime]] = mapped_column(db.DateTime(timezone=True))
+
+    last_error: Mapped[Optional[str]] = mapped_column(db.Text)
+
+    # progress counts the running handler reports with save_job_progress()
+    progress: Mapped[Optional[dict]] = mapped_column(db.JSON)
+
+    created_at: Mapped[datetime] = mapped_column(
+        db.DateTime(timezone=True), 
+        default=lambda: datetime.now(timezone.utc)
+    )
+
+    def __repr__(self):
+        return f'<Job #{self.id} {self.kind} {self.status} attempts:{self.attempts}/{self.max_attempts}>'
+
 
 def connect_db(app):
     """Connect this database to provided Flask app.
@@ -374,4 +604,4 @@ def connect_db(app):
     """
 
     db.app = app
-    db.init_app(app)
\ No newline at end of file
+    db.init_app(app)
@@ -0,0 +1,274 @@
+"""Server-side Flask sessions for app.py
+
+The session cookie only carries a random session id, the session
+dict is stored in the sessions table (StoredSession). A session
+is loaded from the db the first time a request reads it, and
+written back only when the request changed it, so requests that
+never touch the session and requests that only read it don't
+write anything.
+
+Reads and writes use their own db connection, so saving the
+session never commits or rolls back a route's db.session work.
+
+A session only read by its requests still gets its expires_at
+pushed back, at most once per SESSION_REFRESH_INTERVAL, so active
+sessions don't expire a lifetime after their last change.
+
+When the app cache is shared (Redis), loaded sessions are kept in
+it so requests from the same session don't each SELECT their
+session row, and writes and deletes drop the cached copy. A
+per-process cache is never used for sessions: a copy cached by
+one worker would outlive a logout or change made in another."""
+
+import random
+from datetime import datetime, timedelta, timezone
+from hashlib import sha256
+from secrets import token_urlsafe
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SessionInterface, SessionMixin
+from sqlalchemy.dialects.postgresql import insert
+from models import db, StoredSession
+from cache import cache
+
+# chance a new session also purges expired sessions from the table
+EXPIRED_SESSION_PURGE_CHANCE = 0.01
+SESSION_CACHE_TTL = 60 # seconds, never past the session's expires_at
+# a read-only session's expires_at is pushed back once it is this old
+SESSION_REFRESH_INTERVAL = timedelta(hours=1)
+
+serializer = TaggedJSONSerializer()
+
+
+class ServerSession(SessionMixin):
+    """Session dict loaded from the db on first access.
+
+    modified is set by any change made through the mapping,
+    changes to values nested in the session aren't seen: reassign
+    the key (session['key'] = value) after changing them."""
+
+    def __init__(self, sid=None, load=None):
+        self.sid = sid
+        self.new = sid is None
+        self.had_cookie = sid is not None
+        self.modified = False
+        self.accessed = False
+        self._load = load
+        self._data = None if sid else {}
+        self.expires_at = None
+        # stored session to delete when sid is replaced
+        self.replaced_sid = None
+
+    @property
+    def data(self):
+        if self._data is None:
+            stored = self._load(self.sid)
+            if stored is None:
+                # unknown or expired id, never store a session under an id the client picked
+                self._data = {}
+                self.sid = None
+                self.new = True
+            else:
+                self._data, self.expires_at = stored
+        self.accessed = True
+        return self._data
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def __setitem__(self, key, value):
+        self.data[key] = value
+        self.modified = True
+
+    def __delitem__(self, key):
+        del self.data[key]
+        self.modified = True
+
+    def __iter__(self):
+        return iter(self.data)
+
+    def __len__(self):
+        return len(self.data)
+
+    def clear(self):
+        # no need to load a session that is about to be emptied
+        self._data = {}
+        self.modified = True
+
+    def regenerate(self):
+        """Move session to a new id, call on login so an id
+        set before login can't be used to reach the new session."""
+
+        if self.sid and not self.replaced_sid:
+            self.replaced_sid = self.sid
+        self.data # keep current contents under the new id
+        self.sid = None
+        self.new = True
+        self.modified = True
+
+
+class ServerSessionInterface(SessionInterface):
+    """Stores Flask sessions in the sessions table."""
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+
+        return ServerSession(sid or None, load=load_stored_session)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        # a request without a session cookie got the logged out 
+        # response, so public responses aren't split by Vary: Cookie
+        if session.accessed and session.had_cookie:
+            response.vary.add('Cookie')
+
+        if not session.modified:
+            if session.accessed and session.expires_at is not None:
+                refresh_at = session.expires_at - app.permanent_session_lifetime + SESSION_REFRESH_INTERVAL
+                if datetime.now(timezone.utc) >= refresh_at:
+                    refresh_session_expiry(session.sid, datetime.now(timezone.utc) + app.permanent_session_lifetime)
+            return
+
+        if session.replaced_sid:
+            delete_session_data(session.replaced_sid)
+
+        if not session.data:
+            if session.sid:
+                delete_session_data(session.sid)
+            if session.had_cookie:
+                response.delete_cookie(name, domain=domain, path=path, secure=self.get_cookie_secure(app), samesite=self.get_cookie_samesite(app), httponly=self.get_cookie_httponly(app))
+            return
+
+        if session.new:
+            session.sid = token_urlsafe(32)
+            if random.random() < EXPIRED_SESSION_PURGE_CHANCE:
+                purge_expired_sessions()
+
+        expires_at = datetime.now(timezone.utc) + app.permanent_session_lifetime
+        store_session_data(session.sid, dict(session.data), expires_at)
+
+        response.set_cookie(
+            name,
+            session.sid,
+            expires=self.get_expiration_time(app, session),
+            httponly=self.get_cookie_httponly(app),
+            domain=domain,
+            path=path,
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app)
+        )
+
+
+def load_session_data(sid):
+    """Returns stored session dict for sid, or None if 
+    missing or expired."""
+
+    stored = load_stored_session(sid)
+
+    return stored[0] if stored else None
+
+
+def load_stored_session(sid):
+    """Returns (session dict, expires_at) stored for sid, from 
+    a shared cache or loaded from the db and cached, or None 
+    if missing or expired."""
+
+    cache_key = session_cache_key(sid)
+    cached = cache.get(cache_key) if cache.is_shared else None
+
+    if cached is None:
+        with db.engine.connect() as conn:
+            row = conn.execute(
+                db.select(StoredSession.data, StoredSession.expires_at)
+                .where(StoredSession.id == sid)
+                .where(StoredSession.expires_at > datetime.now(timezone.utc))
+            ).first()
+
+        if row is None:
+            return None
+
+        cached = (row.data, row.expires_at)
+        cache_session_data(cache_key, *cached)
+
+    data, expires_at = cached
+
+    return serializer.loads(data), expires_at
+
+
+def store_session_data(sid, data, expires_at):
+    """Inserts or replaces stored session dict for sid."""
+
+    cache_key = session_cache_key(sid)
+    dumped_data = serializer.dumps(data)
+
+    stmt = insert(StoredSession).values(id=sid, data=dumped_data, expires_at=expires_at)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[StoredSession.id],
+        set_={'data': stmt.excluded.data, 'expires_at': stmt.excluded.expires_at}
+    )
+
+    with db.engine.begin() as conn:
+        conn.execute(stmt)
+
+    drop_cached_session(cache_key)
+
+
+def delete_session_data(sid):
+    """Deletes stored session for sid."""
+
+    cache_key = session_cache_key(sid)
+
+    with db.engine.begin() as conn:
+        conn.execute(db.delete(StoredSession).where(StoredSession.id == sid))
+
+    drop_cached_session(cache_key)
+
+
+def refresh_session_expiry(sid, expires_at):
+    """Pushes back an unchanged stored session's expires_at."""
+
+    with db.engine.begin() as conn:
+        conn.execute(
+            db.update(StoredSession)
+            .where(StoredSession.id == sid)
+            .values(expires_at=expires_at)
+        )
+
+    drop_cached_session(session_cache_key(sid))
+
+
+def session_cache_key(sid):
+    """Cache key for sid, hashed so session ids aren't sent 
+    to the cache server or in invalidation events."""
+
+    return f'session:{sha256(sid.encode()).hexdigest()}'
+
+
+def cache_session_data(cache_key, dumped_data, expires_at):
+    """Caches serialized session data and its expires_at in a 
+    shared cache, until SESSION_CACHE_TTL or the session's 
+    expires_at, whichever comes first."""
+
+    if not cache.is_shared:
+        return
+
+    ttl = min(SESSION_CACHE_TTL, int((expires_at - datetime.now(timezone.utc)).total_seconds()))
+    if ttl > 0:
+        cache.set(cache_key, (dumped_data, expires_at), ttl=ttl)
+
+
+def drop_cached_session(cache_key):
+    """Drops session cached under cache_key from a shared cache, 
+    the next read loads the committed row."""
+
+    if cache.is_shared:
+        cache.delete(cache_key)
+
+
+def purge_expired_sessions():
+    """Deletes every expired stored session."""
+
+    with db.engine.begin() as conn:
+        conn.execute(db.delete(StoredSession).where(StoredSession.expires_at <= datetime.now(timezone.utc)))
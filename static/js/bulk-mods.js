@@ -0,0 +1,38 @@
+document.addEventListener('DOMContentLoaded', function () {
+    // Only lets the bulk add picker choose modlists the selected
+    // mods can be added to: modlists for the selected mods' game,
+    // or modlists with no game yet when the mods share one game.
+    const form = document.getElementById('bulk-mods-form');
+    if (!form) {
+        return;
+    }
+
+    const picker = form.querySelector('select[name="modlist_id"]');
+    const submitButton = form.querySelector('button');
+    const checkboxes = document.querySelectorAll('.bulk-mods-checkbox');
+
+    function updatePicker() {
+        const selectedGameIds = new Set(
+            Array.from(checkboxes).filter(checkbox => checkbox.checked).map(checkbox => checkbox.dataset.gameId)
+        );
+
+        Array.from(picker.options).forEach(option => {
+            const modlistGameId = option.dataset.gameId;
+            option.disabled = selectedGameIds.size > 1
+                || (selectedGameIds.size === 1 && modlistGameId !== '' && !selectedGameIds.has(modlistGameId));
+        });
+
+        if (picker.selectedOptions.length && picker.selectedOptions[0].disabled) {
+            const firstAllowed = Array.from(picker.options).find(option => !option.disabled);
+            picker.value = firstAllowed ? firstAllowed.value : '';
+        }
+
+        submitButton.disabled = selectedGameIds.size > 1 || !picker.value;
+        submitButton.title = selectedGameIds.size > 1
+            ? 'Selected mods are for more than one game, a modlist only holds mods for one game'
+            : 'Add all selected mods to the chosen modlist';
+    }
+
+    checkboxes.forEach(checkbox => checkbox.addEventListener('change', updatePicker));
+    updatePicker();
+});
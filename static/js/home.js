@@ -1,16 +1,192 @@
-
 document.addEventListener('DOMContentLoaded', function () {
-    // Functionality for menu that shows game names alphabetically 
+    // Functionality for menu that shows game names alphabetically
     // by letter at the bottom of the signed-in homepage
     const alphabetLetters = document.querySelectorAll('.alphabet-letter');
     const gameList = document.querySelector('.game-list');
-    const games = JSON.parse(document.getElementById('games-data').textContent);
+    const gamesUrl = document.getElementById('all-games').dataset.gamesUrl;
+    const requests = new Map(); // {url: Promise of parsed JSON}
+
+    // Letters with more games than this only keep the rows on screen in the DOM
+    const VIRTUAL_LIST_MIN_GAMES = 150;
+    const VIRTUAL_LIST_OVERSCAN_ROWS = 10; // rows rendered above and below the screen
+    const GAME_CARDS_PER_CLICK = 10;
+
+    // The full games list and each letter's games, already sorted
+    // by name, are only fetched once a letter or the #load-more btn
+    // needs them. Their urls are versioned, so after the first
+    // visit the browser serves them from cache.
+    function fetchJson(url) {
+        if (!requests.has(url)) {
+            requests.set(url, fetch(url)
+                .then(response => {
+                    if (!response.ok) {
+                        throw new Error(`Games list request failed with status ${response.status}`);
+                    }
+                    return response.json();
+                })
+                .catch(error => {
+                    requests.delete(url); // let the next click try again
+                    throw error;
+                }));
+        }
+        return requests.get(url);
+    }
+
+    function gameNameItem(game) {
+        const item = document.createElement('li');
+        const link = document.createElement('a');
+        link.href = `/games/${encodeURIComponent(game.domain_name)}`;
+        link.textContent = game.name;
+        link.title = game.name;
+        item.appendChild(link);
+        return item;
+    }
+
+    function gameCard(game) {
+        // built with DOM APIs, game names are only ever set as text or attribute values
+        const gameUrl = `/games/${encodeURIComponent(game.domain_name)}`;
+        const card = document.createElement('li');
+        card.className = 'game-card';
+
+        const image = document.createElement('a');
+        image.className = 'game-img';
+        image.href = gameUrl;
+        image.style.backgroundImage = `url(https://staticdelivery.nexusmods.com/Images/games/4_3/tile_${encodeURIComponent(game.id)}.jpg)`;
+        image.setAttribute('alt', `${game.name} cover image`);
+        image.title = `Open ${game.name} page on ModList`;
+
+        const nexusLink = document.createElement('a');
+        nexusLink.className = 'nexus-btn-container';
+        nexusLink.href = `https://www.nexusmods.com/${encodeURIComponent(game.domain_name)}`;
+        nexusLink.target = '_blank';
+        nexusLink.rel = 'noopener noreferrer';
+        nexusLink.title = `Open ${game.name} on Nexus to search all mods in a new tab.`;
+        const nexusButton = document.createElement('img');
+        nexusButton.className = 'nexus-btn';
+        nexusButton.src = 'https://raw.githubusercontent.com/github/explore/781dbc058383a2ee8259ebbab057292f16172d5e/topics/nexus-mods/nexus-mods.png';
+        nexusLink.appendChild(nexusButton);
+
+        const title = document.createElement('a');
+        title.className = 'game-title';
+        title.href = gameUrl;
+        title.title = `Open ${game.name} page on ModList`;
+        const titleText = document.createElement('span');
+        titleText.textContent = game.name;
+        title.appendChild(titleText);
+
+        card.append(image, nexusLink, title);
+        return card;
+    }
+
+    function renderGameNames(games, start, end) {
+        // one DOM insert however many games are shown
+        const items = document.createDocumentFragment();
+        for (let i = start; i < end; i++) {
+            items.appendChild(gameNameItem(games[i]));
+        }
+        gameList.replaceChildren(items);
+    }
+
+    function showMessage(message) {
+        const messageItem = document.createElement('li');
+        messageItem.textContent = message;
+        gameList.replaceChildren(messageItem);
+        gameList.style.display = 'grid';
+    }
+
+    // Shows a long list of games in the .game-list grid while only
+    // rendering the rows near the screen. Padding above and below
+    // the rendered rows stands in for the rest, so the page scrolls
+    // the same as if every game was shown.
+    class VirtualGameList {
+        constructor(games) {
+            this.games = games;
+            this.columns = 1;
+            this.rowHeight = 0;
+            this.firstRow = -1;
+            this.lastRow = -1;
+            this.frame = null;
+            this.onViewportChange = () => {
+                if (this.frame === null) {
+                    this.frame = requestAnimationFrame(() => {
+                        this.frame = null;
+                        this.update();
+                    });
+                }
+            };
+
+            gameList.classList.add('virtual');
+            gameList.style.display = 'grid';
+            this.measure();
+            this.update();
+            window.addEventListener('scroll', this.onViewportChange, { passive: true });
+            window.addEventListener('resize', this.onViewportChange);
+        }
+
+        measure() {
+            // lay out one game to learn the grid's columns and row height
+            renderGameNames(this.games, 0, 1);
+            gameList.style.paddingTop = '0px';
+            gameList.style.paddingBottom = '0px';
+
+            const style = getComputedStyle(gameList);
+            const rowGap = parseFloat(style.rowGap) || 0;
+            this.columns = Math.max(style.gridTemplateColumns.split(' ').length, 1);
+            this.rowHeight = gameList.firstElementChild.getBoundingClientRect().height + rowGap;
+            this.rowGap = rowGap;
+            this.width = gameList.clientWidth;
+            this.firstRow = this.lastRow = -1;
+        }
+
+        update() {
+            if (gameList.clientWidth !== this.width) {
+                this.measure();
+            }
+
+            const rowCount = Math.ceil(this.games.length / this.columns);
+            const listTop = gameList.getBoundingClientRect().top;
+            const firstRow = Math.max(Math.floor(-listTop / this.rowHeight) - VIRTUAL_LIST_OVERSCAN_ROWS, 0);
+            const lastRow = Math.min(Math.ceil((window.innerHeight - listTop) / this.rowHeight) + VIRTUAL_LIST_OVERSCAN_ROWS, rowCount);
+
+            if (firstRow === this.firstRow && lastRow === this.lastRow) {
+                return;
+            }
+            this.firstRow = firstRow;
+            this.lastRow = lastRow;
+
+            const shownRows = Math.max(lastRow - firstRow, 0);
+            gameList.style.paddingTop = `${firstRow * this.rowHeight}px`;
+            gameList.style.paddingBottom = `${Math.max((rowCount - firstRow - shownRows) * this.rowHeight - (shownRows ? 0 : this.rowGap), 0)}px`;
+            renderGameNames(this.games, firstRow * this.columns, Math.min(lastRow * this.columns, this.games.length));
+        }
+
+        destroy() {
+            window.removeEventListener('scroll', this.onViewportChange);
+            window.removeEventListener('resize', this.onViewportChange);
+            if (this.frame !== null) {
+                cancelAnimationFrame(this.frame);
+            }
+            gameList.classList.remove('virtual');
+            gameList.style.paddingTop = '';
+            gameList.style.paddingBottom = '';
+        }
+    }
+
+    let virtualGameList = null;
+
+    function clearGameList() {
+        if (virtualGameList) {
+            virtualGameList.destroy();
+            virtualGameList = null;
+        }
+        gameList.replaceChildren();
+        gameList.style.display = 'none';
+    }
 
     alphabetLetters.forEach(letter => {
-        letter.addEventListener('click', function () {
+        letter.addEventListener('click', async function () {
             const selectedLetter = this.getAttribute('data-letter');
-            gameList.innerHTML = '';
-            gameList.style.display = 'none';
+            clearGameList();
             document.querySelectorAll('.alphabet-menu span').forEach(l => {
                 l.classList.remove('active');
             });
@@ -18,57 +194,58 @@ document.addEventListener('DOMContentLoaded', function () {
             this.classList.add('active');
 
             let filteredGames;
-            if (selectedLetter === '#') {
-                filteredGames = games.filter(game => /^[0-9!@#$%^&*()_+[\]{};':"\\|,.<>?`~]+/.test(game.name.charAt(0)));
-            } else {
-                filteredGames = games.filter(game => game.name.startsWith(selectedLetter));
+            try {
+                filteredGames = await fetchJson(this.dataset.url);
+            } catch (error) {
+                console.error(error);
+                if (this.classList.contains('active')) {
+                    showMessage('Problem occurred fetching games list, please try again.');
+                }
+                return;
             }
 
-            if (filteredGames.length > 0) {
-                filteredGames.sort((a, b) => a.name.toLowerCase().localeCompare(b.name.toLowerCase()));
-                filteredGames.forEach(game => {
-                    const gameNameItem = document.createElement('li');
-                    gameNameItem.innerHTML = `<a href="${window.location.origin}/games/${game.domain_name}">${game.name}</a>`;
-                    gameList.appendChild(gameNameItem);
-                });
+            // a later letter click may have finished first
+            if (!this.classList.contains('active')) {
+                return;
+            }
+
+            if (filteredGames.length >= VIRTUAL_LIST_MIN_GAMES) {
+                virtualGameList = new VirtualGameList(filteredGames);
+            } else if (filteredGames.length > 0) {
+                renderGameNames(filteredGames, 0, filteredGames.length);
                 gameList.style.display = 'grid';
             } else {
-                const noGamesItem = document.createElement('li');
-                noGamesItem.textContent = `No games that start with '${selectedLetter}' were found.`;
-                gameList.appendChild(noGamesItem);
-                gameList.style.display = 'grid';
+                showMessage(`No games that start with '${selectedLetter}' were found.`);
             }
         });
     });
 
-    let popularGameCardIndex = 10; // 10 most popular games' cards already shown
+    let popularGameCardIndex = document.querySelectorAll('.game-section .game-card').length; // cards rendered with the page
 
-    document.getElementById('load-more').addEventListener('click', function () {
-        // Btn functionality to display more popular games below the starting 
+    document.getElementById('load-more').addEventListener('click', async function () {
+        // Btn functionality to display more popular games below the starting
         // 10 games every time the #load-more btn is clicked
 
         const gameCardSection = document.querySelector('.game-section');
 
-        for (let i = 0; i < 10 && popularGameCardIndex < games.length; i++, popularGameCardIndex++) {
-            const game = games[popularGameCardIndex];
-
-            const newGameCard = document.createElement('li');
-            newGameCard.classList.add('game-card');
-            newGameCard.innerHTML = `
-            <a class="game-img" href="/games/${game.domain_name}" style="background-image: url(https://staticdelivery.nexusmods.com/Images/games/4_3/tile_${game.id}.jpg);" alt="${game.name} cover image" title="Open ${game.name} page on ModList">
-            </a>
-            <a class="nexus-btn-container" href="https://www.nexusmods.com/${game.domain_name}" target="_blank" rel="noopener noreferrer" title="Open ${game.name} on Nexus to search all mods in a new tab.">
-                <img class="nexus-btn" src="https://raw.githubusercontent.com/github/explore/781dbc058383a2ee8259ebbab057292f16172d5e/topics/nexus-mods/nexus-mods.png">
-            </a>
-            <a class="game-title" href="/games/${game.domain_name}" title="Open ${game.name} page on ModList">
-                <span>${game.name}</span>
-            </a>
-        `;
-            gameCardSection.appendChild(newGameCard);
+        let games;
+        try {
+            games = await fetchJson(gamesUrl);
+        } catch (error) {
+            console.error(error);
+            return;
         }
 
+        // build every new card, then insert them as one fragment
+        const cards = document.createDocumentFragment();
+        games.slice(popularGameCardIndex, popularGameCardIndex + GAME_CARDS_PER_CLICK).forEach(game => {
+            cards.appendChild(gameCard(game));
+        });
+        popularGameCardIndex += cards.children.length;
+        gameCardSection.appendChild(cards);
+
         if (popularGameCardIndex >= games.length) {
             this.style.display = 'none';
         }
     });
-});
\ No newline at end of file
+});
@@ -0,0 +1,77 @@
+document.addEventListener('DOMContentLoaded', function () {
+    // While a background sync of the tracked modlist with Nexus is
+    // queued or running, poll its job, show its progress counts, and
+    // once the job is done or failed stop polling and show the outcome
+    const syncStatus = document.getElementById('tracked-sync-status');
+    if (!syncStatus || !syncStatus.dataset.jobUrl) {
+        return;
+    }
+
+    const jobUrl = syncStatus.dataset.jobUrl;
+    const syncHeading = document.querySelector('[data-sync-heading]');
+    const syncNote = document.querySelector('[data-sync-note]');
+    const pollInterval = 3000; // ms
+    const reloadDelay = 1500; // ms the finished sync's outcome is shown before reloading
+    const maxPolls = 100; // stop after 5 minutes
+    let polls = 0;
+
+    function showSyncProgress(job) {
+        document.querySelectorAll('[data-sync-count]').forEach(count => {
+            count.textContent = job[count.dataset.syncCount];
+        });
+    }
+
+    function showSyncOutcome(heading, note) {
+        const syncIcon = document.querySelector('.sync-progress-icon');
+        if (syncIcon) {
+            syncIcon.remove();
+        }
+        if (syncHeading) {
+            syncHeading.textContent = heading;
+        }
+        if (syncNote) {
+            syncNote.textContent = note;
+        }
+    }
+
+    function pollSyncJob() {
+        polls++;
+        fetch(jobUrl, { headers: { 'Accept': 'application/json' } })
+            .then(response => {
+                if (response.status === 404) {
+                    return null;
+                }
+                if (!response.ok) {
+                    throw new Error(`Sync job request failed with status ${response.status}`);
+                }
+                return response.json();
+            })
+            .then(job => {
+                if (job === null) {
+                    showSyncOutcome('Sync status is no longer available.', 'Reload the page to see your Nexus Tracked Mods.');
+                    return;
+                }
+
+                showSyncProgress(job);
+
+                if (job.status === 'done') {
+                    showSyncOutcome('Sync finished.', 'Showing your synced Nexus Tracked Mods...');
+                    setTimeout(() => window.location.reload(), reloadDelay);
+                } else if (job.status === 'failed') {
+                    showSyncOutcome('Sync with your Nexus Tracking Centre failed.', "Use the 'Re-Sync Tracked Mods to Nexus' button to try again.");
+                } else if (polls < maxPolls) {
+                    setTimeout(pollSyncJob, pollInterval);
+                } else {
+                    showSyncOutcome('Sync is taking longer than expected.', 'It keeps running in the background, reload the page later to see its progress.');
+                }
+            })
+            .catch(error => {
+                console.error(error);
+                if (polls < maxPolls) {
+                    setTimeout(pollSyncJob, pollInterval);
+                }
+            });
+    }
+
+    setTimeout(pollSyncJob, pollInterval);
+});
@@ -0,0 +1,114 @@
+document.addEventListener('DOMContentLoaded', function () {
+    // Suggestions from /api/typeahead under every input with a
+    // data-typeahead attribute. data-typeahead-game limits mod
+    // suggestions to one game's mods and leaves out games.
+    const MIN_LENGTH = 3; // keep in step with TYPEAHEAD_MIN_LENGTH in app.py
+    const DEBOUNCE_MS = 150;
+
+    document.querySelectorAll('input[data-typeahead]').forEach(input => {
+        const gameDomainName = input.dataset.typeaheadGame;
+        const suggestionList = document.createElement('ul');
+        suggestionList.classList.add('typeahead-list');
+        suggestionList.setAttribute('role', 'listbox');
+        suggestionList.hidden = true;
+        input.setAttribute('autocomplete', 'off');
+        input.insertAdjacentElement('afterend', suggestionList);
+
+        const responses = new Map(); // {query: suggestions}, repeat queries skip the network
+        let debounceTimer = null;
+        let controller = null;
+
+        function suggestionItem(href, text, detail) {
+            const item = document.createElement('li');
+            const link = document.createElement('a');
+            link.href = href;
+            link.textContent = text;
+            if (detail) {
+                const small = document.createElement('small');
+                small.textContent = ` ${detail}`;
+                link.appendChild(small);
+            }
+            item.appendChild(link);
+            return item;
+        }
+
+        function showSuggestions(suggestions) {
+            // a slower response for older text can arrive after a newer one
+            if (suggestions.q !== input.value.trim().replace(/\s+/g, ' ')) {
+                return;
+            }
+
+            const items = document.createDocumentFragment();
+            suggestions.games.forEach(game => {
+                items.appendChild(suggestionItem(`/games/${encodeURIComponent(game.domain_name)}`, game.name, 'game'));
+            });
+            suggestions.mods.forEach(mod => {
+                items.appendChild(suggestionItem(`/games/${encodeURIComponent(mod.game_domain_name)}/mods/${mod.id}`, mod.name, 'mod'));
+            });
+
+            suggestionList.replaceChildren(items);
+            suggestionList.hidden = !suggestionList.children.length;
+        }
+
+        function fetchSuggestions(query) {
+            if (responses.has(query)) {
+                showSuggestions(responses.get(query));
+                return;
+            }
+
+            if (controller) {
+                controller.abort();
+            }
+            controller = new AbortController();
+
+            const params = new URLSearchParams({ q: query });
+            if (gameDomainName) {
+                params.set('game', gameDomainName);
+            }
+
+            fetch(`/api/typeahead?${params}`, { signal: controller.signal })
+                .then(response => response.ok ? response.json() : null)
+                .then(suggestions => {
+                    if (suggestions) {
+                        responses.set(query, suggestions);
+                        showSuggestions(suggestions);
+                    }
+                })
+                .catch(error => {
+                    if (error.name !== 'AbortError') {
+                        console.error('Typeahead suggestions failed:', error);
+                    }
+                });
+        }
+
+        input.addEventListener('input', function () {
+            const query = input.value.trim().replace(/\s+/g, ' ');
+            clearTimeout(debounceTimer);
+
+            if (query.length < MIN_LENGTH) {
+                suggestionList.replaceChildren();
+                suggestionList.hidden = true;
+                return;
+            }
+
+            debounceTimer = setTimeout(() => fetchSuggestions(query), DEBOUNCE_MS);
+        });
+
+        input.addEventListener('keydown', function (event) {
+            if (event.key === 'Escape') {
+                suggestionList.hidden = true;
+            }
+        });
+
+        // hide once focus leaves both the input and its suggestions
+        input.parentElement.addEventListener('focusout', function (event) {
+            if (!input.parentElement.contains(event.relatedTarget)) {
+                suggestionList.hidden = true;
+            }
+        });
+
+        input.addEventListener('focus', function () {
+            suggestionList.hidden = !suggestionList.children.length;
+        });
+    });
+});
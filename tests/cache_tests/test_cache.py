@@ -0,0 +1,105 @@
+"""Tests for cache backends."""
+
+from unittest import TestCase, skipUnless
+from unittest.mock import patch
+from cache import LRUCache, RedisCache
+
+try:
+    import fakeredis
+except ImportError:
+    fakeredis = None
+
+
+class LRUCacheTestCase(TestCase):
+    """Tests for LRUCache."""
+
+    def setUp(self):
+        """Make small cache for each test."""
+        self.cache = LRUCache(max_size=2, default_ttl=60)
+
+    def test_get_set(self):
+        """Set values are returned and counted as hits, missing keys as misses."""
+        self.cache.set('game:1', {'name': 'Test Game'})
+
+        self.assertEqual(self.cache.get('game:1'), {'name': 'Test Game'})
+        self.assertIsNone(self.cache.get('game:2'))
+        self.assertEqual(self.cache.stats(), {'hits': 1, 'misses': 1, 'evictions': 0})
+
+    def test_evicts_least_recently_used(self):
+        """Full cache evicts least recently used key."""
+        self.cache.set('a', 1)
+        self.cache.set('b', 2)
+        self.cache.get('a')
+        self.cache.set('c', 3)
+
+        self.assertEqual(self.cache.get('a'), 1)
+        self.assertIsNone(self.cache.get('b'))
+        self.assertEqual(self.cache.get('c'), 3)
+        self.assertEqual(self.cache.stats()['evictions'], 1)
+
+    @patch('cache.monotonic')
+    def test_ttl_expiry(self, mock_monotonic):
+        """Entries expire after their TTL."""
+        mock_monotonic.return_value = 1000
+        self.cache.set('a', 1, ttl=10)
+
+        mock_monotonic.return_value = 1009
+        self.assertEqual(self.cache.get('a'), 1)
+
+        mock_monotonic.return_value = 1010
+        self.assertIsNone(self.cache.get('a'))
+
+    def test_invalidate_tag(self):
+        """invalidate_tag drops only the keys with that tag."""
+        self.cache.set('a', 1, tags=['user:1'])
+        self.cache.set('b', 2, tags=['user:2'])
+        self.cache.invalidate_tag('user:1')
+
+        self.assertIsNone(self.cache.get('a'))
+        self.assertEqual(self.cache.get('b'), 2)
+
+
+@skipUnless(fakeredis, "fakeredis is not installed")
+class RedisCacheTestCase(TestCase):
+    """Tests for RedisCache against fakeredis."""
+
+    def setUp(self):
+        """Make cache on an empty fake Redis server for each test."""
+        self.cache = RedisCache(fakeredis.FakeRedis(), default_ttl=60)
+
+    def test_get_set(self):
+        """Values round-trip through Redis and hits/misses are counted."""
+        self.cache.set('game:1', {'name': 'Test Game'})
+
+        self.assertEqual(self.cache.get('game:1'), {'name': 'Test Game'})
+        self.assertIsNone(self.cache.get('game:2'))
+        self.assertEqual(self.cache.hits, 1)
+        self.assertEqual(self.cache.misses, 1)
+
+    def test_ttl_set_on_server(self):
+        """TTL is passed to the Redis server."""
+        self.cache.set('a', 1, ttl=30)
+
+        self.assertTrue(0 < self.cache.client.ttl('modlist:a') <= 30)
+
+    def test_invalidate_tag(self):
+        """invalidate_tag drops only the keys with that tag."""
+        self.cache.set('a', 1, tags=['user:1'])
+        self.cache.set('b', 2, tags=['user:2'])
+        self.cache.invalidate_tag('user:1')
+
+        self.assertIsNone(self.cache.get('a'))
+        self.assertEqual(self.cache.get('b'), 2)
+        self.assertFalse(self.cache.client.exists('modlist:tag:user:1'))
+
+    def test_tag_set_ttl_follows_longest_entry(self):
+        """Tag sets expire with the longest lived entry tagged with them."""
+        self.cache.set('a', 1, ttl=30, tags=['user:1'])
+        self.assertTrue(0 < self.cache.client.ttl('modlist:tag:user:1') <= 30)
+
+        self.cache.set('b', 2, ttl=120, tags=['user:1'])
+        self.cache.set('c', 3, ttl=10, tags=['user:1'])
+        self.assertTrue(30 < self.cache.client.ttl('modlist:tag:user:1') <= 120)
+
+        self.cache.set('d', 4, ttl=0, tags=['user:1'])
+        self.assertEqual(self.cache.client.ttl('modlist:tag:user:1'), -1)
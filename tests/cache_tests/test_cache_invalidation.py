@@ -0,0 +1,66 @@
+"""Tests for cross-worker cache invalidation."""
+
+from unittest import TestCase
+from unittest.mock import Mock
+import cache_invalidation
+from cache_invalidation import register_invalidation_handler, dispatch_invalidation, dispatch_all_invalidations
+from tracked_mods_store import store_tracked_mod_ids, get_tracked_mod_ids, handle_tracked_mods_invalidation
+
+
+class CacheInvalidationTestCase(TestCase):
+    """Tests for invalidation handler dispatch."""
+
+    def setUp(self):
+        """Swap in an empty handler registry for each test."""
+        self.saved_handlers = cache_invalidation._handlers
+        cache_invalidation._handlers = {}
+
+    def tearDown(self):
+        """Restore the app's handler registry."""
+        cache_invalidation._handlers = self.saved_handlers
+
+    def test_dispatch_calls_handlers_of_kind(self):
+        """Only handlers registered for the event's kind get its key."""
+        user_handler = Mock()
+        games_handler = Mock()
+        register_invalidation_handler('user', user_handler)
+        register_invalidation_handler('games', games_handler)
+
+        dispatch_invalidation('user', 101)
+
+        user_handler.assert_called_once_with(101)
+        games_handler.assert_not_called()
+
+    def test_failing_handler_does_not_stop_others(self):
+        """A handler raising doesn't keep later handlers from running."""
+        register_invalidation_handler('user', Mock(side_effect=KeyError('boom')))
+        second_handler = Mock()
+        register_invalidation_handler('user', second_handler)
+
+        dispatch_invalidation('user', 101)
+
+        second_handler.assert_called_once_with(101)
+
+    def test_dispatch_all_drops_every_kind(self):
+        """dispatch_all_invalidations calls each handler with key None."""
+        user_handler = Mock()
+        games_handler = Mock()
+        register_invalidation_handler('user', user_handler)
+        register_invalidation_handler('games', games_handler)
+
+        dispatch_all_invalidations()
+
+        user_handler.assert_called_once_with(None)
+        games_handler.assert_called_once_with(None)
+
+    def test_tracked_mods_handler_drops_stored_ids(self):
+        """A 'tracked_mods' event drops the user's stored ids, so 
+        the session's token reloads them from the db."""
+        register_invalidation_handler('tracked_mods', handle_tracked_mods_invalidation)
+        token = store_tracked_mod_ids(101, [301, 302])
+        load_mod_ids = Mock(return_value=[302])
+
+        dispatch_invalidation('tracked_mods', 101)
+
+        self.assertEqual(get_tracked_mod_ids(101, token, load_mod_ids), frozenset([302]))
+        load_mod_ids.assert_called_once_with(101)
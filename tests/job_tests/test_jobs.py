@@ -0,0 +1,196 @@
+"""Tests for the background job queue."""
+
+import os
+from datetime import datetime, timedelta, timezone
+from unittest import TestCase
+from unittest.mock import Mock
+from models import db, Job
+
+os.environ['DATABASE_URL'] = "postgresql:///modlist_test"
+
+from app import app
+import jobs
+from jobs import job_handler, enqueue_job, claim_job, run_next_job, retry_delay, get_running_job_id, save_job_progress
+
+# jobs are run by the tests with run_next_job()
+app.config['JOB_WORKER_THREADS'] = 0
+
+class JobQueueTestCase(TestCase):
+    """Tests for enqueue_job(), claim_job(), run_next_job()."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Set up the database."""
+        cls.app = app
+        cls.app_context = cls.app.app_context()
+        cls.app_context.push()
+        db.drop_all()
+        db.create_all()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Clean up the database after tests."""
+        db.session.remove()
+        cls.app_context.pop()
+
+    def setUp(self):
+        """Empty the queue and swap in an empty handler registry."""
+        db.session.execute(Job.__table__.delete())
+        db.session.commit()
+
+        self.saved_handlers = jobs._job_handlers
+        jobs._job_handlers = {}
+
+    def tearDown(self):
+        """Restore the app's handler registry."""
+        db.session.rollback()
+        jobs._job_handlers = self.saved_handlers
+
+    def test_run_next_job_success(self):
+        """A ready job is run with its payload and marked done."""
+        handler = Mock()
+        job_handler('test_kind')(handler)
+
+        job_id, is_new = enqueue_job('test_kind', {'mod_id': 301})
+        db.session.commit()
+        self.assertTrue(is_new)
+
+        self.assertTrue(run_next_job())
+        handler.assert_called_once_with({'mod_id': 301})
+
+        job = db.session.get(Job, job_id)
+        db.session.refresh(job)
+        self.assertEqual(job.status, 'done')
+        self.assertEqual(job.attempts, 1)
+        self.assertIsNotNone(job.finished_at)
+
+        self.assertFalse(run_next_job())
+
+    def test_handler_saves_progress(self):
+        """A handler can write progress to its own job row while it runs."""
+        def handler(payload):
+            save_job_progress(get_running_job_id(), {'fetched': 2})
+        job_handler('test_kind')(handler)
+
+        job_id, is_new = enqueue_job('test_kind')
+        db.session.commit()
+        run_next_job()
+
+        job = db.session.get(Job, job_id)
+        db.session.refresh(job)
+        self.assertEqual(job.progress, {'fetched': 2})
+        self.assertIsNone(get_running_job_id())
+
+    def test_enqueue_job_dedup_key(self):
+        """A job with the dedup key of a queued job isn't queued again,
+        once the first job is done the key can be used again."""
+        job_handler('test_kind')(Mock())
+
+        first_id, first_is_new = enqueue_job('test_kind', dedup_key='test_key')
+        second_id, second_is_new = enqueue_job('test_kind', dedup_key='test_key')
+        db.session.commit()
+
+        self.assertTrue(first_is_new)
+        self.assertFalse(second_is_new)
+        self.assertEqual(first_id, second_id)
+        self.assertEqual(db.session.execute(db.select(db.func.count(Job.id))).scalar(), 1)
+
+        run_next_job()
+
+        third_id, third_is_new = enqueue_job('test_kind', dedup_key='test_key')
+        db.session.commit()
+        self.assertTrue(third_is_new)
+        self.assertNotEqual(first_id, third_id)
+
+    def test_failed_job_retried_with_backoff(self):
+        """A failing job is queued again after retry_delay(), 
+        then marked failed when out of attempts."""
+        handler = Mock(side_effect=ValueError('Nexus is down'))
+        job_handler('test_kind')(handler)
+
+        job_id, is_new = enqueue_job('test_kind', max_attempts=2)
+        db.session.commit()
+
+        before_run = datetime.now(timezone.utc)
+        self.assertTrue(run_next_job())
+
+        job = db.session.get(Job, job_id)
+        db.session.refresh(job)
+        self.assertEqual(job.status, 'queued')
+        self.assertEqual(job.attempts, 1)
+        self.assertIn('Nexus is down', job.last_error)
+        self.assertGreaterEqual(job.run_at, before_run + timedelta(seconds=retry_delay(1)))
+
+        # not ready until its retry delay has passed
+        self.assertFalse(run_next_job())
+
+        job.run_at = datetime.now(timezone.utc)
+        db.session.commit()
+        self.assertTrue(run_next_job())
+
+        db.session.refresh(job)
+        self.assertEqual(job.status, 'failed')
+        self.assertEqual(job.attempts, 2)
+        self.assertEqual(handler.call_count, 2)
+
+    def test_claim_job_stale_lock(self):
+        """A running job whose worker stopped is claimed again 
+        once its lock is older than JOB_LOCK_TIMEOUT."""
+        job = Job(
+            kind='test_kind', 
+            status='running', 
+            attempts=1, 
+            locked_at=datetime.now(timezone.utc) - timedelta(minutes=1)
+        )
+        db.session.add(job)
+        db.session.commit()
+        job_id = job.id
+
+        self.assertIsNone(claim_job())
+
+        job.locked_at = datetime.now(timezone.utc) - jobs.JOB_LOCK_TIMEOUT - timedelta(minutes=1)
+        db.session.commit()
+
+        claimed_job = claim_job()
+        self.assertEqual(claimed_job.id, job_id)
+        self.assertEqual(claimed_job.attempts, 2)
+
+    def test_claim_job_stale_lock_last_attempt(self):
+        """A stale running job that was on its last attempt is 
+        marked failed with its secrets removed, not run again."""
+        job = Job(
+            kind='test_kind', 
+            payload={'api_key': 'encrypted_key', 'user_id': 1},
+            status='running', 
+            attempts=2, 
+            max_attempts=2,
+            locked_at=datetime.now(timezone.utc) - jobs.JOB_LOCK_TIMEOUT - timedelta(minutes=1)
+        )
+        db.session.add(job)
+        db.session.commit()
+
+        self.assertIsNone(claim_job())
+
+        db.session.refresh(job)
+        self.assertEqual(job.status, 'failed')
+        self.assertEqual(job.attempts, 2)
+        self.assertIsNotNone(job.finished_at)
+        self.assertEqual(job.payload, {'user_id': 1})
+
+    def test_save_job_progress_refreshes_lock(self):
+        """Saving progress also refreshes a running job's locked_at."""
+        old_locked_at = datetime.now(timezone.utc) - timedelta(minutes=5)
+        job = Job(kind='test_kind', status='running', attempts=1, locked_at=old_locked_at)
+        db.session.add(job)
+        db.session.commit()
+
+        save_job_progress(job.id, {'fetched': 1})
+
+        db.session.refresh(job)
+        self.assertEqual(job.progress, {'fetched': 1})
+        self.assertGreater(job.locked_at, old_locked_at)
+
+    def test_retry_delay(self):
+        """Retry delay doubles each attempt up to JOB_RETRY_MAX_DELAY."""
+        self.assertEqual(retry_delay(2), retry_delay(1) * 2)
+        self.assertEqual(retry_delay(100), jobs.JOB_RETRY_MAX_DELAY)
@@ -0,0 +1,96 @@
+"""Tests for the write-behind mod upsert buffer."""
+
+import os
+from unittest import TestCase
+from models import db, Mod, Game, game_mod
+
+os.environ['DATABASE_URL'] = "postgresql:///modlist_test"
+
+from app import app
+from write_behind import ModUpsertBuffer
+
+class ModUpsertBufferTestCase(TestCase):
+    """Tests for ModUpsertBuffer add() and flush()."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Set up the database."""
+        cls.app = app
+        cls.app_context = cls.app.app_context()
+        cls.app_context.push()
+        db.drop_all()
+        db.create_all()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Clean up the database after tests."""
+        db.session.remove()
+        cls.app_context.pop()
+
+    def setUp(self):
+        """Set up a game and a buffer without a flusher thread."""
+        db.session.execute(game_mod.delete())
+        db.session.execute(Mod.__table__.delete())
+        db.session.execute(Game.__table__.delete())
+        db.session.commit()
+
+        self.game1 = Game(
+            id=200, 
+            domain_name='test_game_domain',
+            name='Test Game Name',
+            downloads=12345
+        )
+        db.session.add(self.game1)
+        db.session.commit()
+
+        self.buffer = ModUpsertBuffer(flush_size=3)
+
+    def tearDown(self):
+        """Rollback session after each test."""
+        db.session.rollback()
+
+    def make_mod(self, mod_id, name):
+        return {
+            'id': mod_id,
+            'name': name,
+            'summary': 'Test Mod Summary',
+            'is_nsfw': False,
+            'picture_url': 'modpic@test.com',
+            'updated_timestamp': 1234567890,
+            'uploaded_by': 'Some Username'
+        }
+
+    def test_add_coalesces_same_mod(self):
+        """Repeated writes of one mod collapse into the latest one."""
+        self.buffer.add([self.make_mod(301, 'Old Name')], self.game1.id)
+        self.buffer.add([self.make_mod(301, 'New Name'), self.make_mod(302, 'Other Mod')], self.game1.id)
+
+        self.assertEqual(len(self.buffer), 2)
+        self.assertEqual(self.buffer.stats()['coalesced'], 1)
+        self.assertIsNone(db.session.get(Mod, 301))
+
+        self.assertEqual(self.buffer.flush(), 2)
+        self.assertEqual(len(self.buffer), 0)
+
+        mod = db.session.get(Mod, 301)
+        self.assertEqual(mod.name, 'New Name')
+        self.assertIn(self.game1, mod.for_games)
+        self.assertEqual(self.buffer.stats()['batches'], 1)
+
+        # flushing the same data again leaves the rows alone
+        self.buffer.add([self.make_mod(301, 'New Name')], self.game1.id)
+        self.buffer.flush()
+        self.assertEqual(self.buffer.stats()['unchanged'], 1)
+
+    def test_flush_empty_buffer(self):
+        """Flushing with nothing buffered writes nothing."""
+        self.assertEqual(self.buffer.flush(), 0)
+        self.assertEqual(self.buffer.stats()['batches'], 0)
+
+    def test_add_wakes_flusher_when_full(self):
+        """Reaching flush_size asks the flusher to flush early."""
+        self.buffer.add([self.make_mod(301, 'One'), self.make_mod(302, 'Two')], self.game1.id)
+        self.assertFalse(self.buffer._wake.is_set())
+
+        self.buffer.add([self.make_mod(303, 'Three')], self.game1.id)
+        self.assertTrue(self.buffer._wake.is_set())
@@ -0,0 +1,100 @@
+"""Tests for COPY-based bulk loads of games and mods."""
+
+import os
+from unittest import TestCase
+from models import db, Game, Mod, game_mod
+
+os.environ['DATABASE_URL'] = "postgresql:///modlist_test"
+
+from app import app
+from bulk_loader import bulk_load_games_db, bulk_load_mods_db, copy_text_value
+
+class BulkLoaderTestCase(TestCase):
+    """Tests for bulk_load_games_db() and bulk_load_mods_db()."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Set up the database."""
+        cls.app = app
+        cls.app_context = cls.app.app_context()
+        cls.app_context.push()
+        db.drop_all()
+        db.create_all()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Clean up the database after tests."""
+        db.session.remove()
+        cls.app_context.pop()
+
+    def setUp(self):
+        """Clear games and mods before each test."""
+        db.session.execute(game_mod.delete())
+        db.session.execute(Mod.__table__.delete())
+        db.session.execute(Game.__table__.delete())
+        db.session.commit()
+
+    def tearDown(self):
+        """Rollback session after each test."""
+        db.session.rollback()
+
+    def make_games(self, count, downloads=1000):
+        return ({
+            'id': 200 + n,
+            'domain_name': f'test_game_domain_{n}',
+            'name': f'Test Game {n}',
+            'downloads': downloads
+        } for n in range(count))
+
+    def test_bulk_load_games(self):
+        """Games are inserted, then only changed games are updated."""
+        stats = bulk_load_games_db(self.make_games(50))
+        self.assertEqual((stats.rows, stats.inserted, stats.updated, stats.unchanged), (50, 50, 0, 0))
+        self.assertEqual(db.session.execute(db.select(db.func.count(Game.id))).scalar(), 50)
+        self.assertGreater(stats.rows_per_second, 0)
+
+        changed_game = {'id': 200, 'domain_name': 'test_game_domain_0', 'name': 'Test Game 0', 'downloads': 2000}
+        stats = bulk_load_games_db(list(self.make_games(50)) + [changed_game])
+        self.assertEqual((stats.rows, stats.inserted, stats.updated, stats.unchanged), (51, 0, 1, 49))
+        self.assertEqual(db.session.get(Game, 200).downloads, 2000)
+
+    def test_bulk_load_mods_linked_to_game(self):
+        """Mods with tabs, newlines and backslashes survive COPY, 
+        the last row of a repeated id wins, mods are linked to the game."""
+        game = Game(id=200, domain_name='test_game_domain', name='Test Game', downloads=1000)
+        db.session.add(game)
+        db.session.commit()
+
+        mods = [{
+            'id': 301,
+            'name': 'First Name',
+            'summary': 'Tab\there\nnewline \\ backslash',
+            'is_nsfw': False,
+            'picture_url': None,
+            'updated_timestamp': 1234567890,
+            'uploaded_by': 'Some Username'
+        }, {
+            'id': 301,
+            'name': 'Last Name',
+            'summary': 'Tab\there\nnewline \\ backslash',
+            'is_nsfw': True,
+            'picture_url': 'modpic@test.com',
+            'updated_timestamp': 1234567891,
+            'uploaded_by': 'Some Username'
+        }]
+
+        stats = bulk_load_mods_db(iter(mods), game_id=game.id)
+        self.assertEqual((stats.rows, stats.inserted, stats.updated, stats.unchanged), (2, 1, 0, 0))
+
+        mod = db.session.get(Mod, 301)
+        self.assertEqual(mod.name, 'Last Name')
+        self.assertEqual(mod.summary, 'Tab\there\nnewline \\ backslash')
+        self.assertTrue(mod.is_nsfw)
+        self.assertIn(game, mod.for_games)
+
+    def test_copy_text_value(self):
+        """Values are escaped for COPY's text format."""
+        self.assertEqual(copy_text_value(None), '\\N')
+        self.assertEqual(copy_text_value(True), 't')
+        self.assertEqual(copy_text_value(12), '12')
+        self.assertEqual(copy_text_value('a\tb\\c'), 'a\\tb\\\\c')
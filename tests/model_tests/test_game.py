@@ -4,6 +4,7 @@ import os
 from unittest import TestCase
 from sqlalchemy.exc import IntegrityError
 from models import db, connect_db, User, Modlist, Mod, Game
+from utilities import typeahead_games_db, typeahead_mods_db
 
 os.environ['DATABASE_URL'] = "postgresql:///modlist_test"
 
@@ -99,11 +100,11 @@ class GameModelTestCase(TestCase):
         db.session.add(mod)
         db.session.commit()
 
-        self.game1.subject_of_mods.append(mod)
+        self.game1.subject_of_mods.add(mod)
         db.session.commit()
 
         # Confirm that the mod is associated with the game
-        self.assertIn(mod, self.game1.subject_of_mods)
+        self.assertIn(mod, db.session.scalars(self.game1.subject_of_mods.select()).all())
 
     def test_game_modlist_relationship(self):
         """Test relationship between game and modlists."""
@@ -145,3 +146,45 @@ class GameModelTestCase(TestCase):
         self.assertIsNone(db.session.get(Modlist, modlist.id))
         self.assertIsNotNone(db.session.get(Game, self.game1.id))
 
+    def test_typeahead_games(self):
+        """Test prefix matches come first, then substring and 
+        misspelled matches, and LIKE wildcards are matched literally."""
+        db.session.add_all([
+            Game(id=301, domain_name="skyrim", name="Skyrim", downloads=10),
+            Game(id=302, domain_name="skyrimspecialedition", name="Skyrim Special Edition", downloads=100),
+            Game(id=303, domain_name="enderal", name="Enderal: Forgotten Stories of Skyrim", downloads=1000),
+            Game(id=304, domain_name="percent", name="100% Orange Juice", downloads=1)
+        ])
+        db.session.commit()
+
+        games = typeahead_games_db("sky")
+        self.assertEqual([game['domain_name'] for game in games], ["skyrimspecialedition", "skyrim", "enderal"])
+        self.assertEqual(games[0], {'domain_name': "skyrimspecialedition", 'name': "Skyrim Special Edition"})
+
+        games = typeahead_games_db("skyrm")
+        self.assertIn("skyrim", [game['domain_name'] for game in games])
+
+        games = typeahead_games_db("sky", limit=1)
+        self.assertEqual(len(games), 1)
+
+        games = typeahead_games_db("0%")
+        self.assertEqual([game['domain_name'] for game in games], ["percent"])
+
+    def test_typeahead_mods(self):
+        """Test mod suggestions carry a game to link to, 
+        can be limited to one game, and skip unlinked mods."""
+        game2 = Game(id=301, domain_name="test_game2", name="Test Game 2", downloads=1)
+        db.session.add_all([
+            game2,
+            Mod(id=400, name="Lantern Light", summary="", is_nsfw=False, updated_timestamp=1, uploaded_by="a", for_games=[self.game1]),
+            Mod(id=401, name="Lanterns of Skyrim", summary="", is_nsfw=False, updated_timestamp=1, uploaded_by="a", for_games=[game2]),
+            Mod(id=402, name="Lantern Unlinked", summary="", is_nsfw=False, updated_timestamp=1, uploaded_by="a")
+        ])
+        db.session.commit()
+
+        mods = typeahead_mods_db("lantern")
+        self.assertEqual(sorted(mod['id'] for mod in mods), [400, 401])
+        self.assertIn({'id': 400, 'name': "Lantern Light", 'game_domain_name': "test_game"}, mods)
+
+        mods = typeahead_mods_db("lantern", game_id=game2.id)
+        self.assertEqual(mods, [{'id': 401, 'name': "Lanterns of Skyrim", 'game_domain_name': "test_game2"}])
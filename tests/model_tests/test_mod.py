@@ -4,6 +4,7 @@ import os
 from unittest import TestCase
 from sqlalchemy.exc import IntegrityError
 from models import db, connect_db, User, Mod, Modlist, Game
+from utilities import search_mods_db
 
 os.environ['DATABASE_URL'] = "postgresql:///modlist_test"
 
@@ -96,16 +97,16 @@ class ModModelTestCase(TestCase):
 
     def test_add_mod_to_modlist(self):
         """Test adding a mod to a modlist."""
-        self.modlist1.mods.append(self.mod1)
+        self.modlist1.mods.add(self.mod1)
         db.session.commit()
 
         # Confirm that modlist now has the mod
-        self.assertIn(self.mod1, self.modlist1.mods)
-        self.assertEqual(len(self.modlist1.mods), 1)
+        self.assertTrue(self.modlist1.has_mod(self.mod1))
+        self.assertEqual(self.modlist1.count_mods(), 1)
 
     def test_remove_mod_from_modlist(self):
         """Test removing a mod from a modlist."""
-        self.modlist1.mods.append(self.mod1)
+        self.modlist1.mods.add(self.mod1)
         db.session.commit()
 
         # Now remove the mod
@@ -113,8 +114,8 @@ class ModModelTestCase(TestCase):
         db.session.commit()
 
         # Confirm that modlist no longer has the mod
-        self.assertNotIn(self.mod1, self.modlist1.mods)
-        self.assertEqual(len(self.modlist1.mods), 0)
+        self.assertFalse(self.modlist1.has_mod(self.mod1))
+        self.assertEqual(self.modlist1.count_mods(), 0)
 
     def test_unique_constraint(self):
         """Ensure mod ID is unique and conflicts on duplicates."""
@@ -134,7 +135,7 @@ class ModModelTestCase(TestCase):
     def test_cascade_delete_modlist_does_not_delete_mod(self):
         """Ensure deleting a modlist does not delete associated mods."""
         # Add mod to modlist
-        self.modlist1.mods.append(self.mod1)
+        self.modlist1.mods.add(self.mod1)
         db.session.commit()
         mod_id = self.mod1.id
 
@@ -159,14 +160,65 @@ class ModModelTestCase(TestCase):
         db.session.commit()
 
         # Add mod to both modlists
-        self.modlist1.mods.append(self.mod1)
-        modlist2.mods.append(self.mod1)
+        self.modlist1.mods.add(self.mod1)
+        modlist2.mods.add(self.mod1)
         db.session.commit()
 
         # Confirm mod is in both modlists
-        self.assertIn(self.mod1, self.modlist1.mods)
-        self.assertIn(self.mod1, modlist2.mods)
+        self.assertTrue(self.modlist1.has_mod(self.mod1))
+        self.assertTrue(modlist2.has_mod(self.mod1))
 
         db.session.delete(modlist2)
         db.session.commit()
 
+    def test_search_mods_ranks_and_scopes_by_game(self):
+        """Test search vector is computed on insert and update, name 
+        matches outrank summary matches, and game scoping."""
+        game2 = Game(id=301, domain_name="test_game2", name="Test Game 2", downloads=1)
+        mod2 = Mod(
+            id=401,
+            name="Dragon Armor",
+            summary="Plate armor for the whole party.",
+            is_nsfw=False,
+            updated_timestamp=1234567890,
+            uploaded_by="uploader2",
+            for_games=[game2]
+        )
+        db.session.add_all([game2, mod2])
+        self.mod1.summary = "Gives every dragon a new roar."
+        db.session.commit()
+
+        results, next_cursor = search_mods_db("dragon")
+        self.assertEqual([mod.id for mod, rank in results], [401, 400])
+        self.assertIsNone(next_cursor)
+
+        results, next_cursor = search_mods_db("dragon", game_id=self.game1.id)
+        self.assertEqual([mod.id for mod, rank in results], [400])
+
+        results, next_cursor = search_mods_db("dragon -roar")
+        self.assertEqual([mod.id for mod, rank in results], [401])
+
+    def test_search_mods_keyset_pages(self):
+        """Test pages follow on from the cursor without repeats or gaps, 
+        including between mods with equal rank."""
+        db.session.add_all([
+            Mod(
+                id=410 + number,
+                name=f"Lantern {number}",
+                summary="",
+                is_nsfw=False,
+                updated_timestamp=1234567890,
+                uploaded_by="uploader3"
+            )
+            for number in range(5)
+        ])
+        db.session.commit()
+
+        found_ids = []
+        results, next_cursor = search_mods_db("lantern", per_page=2)
+        found_ids.extend(mod.id for mod, rank in results)
+        while next_cursor is not None:
+            results, next_cursor = search_mods_db("lantern", after=next_cursor, per_page=2)
+            found_ids.extend(mod.id for mod, rank in results)
+
+        self.assertEqual(found_ids, [410, 411, 412, 413, 414])
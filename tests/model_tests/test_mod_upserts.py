@@ -0,0 +1,93 @@
+"""Tests for chunked mod upserts."""
+
+import os
+from unittest import TestCase
+from models import db, Mod, Game, game_mod
+
+os.environ['DATABASE_URL'] = "postgresql:///modlist_test"
+
+from app import app
+from utilities import update_list_mods_db
+
+class ModUpsertsTestCase(TestCase):
+    """Tests for update_list_mods_db()."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Set up the database."""
+        cls.app = app
+        cls.app_context = cls.app.app_context()
+        cls.app_context.push()
+        db.drop_all()
+        db.create_all()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Clean up the database after tests."""
+        db.session.remove()
+        cls.app_context.pop()
+
+    def setUp(self):
+        """Clear mods before each test."""
+        db.session.execute(game_mod.delete())
+        db.session.execute(Mod.__table__.delete())
+        db.session.execute(Game.__table__.delete())
+        db.session.commit()
+
+    def tearDown(self):
+        """Rollback session after each test."""
+        db.session.rollback()
+
+    def make_mod(self, mod_id, name='Test Mod Name'):
+        return {
+            'id': mod_id,
+            'name': name,
+            'summary': 'Test Mod Summary',
+            'is_nsfw': False,
+            'picture_url': 'modpic@test.com',
+            'updated_timestamp': 1234567890,
+            'uploaded_by': 'Some Username'
+        }
+
+    def test_update_list_mods_db_chunks(self):
+        """Mods are upserted batch_size at a time with a report per chunk."""
+        result = update_list_mods_db([self.make_mod(300 + n) for n in range(5)], batch_size=2)
+
+        self.assertEqual((result.inserted, result.updated, result.unchanged), (5, 0, 0))
+        self.assertEqual([chunk.rows for chunk in result.chunks], [2, 2, 1])
+        self.assertTrue(all(chunk.seconds >= 0 for chunk in result.chunks))
+        self.assertEqual(result.failed_ids, [])
+
+        result = update_list_mods_db([self.make_mod(300, 'New Name'), self.make_mod(301)], batch_size=2)
+        self.assertEqual((result.inserted, result.updated, result.unchanged), (0, 1, 1))
+        self.assertEqual(db.session.get(Mod, 300).name, 'New Name')
+
+    def test_update_list_mods_db_isolates_bad_rows(self):
+        """A row the db rejects is skipped, the rest of its 
+        chunk and the other chunks are still committed."""
+        mods = [self.make_mod(300 + n) for n in range(6)]
+        mods[3]['name'] = None # name can't be NULL
+
+        result = update_list_mods_db(mods, batch_size=4)
+
+        self.assertEqual(result.failed_ids, [303])
+        self.assertEqual(result.inserted, 5)
+        self.assertEqual([chunk.failed for chunk in result.chunks], [1, 0])
+        self.assertIsNone(db.session.get(Mod, 303))
+        self.assertIsNotNone(db.session.get(Mod, 302))
+        self.assertIsNotNone(db.session.get(Mod, 305))
+
+    def test_update_list_mods_db_keeps_pending_work(self):
+        """A rejected row only rolls back its own savepoint, 
+        work pending in the session before the upsert is kept."""
+        db.session.add(Game(id=200, domain_name='test_game_domain', name='Test Game Name', downloads=12345))
+
+        mods = [self.make_mod(300), self.make_mod(301)]
+        mods[1]['name'] = None # name can't be NULL
+
+        result = update_list_mods_db(mods, batch_size=2)
+
+        self.assertEqual(result.failed_ids, [301])
+        db.session.rollback()
+        self.assertIsNotNone(db.session.get(Game, 200))
+        self.assertIsNotNone(db.session.get(Mod, 300))
@@ -95,7 +95,7 @@ class ModlistModelTestCase(TestCase):
         db.session.commit()
 
         # Add NSFW mod to modlist and mark modlist NSFW
-        self.modlist1.mods.append(nsfw_mod)
+        self.modlist1.mods.add(nsfw_mod)
         self.modlist1.mark_nsfw_if_nsfw(nsfw_mod)
         db.session.commit()
 
@@ -128,12 +128,12 @@ class ModlistModelTestCase(TestCase):
         db.session.add_all([mod1, mod2])
         db.session.commit()
 
-        self.modlist1.mods.extend([mod1, mod2])
+        self.modlist1.mods.add_all([mod1, mod2])
         db.session.commit()
 
-        self.assertEqual(len(self.modlist1.mods), 2)
-        self.assertIn(mod1, self.modlist1.mods)
-        self.assertIn(mod2, self.modlist1.mods)
+        self.assertEqual(self.modlist1.count_mods(), 2)
+        self.assertTrue(self.modlist1.has_mod(mod1))
+        self.assertTrue(self.modlist1.has_mod(mod2))
 
     def test_modlist_game_relationship(self):
         """Test relationship between modlist and games."""
@@ -1,17 +1,23 @@
 """Tests for authentication routes."""
 
 import os
+from datetime import datetime, timezone
 from unittest import TestCase
 from unittest.mock import patch, Mock
 from flask import session, get_flashed_messages, g
 from sqlalchemy.exc import IntegrityError
-from models import db, connect_db, User, Modlist, Mod, Game
+from models import db, connect_db, User, Modlist, Mod, Game, StoredSession, Job
 
 os.environ['DATABASE_URL'] = "postgresql:///modlist_test"
 
-from app import app, CURR_USER_KEY
+from app import app, CURR_USER_KEY, API_KEY_COOKIE_NAME
+from cache import cache
+from jobs import run_next_job
+from server_session import load_session_data, SESSION_REFRESH_INTERVAL
 
 app.config['WTF_CSRF_ENABLED'] = False
+# background jobs are run by the tests with run_next_job()
+app.config['JOB_WORKER_THREADS'] = 0
 
 class AuthRoutesTestCase(TestCase):
     """Tests for the authentication routes:
@@ -41,8 +47,12 @@ class AuthRoutesTestCase(TestCase):
         db.session.execute(Modlist.__table__.delete())
         db.session.execute(Mod.__table__.delete())
         db.session.execute(Game.__table__.delete())
+        db.session.execute(Job.__table__.delete())
         db.session.commit()
 
+        # drop tracked mod ids and sessions cached by earlier tests
+        cache.clear()
+
         self.password1 = 'password1'
         self.user1 = User.signup(
             username='testuser1',
@@ -52,12 +62,7 @@ class AuthRoutesTestCase(TestCase):
         db.session.add(self.user1)
         db.session.commit()
 
-        tracked_ml = Modlist.new_modlist(
-            name='Nexus Tracked Mods', 
-            description="This modlist automatically populates with all the mods in your Nexus account's Tracking Centre.", 
-            private=True,
-            user=self.user1
-        )
+        tracked_ml = Modlist.new_tracked_modlist(self.user1)
         tracked_ml.id = 100
         db.session.add(tracked_ml)
         db.session.commit()
@@ -87,6 +92,13 @@ class AuthRoutesTestCase(TestCase):
         ).scalars().first()
         self.assertIsNotNone(user)
         self.assertEqual(user.email, email)
+        tracked_modlist = db.session.execute(
+            db.select(Modlist)
+            .where(Modlist.user_id==user.id)
+            .where(Modlist.is_tracked==True)
+        ).scalars().first()
+        self.assertIsNotNone(tracked_modlist)
+        self.assertEqual(tracked_modlist.name, 'Nexus Tracked Mods')
 
 
     def test_signup_duplicate_username(self):
@@ -202,7 +214,102 @@ class AuthRoutesTestCase(TestCase):
             self.assertEqual(follow_response.status_code, 200)
             self.assertIn('Hello', follow_response.get_data(as_text=True))
             self.assertIn(CURR_USER_KEY, session)
-            self.assertIn('user_api_key', session)
+            self.assertIsNotNone(client.get_cookie(API_KEY_COOKIE_NAME))
+
+        # games list update and tracked mods sync are queued, not run during login
+        self.assertIsNone(db.session.get(Game, 200))
+        queued_jobs = db.session.execute(db.select(Job.kind).where(Job.status == 'queued')).scalars().all()
+        self.assertCountEqual(queued_jobs, ['games_list_update', 'tracked_mods_sync'])
+
+        while run_next_job():
+            pass
+
+        self.assertIsNotNone(db.session.get(Game, 200))
+        job_statuses = db.session.execute(db.select(Job.status)).scalars().all()
+        self.assertEqual(job_statuses, ['done', 'done'])
+
+
+    @patch('app.do_games_list_update')
+    @patch('app.do_tracked_mods_update')
+    def test_login_session_stored_server_side(self, mock_tracked_mods_update, mock_games_list_update):
+        """Test session data is stored in the db, the 
+        session cookie only holds the session id and the 
+        encrypted API key stays out of the sessions table."""
+
+        # prevent unnecessary extra login functions
+        mock_tracked_mods_update.return_value = None
+        mock_games_list_update.return_value = None
+
+        with self.client as client:
+            client.post('/login', data={
+                'username': self.user1.username,
+                'password': self.password1,
+                'user_api_key': 'never_sent_does_not_matter'
+            })
+
+            sid = client.get_cookie(app.config['SESSION_COOKIE_NAME']).value
+            stored_session = load_session_data(sid)
+            self.assertEqual(stored_session[CURR_USER_KEY], self.user1.id)
+            self.assertNotIn('user_api_key', stored_session)
+            self.assertIsNotNone(client.get_cookie(API_KEY_COOKIE_NAME))
+
+            client.get('/logout')
+            self.assertIsNone(client.get_cookie(API_KEY_COOKIE_NAME))
+            self.assertIsNone(db.session.get(StoredSession, sid))
+            self.assertIsNone(load_session_data(sid))
+
+
+    @patch('app.do_games_list_update')
+    @patch('app.do_tracked_mods_update')
+    def test_session_not_cached_per_process(self, mock_tracked_mods_update, mock_games_list_update):
+        """Test a deleted stored session can't be read from a 
+        per-process cache, only a shared cache holds sessions."""
+
+        # prevent unnecessary extra login functions
+        mock_tracked_mods_update.return_value = None
+        mock_games_list_update.return_value = None
+
+        with self.client as client:
+            client.post('/login', data={
+                'username': self.user1.username,
+                'password': self.password1,
+                'user_api_key': 'never_sent_does_not_matter'
+            })
+            sid = client.get_cookie(app.config['SESSION_COOKIE_NAME']).value
+            self.assertEqual(load_session_data(sid)[CURR_USER_KEY], self.user1.id)
+
+            db.session.execute(db.delete(StoredSession).where(StoredSession.id == sid))
+            db.session.commit()
+
+            self.assertIsNone(load_session_data(sid))
+
+
+    @patch('app.do_games_list_update')
+    @patch('app.do_tracked_mods_update')
+    def test_read_only_session_expiry_refreshed(self, mock_tracked_mods_update, mock_games_list_update):
+        """Test a session only read by requests gets its 
+        expires_at pushed back once SESSION_REFRESH_INTERVAL old."""
+
+        # prevent unnecessary extra login functions
+        mock_tracked_mods_update.return_value = None
+        mock_games_list_update.return_value = None
+
+        with self.client as client:
+            client.post('/login', data={
+                'username': self.user1.username,
+                'password': self.password1,
+                'user_api_key': 'never_sent_does_not_matter'
+            })
+            sid = client.get_cookie(app.config['SESSION_COOKIE_NAME']).value
+
+            old_expires_at = datetime.now(timezone.utc) + app.permanent_session_lifetime - SESSION_REFRESH_INTERVAL * 2
+            db.session.execute(db.update(StoredSession).where(StoredSession.id == sid).values(expires_at=old_expires_at))
+            db.session.commit()
+
+            client.get('/')
+
+            db.session.expire_all()
+            self.assertGreater(db.session.get(StoredSession, sid).expires_at, old_expires_at)
 
 
     def test_login_failure(self):
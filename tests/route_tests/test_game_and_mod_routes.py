@@ -1,5 +1,6 @@
 """Tests for Game and Mod routes."""
 
+import gzip
 import os
 from unittest import TestCase
 from unittest.mock import patch, Mock
@@ -9,14 +10,18 @@ from models import db, connect_db, User, Modlist, Mod, Game, game_mod, game_modl
 
 os.environ['DATABASE_URL'] = "postgresql:///modlist_test"
 
-from app import app, CURR_USER_KEY
+from app import app, CURR_USER_KEY, TRACKED_MODS_VERSION_KEY
+from games_catalogue import invalidate_games_catalogue
+from write_behind import mod_upsert_buffer
+from tracked_mods_store import store_tracked_mod_ids
+from utilities import update_all_games_db
 
 app.config['WTF_CSRF_ENABLED'] = False
 
 class UserRoutesTestCase(TestCase):
     """Tests for the Game and Mod routes:
-	show_all_games_page(), show_game_page(), 
-    show_mod_page()
+	show_all_games_page(), games_api(), games_letter_api(), show_game_page(), 
+    show_mod_page(), search_mods(), typeahead()
     """
 
     @classmethod
@@ -72,6 +77,9 @@ class UserRoutesTestCase(TestCase):
         db.session.add_all([self.game1, self.game2])
         db.session.commit()
 
+        # games were changed directly, drop catalogue built by earlier tests
+        invalidate_games_catalogue()
+
         self.mod1 = Mod(
             id=301,
             name='Test Mod One',
@@ -95,7 +103,7 @@ class UserRoutesTestCase(TestCase):
         db.session.add(self.modlist1)
         db.session.commit()
 
-        self.modlist1.mods.append(self.mod1)
+        self.modlist1.mods.add(self.mod1)
         self.modlist1.for_games.append(self.game1)
         db.session.commit()
 
@@ -174,6 +182,117 @@ class UserRoutesTestCase(TestCase):
         self.assertIn(self.user1.username, response.get_data(as_text=True))
 
 
+    def test_show_all_games_page_after_games_update(self):
+        """Test all-games page lists games added by update_all_games_db 
+        after the games catalogue was already built."""
+
+        self.client.get(f'/games', follow_redirects=True)
+
+        update_resp = update_all_games_db([
+            {'id': self.game1.id, 'domain_name': self.game1.domain_name, 'name': self.game1.name, 'downloads': self.game1.downloads},
+            {'id': 203, 'domain_name': 'test_game3_domain', 'name': 'Test Name Game 3', 'downloads': 3333}
+        ])
+        self.assertEqual(update_resp, (1, 0, 1)) # (inserted, updated, unchanged)
+
+        # same data again writes nothing
+        self.assertEqual(update_all_games_db([
+            {'id': self.game1.id, 'domain_name': self.game1.domain_name, 'name': self.game1.name, 'downloads': self.game1.downloads},
+            {'id': 203, 'domain_name': 'test_game3_domain', 'name': 'Test Name Game 3', 'downloads': 3333}
+        ]), (0, 0, 2))
+
+        response = self.client.get(f'/games', follow_redirects=True)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Test Name Game 3', response.get_data(as_text=True))
+        self.assertIn(self.game2.name, response.get_data(as_text=True))
+
+
+    def test_games_api(self):
+        """Test games list JSON is linked from the all-games page, 
+        versioned, gzipped on request, and revalidated with its ETag."""
+
+        page = self.client.get('/games').get_data(as_text=True)
+        self.assertNotIn('games-data', page)
+        self.assertIn('data-games-url="/api/games?v=', page)
+
+        response = self.client.get('/api/games')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [game['domain_name'] for game in response.json], 
+            [self.game2.domain_name, self.game1.domain_name]
+        )
+        self.assertIn('no-cache', response.headers['Cache-Control'])
+        self.assertNotIn('Cookie', response.headers.get('Vary', ''))
+        etag = response.headers['ETag']
+
+        response = self.client.get('/api/games', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.get_data(), b'')
+
+        version = etag.strip('"')
+        response = self.client.get(f'/api/games?v={version}', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertIn('immutable', response.headers['Cache-Control'])
+        self.assertNotEqual(response.headers['ETag'], etag)
+        self.assertEqual(gzip.decompress(response.get_data()), self.client.get('/api/games').get_data())
+
+        # changed games get a new version
+        update_all_games_db([
+            {'id': 203, 'domain_name': 'test_game3_domain', 'name': 'Test Name Game 3', 'downloads': 3333}
+        ])
+        response = self.client.get('/api/games', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json[0]['domain_name'], 'test_game3_domain')
+
+
+    def test_show_all_games_page_prebuilt(self):
+        """Test logged out all-games page is served pre-rendered with 
+        an ETag, and is rendered again when the games change."""
+
+        response = self.client.get('/games')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Cookie', response.headers['Vary'])
+        etag = response.headers['ETag']
+
+        response = self.client.get('/games', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+
+        update_all_games_db([
+            {'id': 203, 'domain_name': 'test_game3_domain', 'name': 'Test Name Game 3', 'downloads': 3333}
+        ])
+        response = self.client.get('/games', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Test Name Game 3', response.get_data(as_text=True))
+
+
+    def test_games_letter_api(self):
+        """Test each letter's games are served sorted by name, 
+        with '#' games at the 'other' url."""
+
+        db.session.add_all([
+            Game(id=203, domain_name='test_game3_domain', name='A Test Name Game 3', downloads=3333),
+            Game(id=204, domain_name='test_game4_domain', name='7 Days to Die', downloads=4444)
+        ])
+        db.session.commit()
+        invalidate_games_catalogue()
+
+        response = self.client.get('/api/games/letters/T')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json, [
+            {'domain_name': self.game1.domain_name, 'name': self.game1.name},
+            {'domain_name': self.game2.domain_name, 'name': self.game2.name}
+        ])
+
+        response = self.client.get('/api/games/letters/other')
+        self.assertEqual([game['domain_name'] for game in response.json], ['test_game4_domain'])
+
+        response = self.client.get('/api/games/letters/a')
+        self.assertEqual([game['domain_name'] for game in response.json], ['test_game3_domain'])
+
+        response = self.client.get('/api/games/letters/AB')
+        self.assertEqual(response.status_code, 404)
+
+
     def test_show_game_page_logged_out(self):
         """Test visiting a game page while logged out."""
 
@@ -217,6 +336,14 @@ class UserRoutesTestCase(TestCase):
         self.assertIn(self.mock_mod_data['name'], response.get_data(as_text=True))
         self.assertIn(self.user1.username, response.get_data(as_text=True))
 
+        # page's mods are saved by the write-behind buffer after the response
+        mod_upsert_buffer.flush()
+
+        mod2 = db.session.get(Mod, self.mock_mod_data['mod_id'])
+        self.assertIsNotNone(mod2)
+        self.assertEqual(mod2.name, self.mock_mod_data['name'])
+        self.assertIn(self.game1, mod2.for_games)
+
 
     def test_show_mod_page_logged_out(self):
         """Test visiting a mod page while logged out."""
@@ -258,4 +385,93 @@ class UserRoutesTestCase(TestCase):
             self.assertEqual(response.status_code, 200)
             self.assertIn(self.game1.name, response.get_data(as_text=True))
             self.assertIn(f"What would you like to do with {self.mock_mod_data['name']}?", response.get_data(as_text=True))
-            self.assertIn(f"Add this mod to a modlist!", response.get_data(as_text=True))
\ No newline at end of file
+            self.assertIn(f"Add this mod to a modlist!", response.get_data(as_text=True))
+
+
+    @patch('app.get_mod_nxs')
+    @patch('app.do_games_list_update')
+    @patch('app.do_tracked_mods_update')
+    def test_show_mod_page_tracked_mod(self, mock_tracked_mods_update, mock_games_list_update, mock_get_mod_nxs):
+        """Test mod page reads tracked mod ids from the server-side 
+        store, the session only holds the store's version token."""
+
+        # prevent unnecessary extra login functions
+        mock_tracked_mods_update.return_value = None
+        mock_games_list_update.return_value = None
+
+        # provide mock mod data to prevent external API dependence
+        mock_get_mod_nxs.return_value = self.mock_mod_data
+
+        with self.client as client:
+            client.post('/login', data={
+                'username': self.user1.username,
+                'password': self.password1,
+                'user_api_key': 'never_sent_does_not_matter'
+            })
+
+            with client.session_transaction() as sess:
+                sess[TRACKED_MODS_VERSION_KEY] = store_tracked_mod_ids(self.user1.id, [self.mock_mod_data['mod_id']])
+
+            response = client.get(f"/games/{self.game1.domain_name}/mods/{self.mock_mod_data['mod_id']}", follow_redirects=True)
+
+            self.assertEqual(response.status_code, 200)
+            self.assertIn("Un-Track this mod on Nexus", response.get_data(as_text=True))
+            self.assertNotIn('tracked_mod_ids', session)
+
+
+    @patch('app.do_games_list_update')
+    @patch('app.do_tracked_mods_update')
+    def test_search_mods(self, mock_tracked_mods_update, mock_games_list_update):
+        """Test searching stored mods, optionally scoped to a game."""
+
+        # prevent unnecessary extra login functions
+        mock_tracked_mods_update.return_value = None
+        mock_games_list_update.return_value = None
+
+        with self.client as client:
+            client.post('/login', data={
+                'username': self.user1.username,
+                'password': self.password1,
+                'user_api_key': 'never_sent_does_not_matter'
+            })
+
+            response = client.get('/mods/search?q=mod+one')
+            self.assertEqual(response.status_code, 200)
+            self.assertIn(self.mod1.name, response.get_data(as_text=True))
+            self.assertIn(f'/games/{self.game1.domain_name}/mods/{self.mod1.id}', response.get_data(as_text=True))
+
+            response = client.get(f'/mods/search?q=mod+one&game={self.game2.domain_name}')
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn(self.mod1.name, response.get_data(as_text=True))
+            self.assertIn("No stored mods match", response.get_data(as_text=True))
+
+            response = client.get('/mods/search?q=mod&game=not_a_game')
+            self.assertEqual(response.status_code, 404)
+
+            response = client.get('/mods/search?q=mod&after=not_a_cursor')
+            self.assertEqual(response.status_code, 400)
+
+
+    def test_typeahead(self):
+        """Test typeahead suggestions are public, cacheable JSON."""
+
+        with self.client as client:
+            response = client.get('/api/typeahead?q=test+name')
+            self.assertEqual(response.status_code, 200)
+            self.assertIn('public', response.headers['Cache-Control'])
+            self.assertEqual(
+                [game['domain_name'] for game in response.json['games']], 
+                [self.game2.domain_name, self.game1.domain_name]
+            )
+
+            response = client.get(f'/api/typeahead?q=test+mod&game={self.game1.domain_name}')
+            self.assertEqual(response.json['games'], [])
+            self.assertEqual(response.json['mods'], [
+                {'id': self.mod1.id, 'name': self.mod1.name, 'game_domain_name': self.game1.domain_name}
+            ])
+
+            response = client.get('/api/typeahead?q=te')
+            self.assertEqual(response.json, {'q': 'te', 'games': [], 'mods': []})
+
+            response = client.get('/api/typeahead?q=test&game=not_a_game')
+            self.assertEqual(response.status_code, 404)
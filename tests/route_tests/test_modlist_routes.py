@@ -101,7 +101,7 @@ class UserRoutesTestCase(TestCase):
         db.session.add(self.modlist1)
         db.session.commit()
 
-        self.modlist1.mods.append(self.mod1)
+        self.modlist1.mods.add(self.mod1)
         self.modlist1.for_games.append(self.game1)
         db.session.commit()
 
@@ -206,7 +206,7 @@ class UserRoutesTestCase(TestCase):
 
         mock_get_mod_nxs.return_value = self.mock_mod_data     
         self.assertFalse(self.modlist1.has_nsfw)
-        self.assertEqual(len(self.modlist1.mods), 1)
+        self.assertEqual(self.modlist1.count_mods(), 1)
 
         with self.client as client:
             response = client.post(f'/users/modlists/add/mods/{self.mod2.id}', data={'users_modlists':[self.modlist1.id]}, follow_redirects=True)
@@ -215,8 +215,8 @@ class UserRoutesTestCase(TestCase):
             self.assertIn(('success', f"{self.mod2.name} was successfully added to: {self.modlist1.name}."), flash_messages)
 
         self.assertEqual(response.status_code, 200)
-        self.assertIn(self.mod2, self.modlist1.mods)
-        self.assertEqual(len(self.modlist1.mods), 2)
+        self.assertTrue(self.modlist1.has_mod(self.mod2))
+        self.assertEqual(self.modlist1.count_mods(), 2)
         self.assertTrue(self.modlist1.has_nsfw)
         self.assertIn(self.mod2.name, response.get_data(as_text=True))
 
@@ -227,7 +227,7 @@ class UserRoutesTestCase(TestCase):
         modlist that already contains that mod"""
 
         mock_get_mod_nxs.return_value = self.mock_mod_data
-        self.assertEqual(len(self.modlist1.mods), 1)
+        self.assertEqual(self.modlist1.count_mods(), 1)
 
         with self.client as client:
             response = client.post(f'/users/modlists/add/mods/{self.mod1.id}', data={'users_modlists':[self.modlist1.id]}, follow_redirects=True)
@@ -236,14 +236,48 @@ class UserRoutesTestCase(TestCase):
             self.assertIn(('danger', f"{self.mod1.name} already exists in: '{self.modlist1.name}'."), flash_messages)
 
         self.assertEqual(response.status_code, 200)
-        self.assertEqual(len(self.modlist1.mods), 1)
+        self.assertEqual(self.modlist1.count_mods(), 1)
+
+
+    @patch('app.get_mod_nxs')
+    def test_modlist_add_mod_multiple_modlists(self, mock_get_mod_nxs):
+        """Test adding a mod to several of the user's modlists 
+        at once, including one that already contains the mod"""
+
+        mock_get_mod_nxs.return_value = self.mock_mod_data
+
+        modlist2 = Modlist.new_modlist(
+            name='Test Modlist Two', 
+            description="Description of Test Modlist Two", 
+            private=False,
+            user=self.user1
+        )
+        modlist2.id = 401
+        db.session.add(modlist2)
+        db.session.commit()
+
+        self.modlist1.mods.add(self.mod2)
+        db.session.commit()
+
+        with self.client as client:
+            response = client.post(f'/users/modlists/add/mods/{self.mod2.id}', data={'users_modlists':[self.modlist1.id, modlist2.id]}, follow_redirects=True)
+
+            flash_messages = get_flashed_messages(with_categories=True)
+            self.assertIn(('success', f"{self.mod2.name} was successfully added to: {modlist2.name}."), flash_messages)
+            self.assertIn(('danger', f"{self.mod2.name} already exists in: '{self.modlist1.name}'."), flash_messages)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(modlist2.has_mod(self.mod2))
+        self.assertIn(self.game1, modlist2.for_games)
+        self.assertTrue(modlist2.has_nsfw)
+        self.assertEqual(self.modlist1.count_mods(), 2)
 
 
     def test_modlist_delete_mod_success(self):
         """Test successful deletion of a mod from the user's modlist"""
 
         mod1_id = self.mod1.id
-        self.assertEqual(len(self.modlist1.mods), 1)
+        self.assertEqual(self.modlist1.count_mods(), 1)
         self.assertIn(self.game1, self.modlist1.for_games)
 
         with self.client as client:
@@ -255,8 +289,115 @@ class UserRoutesTestCase(TestCase):
         self.assertEqual(response.status_code, 200)
         mod_not_deleted_from_db = db.session.get(Mod, mod1_id)
         self.assertIsNotNone(mod_not_deleted_from_db)
-        self.assertEqual(len(self.modlist1.mods), 0)
+        self.assertEqual(self.modlist1.count_mods(), 0)
+        self.assertEqual(len(self.modlist1.for_games), 0)
+
+
+    def test_modlist_delete_mod_not_in_modlist(self):
+        """Test removing a mod that is not in the user's 
+        modlist reports it not found and changes nothing"""
+
+        self.assertEqual(self.modlist1.count_mods(), 1)
+
+        with self.client as client:
+            response = client.post(f'/users/modlists/{self.modlist1.id}/mods/{self.mod2.id}/delete', follow_redirects=True)
+
+            flash_messages = get_flashed_messages(with_categories=True)
+            self.assertIn(('danger', f"Can't delete mod from modlist. {self.mod2.name} not found in {self.modlist1.name}."), flash_messages)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.modlist1.count_mods(), 1)
+        self.assertTrue(self.modlist1.has_mod(self.mod1))
+        self.assertIn(self.game1, self.modlist1.for_games)
+        self.assertIsNotNone(db.session.get(Mod, self.mod2.id))
+
+
+    def test_modlist_bulk_mods_add(self):
+        """Test adding several mods to the user's modlist at once"""
+
+        mod3 = Mod(
+            id=303,
+            name='Test Mod Three',
+            summary='Test Mod Three Summary',
+            is_nsfw= False,
+            picture_url='modpic3@test.com',
+            updated_timestamp=1234567890,
+            uploaded_by='Some Username',
+            for_games=[self.game1]
+        )
+        db.session.add(mod3)
+        db.session.commit()
+
+        with self.client as client:
+            response = client.post('/users/modlists/mods/bulk/add', data={
+                'modlist_id': self.modlist1.id,
+                'mod_ids': [self.mod1.id, self.mod2.id, mod3.id]
+            }, follow_redirects=True)
+
+            flash_messages = get_flashed_messages(with_categories=True)
+            self.assertIn(('success', f"2 mod(s) successfully added to '{self.modlist1.name}'."), flash_messages)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.modlist1.count_mods(), 3)
+        self.assertTrue(self.modlist1.has_mod(self.mod2))
+        self.assertTrue(self.modlist1.has_mod(mod3))
+        self.assertTrue(self.modlist1.has_nsfw)
+
+
+    def test_modlist_bulk_mods_add_other_game(self):
+        """Test mods for a different game than the modlist's are 
+        skipped and reported"""
+
+        game2 = Game(id=202, domain_name='test_game2_domain', name='Test Name Game 2', downloads=2222)
+        mod3 = Mod(
+            id=303,
+            name='Test Mod Three',
+            summary='Test Mod Three Summary',
+            is_nsfw= False,
+            picture_url='modpic3@test.com',
+            updated_timestamp=1234567890,
+            uploaded_by='Some Username',
+            for_games=[game2]
+        )
+        db.session.add_all([game2, mod3])
+        db.session.commit()
+
+        with self.client as client:
+            client.post('/users/modlists/mods/bulk/add', data={
+                'modlist_id': self.modlist1.id,
+                'mod_ids': [self.mod1.id, self.mod2.id, mod3.id]
+            }, follow_redirects=True)
+
+            flash_messages = get_flashed_messages(with_categories=True)
+            self.assertIn(('success', f"1 mod(s) successfully added to '{self.modlist1.name}'."), flash_messages)
+            self.assertIn(('warning', f"1 mod(s) were not added because they are for a different game than '{self.modlist1.name}'."), flash_messages)
+            self.assertIn(('warning', f"1 mod(s) were not added because they are already in '{self.modlist1.name}'."), flash_messages)
+
+        self.assertFalse(self.modlist1.has_mod(mod3))
+
+
+    def test_modlist_bulk_mods_delete(self):
+        """Test removing several mods from the user's modlist 
+        at once, which un-assigns the game when the modlist empties"""
+
+        self.modlist1.mods.add(self.mod2)
+        self.modlist1.has_nsfw = True
+        db.session.commit()
+
+        with self.client as client:
+            response = client.post('/users/modlists/mods/bulk/delete', data={
+                'modlist_id': self.modlist1.id,
+                'mod_ids': [self.mod1.id, self.mod2.id]
+            }, follow_redirects=True)
+
+            flash_messages = get_flashed_messages(with_categories=True)
+            self.assertIn(('success', f"2 mod(s) successfully removed from '{self.modlist1.name}'."), flash_messages)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.modlist1.count_mods(), 0)
         self.assertEqual(len(self.modlist1.for_games), 0)
+        self.assertFalse(self.modlist1.has_nsfw)
+        self.assertIsNotNone(db.session.get(Mod, self.mod1.id))
 
 
     def test_edit_modlist_success(self):
@@ -303,7 +444,7 @@ class UserRoutesTestCase(TestCase):
         db.session.add(modlist2)
         db.session.commit()
 
-        modlist2.mods.append(self.mod1)
+        modlist2.mods.add(self.mod1)
         modlist2.for_games.append(self.game1)
         db.session.commit()
 
@@ -333,7 +474,7 @@ class UserRoutesTestCase(TestCase):
 
         modlist_exists = db.session.get(Modlist, self.modlist1.id)
         self.assertIsNotNone(modlist_exists)
-        self.assertIn(self.modlist1, self.mod1.in_modlists)
+        self.assertTrue(self.modlist1.has_mod(self.mod1))
         self.assertIn(self.modlist1, self.user1.modlists)
         self.assertEqual(len(self.user1.modlists), 1)
 
@@ -346,11 +487,33 @@ class UserRoutesTestCase(TestCase):
         self.assertEqual(response.status_code, 200)
         modlist_still_exists = db.session.get(Modlist, modlist_exists.id)
         self.assertIsNone(modlist_still_exists)
-        self.assertNotIn(modlist_exists, self.mod1.in_modlists)
+        self.assertNotIn(modlist_exists, db.session.scalars(self.mod1.in_modlists.select()).all())
         self.assertNotIn(modlist_exists, self.user1.modlists)
         self.assertEqual(len(self.user1.modlists), 0)
 
 
+    def test_delete_modlist_clears_association_rows(self):
+        """Test deleting a modlist removes its modlist_mod and 
+        game_modlist rows and leaves its Mods in the db"""
+
+        modlist_id = self.modlist1.id
+
+        with self.client as client:
+            client.post(f'/users/modlists/{modlist_id}/delete', follow_redirects=True)
+
+        modlist_mod_rows = db.session.execute(
+            db.select(modlist_mod).where(modlist_mod.c.modlist_id == modlist_id)
+        ).all()
+        game_modlist_rows = db.session.execute(
+            db.select(game_modlist).where(game_modlist.c.modlist_id == modlist_id)
+        ).all()
+        self.assertEqual(modlist_mod_rows, [])
+        self.assertEqual(game_modlist_rows, [])
+        self.assertIsNotNone(db.session.get(Mod, self.mod1.id))
+        self.assertIsNotNone(db.session.get(Mod, self.mod2.id))
+        self.assertIsNotNone(db.session.get(Game, self.game1.id))
+
+
     def test_delete_modlist_invalid_user(self):
         """Test unsuccessful deletion of a user's modlist 
         due to user not owning the modlist"""
@@ -367,7 +530,7 @@ class UserRoutesTestCase(TestCase):
 
         modlist_exists = db.session.get(Modlist, self.modlist1.id)
         self.assertIsNotNone(modlist_exists)
-        self.assertIn(self.modlist1, self.mod1.in_modlists)
+        self.assertTrue(self.modlist1.has_mod(self.mod1))
         self.assertIn(self.modlist1, user2.modlists)
         self.assertEqual(len(user2.modlists), 1)
 
@@ -380,21 +543,22 @@ class UserRoutesTestCase(TestCase):
         self.assertEqual(response.status_code, 200)
         modlist_still_exists = db.session.get(Modlist, modlist_exists.id)
         self.assertIsNotNone(modlist_still_exists)
-        self.assertIn(self.modlist1, self.mod1.in_modlists)
+        self.assertTrue(self.modlist1.has_mod(self.mod1))
         self.assertIn(self.modlist1, user2.modlists)
         self.assertEqual(len(user2.modlists), 1)
 
 
     def test_delete_modlist_invalid_modlist_name(self):
         """Test unsuccessful deletion of a user's modlist 
-        due to modlist being named 'Nexus Tracked Mods'"""
+        due to modlist being the 'Nexus Tracked Mods' modlist"""
 
         self.modlist1.name = 'Nexus Tracked Mods'
+        self.modlist1.is_tracked = True
         db.session.commit()
 
         modlist_exists = db.session.get(Modlist, self.modlist1.id)
         self.assertIsNotNone(modlist_exists)
-        self.assertIn(self.modlist1, self.mod1.in_modlists)
+        self.assertTrue(self.modlist1.has_mod(self.mod1))
         self.assertIn(self.modlist1, self.user1.modlists)
         self.assertEqual(len(self.user1.modlists), 1)
 
@@ -407,7 +571,7 @@ class UserRoutesTestCase(TestCase):
         self.assertEqual(response.status_code, 200)
         modlist_still_exists = db.session.get(Modlist, modlist_exists.id)
         self.assertIsNotNone(modlist_still_exists)
-        self.assertIn(self.modlist1, self.mod1.in_modlists)
+        self.assertTrue(self.modlist1.has_mod(self.mod1))
         self.assertIn(self.modlist1, self.user1.modlists)
         self.assertEqual(len(self.user1.modlists), 1)
 
@@ -5,13 +5,19 @@ from unittest import TestCase
 from unittest.mock import patch, Mock
 from flask import session, get_flashed_messages, g, request
 from sqlalchemy.exc import IntegrityError
-from models import db, connect_db, User, Modlist, Mod, Game, keep_tracked, game_mod
+from models import db, connect_db, User, Modlist, Mod, Game, Job, keep_tracked, game_mod
 
 os.environ['DATABASE_URL'] = "postgresql:///modlist_test"
 
 from app import app, CURR_USER_KEY
+from cache import cache
+from games_catalogue import invalidate_games_catalogue
+from jobs import run_next_job
+from tracked_sync import get_latest_tracked_sync_job
 
 app.config['WTF_CSRF_ENABLED'] = False
+# background jobs are run by the tests with run_next_job()
+app.config['JOB_WORKER_THREADS'] = 0
 
 class TrackedModlistRoutesTestCase(TestCase):
     """Tests for the user's tracked-mods modlist routes:
@@ -43,8 +49,12 @@ class TrackedModlistRoutesTestCase(TestCase):
         db.session.execute(Modlist.__table__.delete())
         db.session.execute(Mod.__table__.delete())
         db.session.execute(Game.__table__.delete())
+        db.session.execute(Job.__table__.delete())
         db.session.commit()
 
+        # drop tracked mod ids and sessions cached by earlier tests
+        cache.clear()
+
         self.password1 = 'password1'
         self.user1 = User.signup(
             username='testuser1',
@@ -65,12 +75,10 @@ class TrackedModlistRoutesTestCase(TestCase):
         db.session.commit()
         self.game1 = db.session.get(Game, new_game.id)
 
-        tracked_ml = Modlist.new_modlist(
-            name='Nexus Tracked Mods', 
-            description="This modlist automatically populates with all the mods in your Nexus account's Tracking Centre.", 
-            private=True,
-            user=self.user1
-        )
+        # games were changed directly, drop catalogue built by earlier tests
+        invalidate_games_catalogue()
+
+        tracked_ml = Modlist.new_tracked_modlist(self.user1)
         tracked_ml.id = 100
         db.session.add(tracked_ml)
         db.session.commit()
@@ -99,7 +107,7 @@ class TrackedModlistRoutesTestCase(TestCase):
         db.session.add_all([self.mod1, self.mod2])
         db.session.commit()
 
-        self.tracked_modlist.mods.extend([self.mod1, self.mod2])
+        self.tracked_modlist.mods.add_all([self.mod1, self.mod2])
         self.user1.keep_tracked.append(self.mod2)
         db.session.commit()
 
@@ -190,8 +198,8 @@ class TrackedModlistRoutesTestCase(TestCase):
             'status':'published'
         }
 
-        self.assertIn(self.mod1, self.tracked_modlist.mods)
-        self.assertIn(self.mod2, self.tracked_modlist.mods)
+        self.assertTrue(self.tracked_modlist.has_mod(self.mod1))
+        self.assertTrue(self.tracked_modlist.has_mod(self.mod2))
         self.assertIsNone(db.session.get(Mod, 303))
 
         with self.client as client:
@@ -206,18 +214,157 @@ class TrackedModlistRoutesTestCase(TestCase):
 
             response = client.get('/users/modlists/tracked-sync', follow_redirects=False)
             self.assertEqual(response.status_code, 302)
+
+            # sync is queued as a background job, run it before checking the page
+            sync_job = get_latest_tracked_sync_job(self.user1.id)
+            self.assertEqual(sync_job['status'], 'queued')
+            self.assertEqual(db.session.execute(db.select(Job.kind)).scalars().all(), ['tracked_mods_sync'])
+            self.assertTrue(run_next_job())
+            self.assertFalse(run_next_job())
             
             follow_response = client.get(response.location, follow_redirects=True)
             self.assertEqual(follow_response.status_code, 200)
 
             self.assertIn(self.tracked_modlist.name, follow_response.get_data(as_text=True))
-            self.assertNotIn(self.mod1, self.tracked_modlist.mods)
+            self.assertFalse(self.tracked_modlist.has_mod(self.mod1))
             self.assertNotIn(self.mod1.name, follow_response.get_data(as_text=True))
-            self.assertIn(self.mod2, self.tracked_modlist.mods)
+            self.assertTrue(self.tracked_modlist.has_mod(self.mod2))
             mod3 = db.session.get(Mod, 303)
-            self.assertIn(mod3, self.tracked_modlist.mods)
+            self.assertTrue(self.tracked_modlist.has_mod(mod3))
             self.assertIn(mod3.name, follow_response.get_data(as_text=True))
 
+            status_response = client.get('/api/users/modlists/tracked-sync/status')
+            self.assertFalse(status_response.json['running'])
+            self.assertIsNotNone(status_response.json['last_synced'])
+            self.assertEqual(status_response.json['job']['id'], sync_job['id'])
+            self.assertEqual(status_response.json['job']['status'], 'done')
+
+            job_response = client.get(f"/api/users/modlists/tracked-sync/jobs/{sync_job['id']}")
+            self.assertEqual(job_response.json['status'], 'done')
+            self.assertEqual(job_response.json['tracked'], 2)
+            self.assertEqual(job_response.json['missing'], 1)
+            self.assertEqual(job_response.json['fetched'], 1)
+            self.assertEqual(job_response.json['errors'], 0)
+
+
+    @patch('app.do_games_list_update')
+    @patch('app.do_tracked_mods_update')
+    @patch('utilities.get_tracked_mods_nxs')
+    def test_tracked_sync_failure_retries_job(self, mock_get_tracked_mods_nxs, mock_tracked_mods_update, mock_games_list_update):
+        """Test a sync that fails to reach Nexus is counted as an 
+        error and its job queued again instead of marked done."""
+
+        # prevent unnecessary extra login functions
+        mock_tracked_mods_update.return_value = None
+        mock_games_list_update.return_value = None
+
+        mock_get_tracked_mods_nxs.side_effect = Exception('Nexus is down')
+
+        with self.client as client:
+            client.post('/login', data={
+                'username': self.user1.username,
+                'password': self.password1,
+                'user_api_key': 'never_sent_does_not_matter'
+            })
+
+            client.get('/users/modlists/tracked-sync')
+            self.assertTrue(run_next_job())
+
+            sync_job = get_latest_tracked_sync_job(self.user1.id)
+            self.assertEqual(sync_job['status'], 'queued')
+            self.assertEqual(sync_job['errors'], 1)
+            self.assertIsNone(sync_job['finished_at'])
+
+            job = db.session.execute(db.select(Job)).scalar()
+            self.assertEqual(job.attempts, 1)
+            self.assertIn('Nexus is down', job.last_error)
+
+
+    @patch('app.track_mod_nxs')
+    @patch('app.do_games_list_update')
+    @patch('app.do_tracked_mods_update')
+    @patch('utilities.get_mod_nxs')
+    @patch('utilities.get_tracked_mods_nxs')
+    def test_track_mod_updates_only_that_mod(self, mock_get_tracked_mods_nxs, mock_get_mod_nxs, mock_tracked_mods_update, mock_games_list_update, mock_track_mod_nxs):
+        """Test tracking and un-tracking a mod changes just that mod 
+        in the tracked modlist, without a full Tracking Centre sync."""
+
+        # prevent unnecessary extra login functions
+        mock_tracked_mods_update.return_value = None
+        mock_games_list_update.return_value = None
+
+        # Prepare the mock return values to avoid external API dependency
+        mock_track_mod_nxs.return_value = True
+        mock_get_mod_nxs.return_value = {
+            'mod_id':303,
+            'name':'Test Mod Name',
+            'summary':'Test Mod Summary',
+            'contains_adult_content': False,
+            'picture_url':'modpic@test.com',
+            'updated_timestamp':1234567890,
+            'uploaded_by':'Some Username',
+            'status':'published'
+        }
+
+        with self.client as client:
+            # log in user1
+            client.post('/login', data={
+                'username': self.user1.username,
+                'password': self.password1,
+                'user_api_key': 'never_sent_does_not_matter'
+            })
+
+            client.get(f'/api/games/{self.game1.domain_name}/mods/303/tracking/add')
+            client.get(f'/api/games/{self.game1.domain_name}/mods/{self.mod1.id}/tracking/delete')
+
+            mock_get_tracked_mods_nxs.assert_not_called()
+            mock_get_mod_nxs.assert_called_once()
+
+            mod3 = db.session.get(Mod, 303)
+            self.assertTrue(self.tracked_modlist.has_mod(mod3))
+            self.assertFalse(self.tracked_modlist.has_mod(self.mod1))
+            self.assertTrue(self.tracked_modlist.has_mod(self.mod2))
+
+
+    @patch('app.track_mod_nxs')
+    @patch('app.do_games_list_update')
+    @patch('app.do_tracked_mods_update')
+    @patch('utilities.get_mod_nxs')
+    def test_track_mod_warns_when_modlist_not_updated(self, mock_get_mod_nxs, mock_tracked_mods_update, mock_games_list_update, mock_track_mod_nxs):
+        """Test tracking a mod that can't be added to the tracked 
+        modlist flashes a warning instead of only the Nexus success."""
+
+        # prevent unnecessary extra login functions
+        mock_tracked_mods_update.return_value = None
+        mock_games_list_update.return_value = None
+
+        # Nexus tracks the mod, but it isn't published so it can't be stored
+        mock_track_mod_nxs.return_value = True
+        mock_get_mod_nxs.return_value = {
+            'mod_id':304,
+            'name':'Hidden Mod Name',
+            'summary':'Hidden Mod Summary',
+            'contains_adult_content': False,
+            'picture_url':'modpic@test.com',
+            'updated_timestamp':1234567890,
+            'uploaded_by':'Some Username',
+            'status':'hidden'
+        }
+
+        with self.client as client:
+            # log in user1
+            client.post('/login', data={
+                'username': self.user1.username,
+                'password': self.password1,
+                'user_api_key': 'never_sent_does_not_matter'
+            })
+
+            client.get(f'/api/games/{self.game1.domain_name}/mods/304/tracking/add')
+
+            flash_messages = get_flashed_messages(with_categories=True)
+            self.assertIn(('warning', "Your Nexus Tracking Centre was updated, but this mod could not be added to your Nexus Tracked Mods modlist. It will be synced with Nexus when you next open it."), flash_messages)
+            self.assertIsNone(db.session.get(Mod, 304))
+
 
     @patch('app.do_games_list_update')
     @patch('app.do_tracked_mods_update')
@@ -251,8 +398,8 @@ class TrackedModlistRoutesTestCase(TestCase):
             
             follow_response = client.get(response.location, follow_redirects=True)
             self.assertEqual(follow_response.status_code, 200)
-            self.assertIn(self.mod1, self.tracked_modlist.mods)
-            self.assertIn(self.mod2, self.tracked_modlist.mods)
+            self.assertTrue(self.tracked_modlist.has_mod(self.mod1))
+            self.assertTrue(self.tracked_modlist.has_mod(self.mod2))
             self.assertIn(self.mod1, self.user1.keep_tracked)
             self.assertIn(self.mod2, self.user1.keep_tracked)
             self.assertIn(self.tracked_modlist.name, follow_response.get_data(as_text=True))
@@ -291,8 +438,8 @@ class TrackedModlistRoutesTestCase(TestCase):
             
             follow_response = client.get(response.location, follow_redirects=True)
             self.assertEqual(follow_response.status_code, 200)
-            self.assertIn(self.mod1, self.tracked_modlist.mods)
-            self.assertIn(self.mod2, self.tracked_modlist.mods)
+            self.assertTrue(self.tracked_modlist.has_mod(self.mod1))
+            self.assertTrue(self.tracked_modlist.has_mod(self.mod2))
             self.assertEqual(follow_response.status_code, 200)
             self.assertNotIn(self.mod1, self.user1.keep_tracked)
             self.assertNotIn(self.mod2, self.user1.keep_tracked)
@@ -9,7 +9,9 @@ from models import db, connect_db, User, Modlist, Mod, Game, game_mod, game_modl
 
 os.environ['DATABASE_URL'] = "postgresql:///modlist_test"
 
-from app import app, CURR_USER_KEY
+from app import app, CURR_USER_KEY, API_KEY_COOKIE_NAME
+from cache import cache
+from cache_invalidation import dispatch_invalidation
 
 app.config['WTF_CSRF_ENABLED'] = False
 
@@ -48,6 +50,9 @@ class UserRoutesTestCase(TestCase):
         db.session.execute(Game.__table__.delete())
         db.session.commit()
 
+        # drop public profiles cached by earlier tests for the same user ids
+        cache.clear()
+
         self.password1 = 'password1'
         self.user1 = User.signup(
             username='testuser1',
@@ -97,7 +102,7 @@ class UserRoutesTestCase(TestCase):
         db.session.add(self.modlist1)
         db.session.commit()
 
-        self.modlist1.mods.append(self.mod1)
+        self.modlist1.mods.add(self.mod1)
         self.modlist1.for_games.append(self.game1)
         db.session.commit()
 
@@ -158,6 +163,36 @@ class UserRoutesTestCase(TestCase):
         self.assertNotIn("Create New Modlist", response.get_data(as_text=True))
 
 
+    def test_show_user_page_hides_private_and_empty_modlists(self):
+        """Test public profile page leaves out private
+        modlists and modlists with no game assigned"""
+
+        private_modlist = Modlist.new_modlist(
+            name='Private Modlist',
+            description="Private modlist for game1",
+            private=True,
+            user=self.user1
+        )
+        empty_modlist = Modlist.new_modlist(
+            name='Empty Modlist',
+            description="Modlist with no mods or game",
+            private=False,
+            user=self.user1
+        )
+        db.session.add_all([private_modlist, empty_modlist])
+        db.session.commit()
+
+        private_modlist.for_games.append(self.game1)
+        db.session.commit()
+
+        response = self.client.get(f'/users/{self.user1.id}', follow_redirects=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(self.game1.name, response.get_data(as_text=True))
+        self.assertIn(self.modlist1.name, response.get_data(as_text=True))
+        self.assertNotIn(private_modlist.name, response.get_data(as_text=True))
+        self.assertNotIn(empty_modlist.name, response.get_data(as_text=True))
+
+
     @patch('app.do_games_list_update')
     @patch('app.do_tracked_mods_update')
     def test_show_user_page_self_logged_in(self, mock_tracked_mods_update, mock_games_list_update):
@@ -210,6 +245,29 @@ class UserRoutesTestCase(TestCase):
             self.assertNotIn("Edit Profile", response.get_data(as_text=True))
 
 
+    def test_show_user_page_public_profile_cached(self):
+        """Test public profile is served from the cache until 
+        one of the user's modlists is invalidated"""
+
+        response = self.client.get(f'/users/{self.user1.id}')
+        self.assertIn(self.modlist1.name, response.get_data(as_text=True))
+
+        db.session.execute(
+            db.update(Modlist)
+            .where(Modlist.id == self.modlist1.id)
+            .values(name='Renamed Modlist')
+        )
+        db.session.commit()
+
+        response = self.client.get(f'/users/{self.user1.id}')
+        self.assertIn('Test Modlist One', response.get_data(as_text=True))
+
+        dispatch_invalidation('modlist', 400)
+
+        response = self.client.get(f'/users/{self.user1.id}')
+        self.assertIn('Renamed Modlist', response.get_data(as_text=True))
+
+
     @patch('app.do_games_list_update')
     @patch('app.do_tracked_mods_update')
     def test_edit_profile_logged_in(self, mock_tracked_mods_update, mock_games_list_update):
@@ -250,6 +308,38 @@ class UserRoutesTestCase(TestCase):
         self.assertIn(self.user1.username, response.get_data(as_text=True))
 
 
+    @patch('app.do_games_list_update')
+    @patch('app.do_tracked_mods_update')
+    def test_edit_profile_refreshes_cached_user(self, mock_tracked_mods_update, mock_games_list_update):
+        """Test profile edit drops the user's cached snapshot 
+        so g.user isn't served stale"""
+
+        new_username = 'EditedUsername'
+
+        # prevent unnecessary extra login functions
+        mock_tracked_mods_update.return_value = None
+        mock_games_list_update.return_value = None
+
+        with self.client as client:
+            client.post('/login', data={
+                'username': self.user1.username,
+                'password': self.password1,
+                'user_api_key': 'never_sent_does_not_matter'
+            })
+            client.get('/')
+            self.assertEqual(g.user.username, 'testuser1')
+
+            client.post('/users/edit', data={
+                'username':new_username,
+                'email':self.user1.email,
+                'hide_nsfw':'true',
+                'current_password':self.password1
+            })
+
+            client.get('/')
+            self.assertEqual(g.user.username, new_username)
+
+
     @patch('app.do_games_list_update')
     @patch('app.do_tracked_mods_update')
     def test_edit_password_logged_in(self, mock_tracked_mods_update, mock_games_list_update):
@@ -303,7 +393,7 @@ class UserRoutesTestCase(TestCase):
                 'user_api_key': 'never_sent_does_not_matter'
             })
             self.assertIn(CURR_USER_KEY, session)
-            self.assertIn('user_api_key', session)
+            self.assertIsNotNone(client.get_cookie(API_KEY_COOKIE_NAME))
 
             response = client.post('/users/delete', follow_redirects=True)
         
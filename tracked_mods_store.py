@@ -0,0 +1,77 @@
+"""Server-side store of each user's tracked mod ids for app.py
+
+Ids are kept in the app cache as a frozenset under the user's
+id and a version token, the session only holds the token. A new
+token is issued whenever the set changes, so a worker holding
+an older copy never serves it to the session again. The user's
+Nexus Tracked Mods modlist in the db is the source the set is
+reloaded from when the cached copy is gone. A finished sync sends
+a 'tracked_mods' invalidation event, which drops the user's copies
+in every worker."""
+
+from secrets import token_hex
+from cache import cache
+
+TRACKED_MODS_TTL = 3600 # seconds
+
+
+def _tracked_mods_key(user_id, token):
+    return f'tracked_mods:{user_id}:{token}'
+
+
+def store_tracked_mod_ids(user_id, mod_ids):
+    """Stores user's tracked mod ids under a new version token,
+    dropping the user's older versions.
+
+    Returns the token to keep in the session."""
+
+    invalidate_tracked_mod_ids(user_id)
+
+    token = token_hex(8)
+    cache.set(
+        _tracked_mods_key(user_id, token),
+        frozenset(mod_ids),
+        ttl=TRACKED_MODS_TTL,
+        tags=[f'tracked_mods:{user_id}']
+    )
+
+    return token
+
+
+def get_tracked_mod_ids(user_id, token, load_mod_ids):
+    """Gets user's tracked mod ids stored under token. If the cached
+    copy is missing, load_mod_ids(user_id) reloads them and they are
+    cached again under the same token.
+
+    Returns frozenset of mod ids, or None if token is None
+    (tracked mods not synced with Nexus this session)."""
+
+    if token is None:
+        return None
+
+    key = _tracked_mods_key(user_id, token)
+    mod_ids = cache.get(key)
+
+    if mod_ids is None:
+        mod_ids = frozenset(load_mod_ids(user_id))
+        cache.set(key, mod_ids, ttl=TRACKED_MODS_TTL, tags=[f'tracked_mods:{user_id}'])
+
+    return mod_ids
+
+
+def invalidate_tracked_mod_ids(user_id):
+    """Drops every stored version of user's tracked mod ids."""
+
+    cache.invalidate_tag(f'tracked_mods:{user_id}')
+
+
+def handle_tracked_mods_invalidation(user_id):
+    """Invalidation handler for 'tracked_mods' events. user_id 
+    None comes from a listener reconnect: only a per-process 
+    cache is cleared, a shared cache was kept current by the 
+    other workers' listeners."""
+
+    if user_id is not None:
+        invalidate_tracked_mod_ids(user_id)
+    elif not cache.is_shared:
+        cache.clear()
@@ -0,0 +1,155 @@
+"""Background sync jobs for users' Nexus Tracked Mods modlists, for app.py
+
+The tracked modlist page renders straight from the db and, when
+the last sync is older than TRACKED_SYNC_STALE_AFTER, queues a
+sync with the Nexus Tracking Centre as a 'tracked_mods_sync' job
+(see jobs.py), which is also how login syncs.
+
+Each sync is a Job row: its status, progress counts and finish
+time live on the row, so the page can poll them through the sync
+status endpoints from any worker. A user has at most one queued or
+running sync, enforced by the job's dedup key: asking to sync while
+one is active gets the active job back instead of starting another."""
+
+from datetime import datetime, timedelta, timezone
+from time import monotonic
+from cache_invalidation import notify_invalidation
+from jobs import ACTIVE_JOB_STATUSES, enqueue_job, get_running_job_id, save_job_progress
+from models import db, Job
+from tracked_mods_store import invalidate_tracked_mod_ids
+from utilities import update_tracked_mods_from_nexus
+
+TRACKED_SYNC_STALE_AFTER = timedelta(minutes=15)
+TRACKED_SYNC_JOB_KIND = 'tracked_mods_sync'
+# progress is written to the job row at most this often while counts change
+TRACKED_SYNC_PROGRESS_INTERVAL = 1 # seconds
+
+SYNC_PROGRESS_COUNTS = ['tracked', 'missing', 'fetched', 'unpublished', 'errors']
+
+
+def _dedup_key(user_id):
+    return f'{TRACKED_SYNC_JOB_KIND}:{user_id}'
+
+
+def is_tracked_sync_stale(tracked_modlist):
+    """Checks if tracked modlist's last sync is older than
+    TRACKED_SYNC_STALE_AFTER. A modlist never synced isn't
+    stale here, login queues its first sync.
+
+    Returns boolean."""
+
+    if tracked_modlist is None or tracked_modlist.last_synced is None:
+        return False
+
+    return datetime.now(timezone.utc) - tracked_modlist.last_synced > TRACKED_SYNC_STALE_AFTER
+
+
+def tracked_sync_job_dict(job):
+    """Job dict of a tracked modlist sync Job row:
+    {'id', 'user_id', 'status': 'queued', 'running', 'done' or 'failed',
+    'tracked', 'missing', 'fetched', 'unpublished', 'errors',
+    'started_at', 'finished_at': ISO datetime str or None}"""
+
+    progress = job.progress or {}
+
+    return {
+        'id': job.id,
+        'user_id': job.payload['user_id'],
+        'status': job.status,
+        **{count: progress.get(count, 0) for count in SYNC_PROGRESS_COUNTS},
+        'started_at': job.created_at.isoformat(),
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None
+    }
+
+
+def get_tracked_sync_job(job_id):
+    """Returns job dict for job_id, or None if unknown or purged."""
+
+    job = db.session.get(Job, job_id, populate_existing=True)
+    if job is None or job.kind != TRACKED_SYNC_JOB_KIND:
+        return None
+
+    return tracked_sync_job_dict(job)
+
+
+def get_latest_tracked_sync_job(user_id):
+    """Returns job dict of user's most recently queued job,
+    whatever its status, or None."""
+
+    job = db.session.execute(
+        db.select(Job)
+        .where(Job.dedup_key == _dedup_key(user_id))
+        .order_by(Job.id.desc())
+        .limit(1)
+        .execution_options(populate_existing=True)
+    ).scalar()
+
+    return tracked_sync_job_dict(job) if job else None
+
+
+def get_running_tracked_sync_job(user_id):
+    """Returns user's queued or running job dict, or None."""
+
+    job = db.session.execute(
+        db.select(Job)
+        .where(Job.dedup_key == _dedup_key(user_id))
+        .where(Job.status.in_(ACTIVE_JOB_STATUSES))
+        .execution_options(populate_existing=True)
+    ).scalar()
+
+    return tracked_sync_job_dict(job) if job else None
+
+
+def start_tracked_sync(user_id, encrypted_api_key):
+    """Queues a sync of user's tracked modlist with Nexus, or
+    attaches to the user's queued or running sync. The Fernet 
+    encrypted API key is stored in the job, the worker decrypts it. 
+    Commit is left to the caller's transaction, workers can 
+    claim the job once it commits.
+
+    Returns (job id, True if a sync was queued by this call), 
+    or raises Exception."""
+
+    return enqueue_job(
+        TRACKED_SYNC_JOB_KIND,
+        {'user_id': user_id, 'api_key': encrypted_api_key},
+        dedup_key=_dedup_key(user_id)
+    )
+
+
+def run_tracked_sync(user_id, headers):
+    """Job worker: syncs user's tracked modlist with Nexus, saving
+    progress counts to the running job's row as they change, and 
+    drops stored tracked mod ids in every worker so sessions 
+    reload them.
+
+    Raises the sync's Exception once its progress is saved, so 
+    jobs.py retries the job or marks it failed."""
+
+    job_id = get_running_job_id()
+    progress_counts = {count: 0 for count in SYNC_PROGRESS_COUNTS}
+    last_saved = None
+
+    def save_progress(force=False):
+        nonlocal last_saved
+        if job_id is None:
+            return
+        if force or last_saved is None or monotonic() - last_saved >= TRACKED_SYNC_PROGRESS_INTERVAL:
+            save_job_progress(job_id, dict(progress_counts))
+            last_saved = monotonic()
+
+    def progress(**counts):
+        for count, amount in counts.items():
+            progress_counts[count] += amount
+        save_progress()
+
+    try:
+        update_tracked_mods_from_nexus(user_id, headers=headers, progress=progress)
+        invalidate_tracked_mod_ids(user_id)
+        # other workers drop their copies when jobs.py commits the job
+        notify_invalidation('tracked_mods', user_id)
+    except Exception as e:
+        print(f"Function: run_tracked_sync()\nBackground sync of user #{user_id}'s tracked modlist failed; error: ", e)
+        raise
+    finally:
+        save_progress(force=True)
@@ -0,0 +1,61 @@
+"""Per-process cache of signed-in user rows for app.py
+
+Lets the before_request user lookup skip the db for
+users that were loaded recently by the same worker.
+
+Entries are keyed by user id alone, without a version to check
+against the db. Every edit to a user (profile, password, deletion)
+drops them here with invalidate_cached_user() and in other workers
+through the 'user' notifications from cache_invalidation, which
+send the edit with its commit. Other workers are only correct while
+their invalidation listener runs: with CACHE_INVALIDATION_LISTENER
+off they serve an edited user's snapshot for up to USER_CACHE_TTL."""
+
+from collections import namedtuple
+from cache import LRUCache
+
+USER_CACHE_MAX_SIZE = 1024
+USER_CACHE_TTL = 3600 # seconds, edits by other workers invalidate through cache_invalidation
+
+
+# Read-only snapshot of the User columns that templates and routes 
+# read from g.user. Not attached to the db session - routes that change 
+# the user or need its relationships load the live User with 
+# get_current_user_db().
+CachedUser = namedtuple('CachedUser', ['id', 'username', 'email', 'hide_nsfw'])
+
+
+# per-process, g.user snapshots are too small and hot to send to a shared cache
+_cached_users = LRUCache(max_size=USER_CACHE_MAX_SIZE, default_ttl=USER_CACHE_TTL)
+
+
+def get_cached_user(user_id):
+    """Get snapshot of user cached under user_id.
+
+    Returns CachedUser, or None if missing or expired."""
+
+    return _cached_users.get(user_id)
+
+
+def set_cached_user(user):
+    """Cache snapshot of user under its id, evicting
+    the least recently used user when the cache is full.
+
+    Returns the cached CachedUser."""
+
+    cached_user = CachedUser(user.id, user.username, user.email, user.hide_nsfw)
+    _cached_users.set(cached_user.id, cached_user)
+
+    return cached_user
+
+
+def invalidate_cached_user(user_id):
+    """Remove user from this process' cache."""
+
+    _cached_users.delete(user_id)
+
+
+def clear_cached_users():
+    """Remove every user from this process' cache."""
+
+    _cached_users.clear()
@@ -3,64 +3,144 @@
 Covers logic functions and interactions 
 with PostgreSQL database"""
 
+from collections import namedtuple
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy.dialects.postgresql import insert
-from flask import flash, g, abort
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlalchemy.orm import selectinload
+from flask import flash, g, abort, has_request_context
 from app import db
-from models import User, Modlist, Mod, Game, game_mod, keep_tracked, modlist_mod
+from models import User, Modlist, Mod, Game, DataVersion, game_mod, game_modlist, keep_tracked, modlist_mod, TRACKED_MODLIST_NAME, TRACKED_MODLIST_DESCRIPTION
 from nexus_api import get_mod_nxs, get_tracked_mods_nxs
-from time import sleep
+from cache import cache
+from cache_invalidation import notify_invalidation
+from games_catalogue import GAMES_VERSION_NAME, get_games_catalogue, get_catalogue_game, invalidate_games_catalogue
+from time import sleep, perf_counter
+from datetime import datetime, timezone
+
+# Rows passed to an upsert that were inserted, updated, 
+# or left alone because their data hadn't changed
+UpsertCounts = namedtuple('UpsertCounts', ['inserted', 'updated', 'unchanged'])
+
+# Result of a chunked upsert: UpsertCounts totals, plus ids of rows 
+# that failed and were left out, and an UpsertChunk for each chunk
+ChunkedUpsertCounts = namedtuple('ChunkedUpsertCounts', ['inserted', 'updated', 'unchanged', 'failed_ids', 'chunks'])
+UpsertChunk = namedtuple('UpsertChunk', ['rows', 'inserted', 'updated', 'unchanged', 'failed', 'seconds'])
+
+# Result of bulk_modlist_mods_db: ids of mods added or deleted, 
+# and ids of mods not added because they are for another game
+BulkModsResult = namedtuple('BulkModsResult', ['changed_ids', 'other_game_ids'])
+
+MOD_SEARCH_PER_PAGE = 25
+TYPEAHEAD_LIMIT = 8
+PUBLIC_MODLISTS_TTL = 3600 # seconds, modlist edits drop them through cache_invalidation
+
+# rows per mods upsert statement, 7 bind parameters each
+MOD_UPSERT_BATCH_SIZE = 500
+
+# in an upsert's RETURNING, xmax is 0 only for newly inserted rows
+RETURNING_INSERTED = db.literal_column('(xmax = 0)', type_=db.Boolean).label('inserted')
+
+
+def flash_sync_message(message, category):
+    """Flash message about a tracked mods sync to the user, or 
+    print it when the sync runs in the background outside a request."""
+
+    if has_request_context():
+        flash(message, category)
+    else:
+        print(f"Background tracked mods sync ({category}): {message}")
+
+
+def get_current_user_db():
+    """Loads the signed-in user from the db.
+
+    g.user only holds a read-only snapshot of the user's 
+    columns, use this when a route needs to change the user 
+    or needs the live User object for relationships.
+    
+    Returns User object, or None if no user is signed in."""
+
+    if not g.user:
+        return None
+
+    return db.session.get(User, g.user.id)
 
 
 def get_all_games_db():
-    """Retrieves full list of game data from db.
+    """Retrieves full list of game data from the games catalogue, 
+    which is only rebuilt from the db when game data changes.
     
-    Returns games list from db if successful, or Exception details."""
+    Returns games list ordered by downloads if successful, or Exception details."""
 
     try:
-        ordered_games = db.session.scalars(db.select(Game).order_by(Game.downloads.desc())).all()
-
-        return [{'id': game.id, 'domain_name': game.domain_name, 'name': game.name, 'downloads': game.downloads} for game in ordered_games]
+        return get_games_catalogue().games_data
 
     except Exception as e:
-        print("Page: Homepage\nFunction: get_all_games_db()\nQuery failed to retrieve all game data from db; error: ", e)
+        print("Page: Homepage\nFunction: get_all_games_db()\nFailed to retrieve all game data from games catalogue; error: ", e)
         return e
 
 
 def get_game_db(game_domain_name):
-    """Uses game_domain_name to retrieve game data from db.
+    """Uses game_domain_name to look up game in the games catalogue.
     
-    Returns Game object from db if successful, or Exception."""
-
-    game = db.session.scalars(db.select(Game).where(Game.domain_name==game_domain_name)).first()
+    Returns CatalogueGame with id, domain_name, name and downloads 
+    if found, or None."""
 
-    return game
+    return get_catalogue_game(game_domain_name)
 
 
-def get_tracked_modlist_db(user_id, load_mods=False):
+def get_tracked_modlist_db(user_id):
     """Gets the user's Nexus Tracked Mods modlist from the db.
     
-    Returns tracked modlist or the modlist with mods eager loaded if load_mods=True is passed."""
+    Returns tracked modlist. Modlist's mods are write-only, 
+    query them with paginate_tracked_mods() or get_tracked_mods_db()."""
 
-    if load_mods:
-        stmt = (
-            db.select(Modlist)
-            .options(db.joinedload(Modlist.mods))  # Eager load mods
-            .where(Modlist.user_id == user_id)
-            .where(Modlist.name == "Nexus Tracked Mods")
-        )
-    else:
-        stmt = (
-            db.select(Modlist)
-            .where(Modlist.user_id == user_id)
-            .where(Modlist.name == "Nexus Tracked Mods")
-        )
+    stmt = (
+        db.select(Modlist)
+        .where(Modlist.user_id == user_id)
+        .where(Modlist.is_tracked == True)
+    )
     
     tracked_modlist = db.session.execute(stmt).scalars().first()
 
     return tracked_modlist
 
 
+def get_or_create_tracked_modlist_db(user_id):
+    """Gets the user's Nexus Tracked Mods modlist from the db, 
+    creating it first if the user doesn't have one yet.
+
+    Creation is an INSERT ... ON CONFLICT DO NOTHING against the 
+    unique tracked modlist index, so concurrent requests can't 
+    make a second tracked modlist for the same user.
+    
+    Returns tracked modlist."""
+
+    tracked_modlist = get_tracked_modlist_db(user_id)
+
+    if not tracked_modlist:
+        stmt = (
+            insert(Modlist)
+            .values(
+                name=TRACKED_MODLIST_NAME,
+                description=TRACKED_MODLIST_DESCRIPTION,
+                private=True,
+                is_tracked=True,
+                user_id=user_id
+            )
+            .on_conflict_do_nothing(
+                index_elements=['user_id'],
+                index_where=Modlist.is_tracked
+            )
+        )
+        db.session.execute(stmt)
+        db.session.commit()
+        tracked_modlist = get_tracked_modlist_db(user_id)
+
+    return tracked_modlist
+
+
 def get_tracked_mods_db(user_id, just_ids=False, order='updated'):
     """Gets list of tracked mods or mod ids from the user's 
     Nexus Tracked Mods modlist stored in the db.
@@ -81,16 +161,18 @@ def get_tracked_mods_db(user_id, just_ids=False, order='updated'):
     if just_ids:
         stmt = (
             db.select(Mod.id)
-            .join(Modlist.mods)
-            .where(Modlist.name == "Nexus Tracked Mods")
+            .join(modlist_mod)
+            .join(Modlist, Modlist.id == modlist_mod.c.modlist_id)
+            .where(Modlist.is_tracked == True)
             .where(Modlist.user_id == user_id)
             .order_by(order)
         )
     else:
         stmt = (
             db.select(Mod)
-            .join(Modlist.mods)
-            .where(Modlist.name == "Nexus Tracked Mods")
+            .join(modlist_mod)
+            .join(Modlist, Modlist.id == modlist_mod.c.modlist_id)
+            .where(Modlist.is_tracked == True)
             .where(Modlist.user_id == user_id)
             .order_by(order)
         )
@@ -173,17 +255,7 @@ def paginate_tracked_mods(user_id, page=1, per_page=25, order='update', tab='tra
         order = Mod.updated_timestamp.desc()
         
     # Get the user's Nexus Tracked Mods modlist
-    tracked_modlist = get_tracked_modlist_db(user_id, load_mods=False)
-
-    if not tracked_modlist:
-        Modlist.new_modlist(
-            name='Nexus Tracked Mods', 
-            description="This modlist automatically populates with all the mods in your Nexus account's Tracking Centre.", 
-            private=True,
-            user=g.user
-        )
-        db.session.commit()
-        tracked_modlist = get_tracked_modlist_db(user_id, load_mods=False)
+    tracked_modlist = get_or_create_tracked_modlist_db(user_id)
 
     if tab == 'keep-tracked-mods':
         mods_stmt = (
@@ -234,7 +306,125 @@ def paginate_modlist_mods(user_id, modlist_id, page=1, per_page=25, order='updat
     return paginated_mods
 
 
-def add_missing_tracked_mods_db(user_id, nexus_tracked_data, headers=None):
+def search_mods_db(search_text, game_id=None, after=None, per_page=MOD_SEARCH_PER_PAGE):
+    """Full-text search of stored mods' names, authors and summaries, 
+    using the GIN indexed Mod.search_vector. search_text takes web 
+    search syntax: "quoted phrases", OR, -excluded words. Optionally 
+    only searches mods linked to the game with game_id.
+
+    Results are ranked best match first, ties by mod id. Pages use 
+    keyset pagination: pass the returned cursor as after to get the 
+    page following this one.
+
+    Returns (list of (Mod, rank) tuples, cursor (rank, mod id) 
+    for the next page or None if this is the last page)."""
+
+    query = db.func.websearch_to_tsquery('english', search_text)
+    rank = db.func.ts_rank_cd(Mod.search_vector, query)
+
+    stmt = (
+        db.select(Mod, rank.label('rank'))
+        .where(Mod.search_vector.op('@@')(query))
+        .options(selectinload(Mod.for_games))
+        .order_by(rank.desc(), Mod.id)
+        .limit(per_page + 1)
+    )
+
+    if game_id is not None:
+        stmt = stmt.where(
+            db.exists()
+            .where(game_mod.c.mod_id == Mod.id)
+            .where(game_mod.c.game_id == game_id)
+        )
+
+    if after is not None:
+        after_rank, after_mod_id = after
+        # ts_rank_cd() returns real, compare as real so ties match exactly
+        after_rank = db.cast(after_rank, db.REAL)
+        stmt = stmt.where(db.or_(
+            rank < after_rank,
+            db.and_(rank == after_rank, Mod.id > after_mod_id)
+        ))
+
+    results = db.session.execute(stmt).all()
+
+    if len(results) <= per_page:
+        return results, None
+
+    results = results[:per_page]
+    last_mod, last_rank = results[-1]
+
+    return results, (last_rank, last_mod.id)
+
+
+def typeahead_order(name_column, search_text):
+    """ORDER BY terms shared by the typeahead queries: names starting 
+    with search_text first, then closest trigram word similarity."""
+
+    return (
+        name_column.istartswith(search_text, autoescape=True).desc(),
+        db.func.word_similarity(search_text, name_column).desc()
+    )
+
+
+def typeahead_match(name_column, search_text):
+    """WHERE clause shared by the typeahead queries: name contains 
+    search_text, or has a word similar enough to it to catch typos. 
+    Both conditions use the name's gin_trgm_ops index."""
+
+    return db.or_(
+        name_column.icontains(search_text, autoescape=True),
+        db.literal(search_text).op('<%')(name_column)
+    )
+
+
+def typeahead_games_db(search_text, limit=TYPEAHEAD_LIMIT):
+    """Gets top limit games with names matching search_text, 
+    ties going to the most downloaded game.
+
+    Returns list of dicts: {'domain_name', 'name'}"""
+
+    rows = db.session.execute(
+        db.select(Game.domain_name, Game.name)
+        .where(typeahead_match(Game.name, search_text))
+        .order_by(*typeahead_order(Game.name, search_text), Game.downloads.desc())
+        .limit(limit)
+    ).all()
+
+    return [row._asdict() for row in rows]
+
+
+def typeahead_mods_db(search_text, game_id=None, limit=TYPEAHEAD_LIMIT):
+    """Gets top limit stored mods with names matching search_text, 
+    optionally only mods of the game with game_id. Mods not linked 
+    to any game have no mod page and are left out.
+
+    Returns list of dicts: {'id', 'name', 'game_domain_name'} where 
+    game_domain_name is the most downloaded of the mod's games."""
+
+    game_domain_name = (
+        db.select(Game.domain_name)
+        .join(game_mod, game_mod.c.game_id == Game.id)
+        .where(game_mod.c.mod_id == Mod.id)
+        .order_by(Game.downloads.desc())
+        .limit(1)
+    )
+    if game_id is not None:
+        game_domain_name = game_domain_name.where(Game.id == game_id)
+    game_domain_name = game_domain_name.scalar_subquery()
+
+    rows = db.session.execute(
+        db.select(Mod.id, Mod.name, game_domain_name.label('game_domain_name'))
+        .where(typeahead_match(Mod.name, search_text))
+        .where(game_domain_name.is_not(None))
+        .order_by(*typeahead_order(Mod.name, search_text), Mod.id)
+        .limit(limit)
+    ).all()
+
+    return [row._asdict() for row in rows]
+
+
+def add_missing_tracked_mods_db(user_id, nexus_tracked_data, headers=None, progress=None):
     """Checks if there are any missing mods in the database 
     compared to fresh nexus_tracked_data argument, and calls 
     Nexus API to get the missing mod's data to add to the db.
@@ -244,6 +434,10 @@ def add_missing_tracked_mods_db(user_id, nexus_tracked_data, headers=None):
     sync_tracked_modlist_mods_db(user_id, nexus_tracked_data) 
     to update modlist.
     
+    If passed, progress(**counts) is called with the number of 
+    mods missing from the db, then once per missing mod with 
+    fetched=1 plus unpublished=1 or errors=1 when that applies.
+    
     Returns list of unpublished ids that should not get sync'd 
     in user's modlist.
     """
@@ -252,6 +446,9 @@ def add_missing_tracked_mods_db(user_id, nexus_tracked_data, headers=None):
 
     nexus_tracked_ids_by_game = group_nexus_tracked_by_game(nexus_tracked_data)
 
+    if progress:
+        progress(missing=sum(1 for data in nexus_tracked_data if data['mod_id'] not in all_mod_ids_in_db))
+
     nxs_req_limit = 25 # Nexus API throws error for >30 requests/sec.
     sleep_interval = 1 / nxs_req_limit
 
@@ -270,11 +467,17 @@ def add_missing_tracked_mods_db(user_id, nexus_tracked_data, headers=None):
                 except Exception as e:
                     print("Page: login() or Tracked Modlist page\nFunction: get_mod_nxs() in add_missing_tracked_mods_db()\nFailed to retrieve Nexus API data, error: ", e)
                     get_mod_error_ids.append(id)
+                    if progress:
+                        progress(errors=1)
                 else:
                     if new_nexus_data['status']=='published':
                         nexus_data_to_add.append(new_nexus_data)
+                        if progress:
+                            progress(fetched=1)
                     else:
                         unpublished_ids.append(id)
+                        if progress:
+                            progress(fetched=1, unpublished=1)
             
         if len(nexus_data_to_add) == 0:
             continue
@@ -285,13 +488,18 @@ def add_missing_tracked_mods_db(user_id, nexus_tracked_data, headers=None):
         
         db_ready_mods = filter_nxs_data(nexus_data_to_add, 'mods')
 
-        update_all_games_db_resp = update_list_mods_db(db_ready_mods)
+        mods_upserted = update_list_mods_db(db_ready_mods)
         link_mods_to_game(db_ready_mods, game)
 
+        if mods_upserted.failed_ids:
+            get_mod_error_ids.extend(mods_upserted.failed_ids)
+            if progress:
+                progress(errors=len(mods_upserted.failed_ids))
+
     if len(get_mod_error_ids) != 0:
-        flash(f"An error was encountered retrieving data from Nexus Tracking Centre for tracked mods with these IDs: {str(get_mod_error_ids)[1:-1]}.  \nVisit your Nexus Tracked Mods modlist and use the 'Re-Sync Tracked Mods to Nexus' button to reattempt data retrieval.", "warning")
+        flash_sync_message(f"An error was encountered retrieving data from Nexus Tracking Centre for tracked mods with these IDs: {str(get_mod_error_ids)[1:-1]}.  \nVisit your Nexus Tracked Mods modlist and use the 'Re-Sync Tracked Mods to Nexus' button to reattempt data retrieval.", "warning")
     if len(unpublished_ids) != 0:
-        flash(f"Nexus Tracked Mods modlist was synced with Nexus records, but mods with these IDs: {str(unpublished_ids)[1:-1]} have a status that is not set to 'published'.  \nWe did not import data from Nexus for any unpublished mods.", "warning")
+        flash_sync_message(f"Nexus Tracked Mods modlist was synced with Nexus records, but mods with these IDs: {str(unpublished_ids)[1:-1]} have a status that is not set to 'published'.  \nWe did not import data from Nexus for any unpublished mods.", "warning")
 
     return unpublished_ids
 
@@ -326,7 +534,7 @@ def sync_tracked_modlist_mods_db(user_id, nexus_tracked_data, unpublished_ids):
     
     Returns list of tracked mod ids."""
 
-    tracked_modlist = get_tracked_modlist_db(user_id, load_mods=True)
+    tracked_modlist = get_tracked_modlist_db(user_id)
 
     unpublished_ids_set = set(unpublished_ids)
     
@@ -335,51 +543,131 @@ def sync_tracked_modlist_mods_db(user_id, nexus_tracked_data, unpublished_ids):
         data['mod_id'] for data in nexus_tracked_data 
         if data['mod_id'] not in unpublished_ids_set
     }
+    nxs_all_mod_ids = [data['mod_id'] for data in nexus_tracked_data]
 
     # Remove mods that are no longer tracked by comparing with the Nexus mod IDs
-    tracked_modlist.mods = [
-        mod for mod in tracked_modlist.mods 
-        if mod.id in nxs_tracked_mod_ids_set
-    ]
+    db.session.execute(
+        db.delete(modlist_mod)
+        .where(modlist_mod.c.modlist_id == tracked_modlist.id)
+        .where(modlist_mod.c.mod_id.notin_(nxs_all_mod_ids))
+    )
 
-    # Add new mods that are tracked on Nexus but not in tracked_modlist.mods
-    tracked_mod_ids = set([mod.id for mod in tracked_modlist.mods])
-    for data in nexus_tracked_data:
-        if data['mod_id'] not in tracked_mod_ids:
-            mod_to_add = db.session.get(Mod, data['mod_id'])
-            if mod_to_add:
-                tracked_modlist.mods.append(mod_to_add)
+    # Add mods in db that are tracked on Nexus but not yet in tracked modlist
+    if nxs_all_mod_ids:
+        mods_to_add = (
+            db.select(db.literal(tracked_modlist.id), Mod.id)
+            .where(Mod.id.in_(nxs_all_mod_ids))
+        )
+        db.session.execute(
+            insert(modlist_mod)
+            .from_select(['modlist_id', 'mod_id'], mods_to_add)
+            .on_conflict_do_nothing()
+        )
+
+    tracked_modlist.last_synced = datetime.now(timezone.utc)
 
     db.session.commit()
 
     return sorted(nxs_tracked_mod_ids_set)
 
 
-def update_tracked_mods_from_nexus(user_id, headers=None):
+def update_tracked_mods_from_nexus(user_id, headers=None, progress=None):
     """Do Nexus API call to get mods currently in Nexus Tracking Centre. Use that mod data to update database with any mods tracked on Nexus that are not yet in the db. Use the currently tracked list to update user's Nexus Tracked Mods modlist with mod data in db (add missing mods & remove mods that shouldn't be there).
     
-    Flash error messages to user if issues arise. Return nothing.
-    Call this aggregate function from app.py.
-    Returns list of tracked mod ids."""
+    Flash error messages to user if issues arise, then re-raise 
+    the error so the job running the sync is retried or failed.
+    If passed, progress(**counts) gets the number of mods tracked 
+    on Nexus, then the counts from add_missing_tracked_mods_db().
+    Returns list of tracked mod ids, or raises Exception."""
 
     tracked_mod_ids = []
 
     try:
         nexus_tracked_data = get_tracked_mods_nxs(headers=headers)
-        unpublished_ids = add_missing_tracked_mods_db(user_id, nexus_tracked_data, headers=headers)
+        if progress:
+            progress(tracked=len(nexus_tracked_data))
+        unpublished_ids = add_missing_tracked_mods_db(user_id, nexus_tracked_data, headers=headers, progress=progress)
     except Exception as e:
         print("Page: login() or Tracked Mods page\nFunction:\n____get_tracked_mods_nxs(), or\n____add_missing_tracked_mods_db()\n____in update_tracked_mods_from_nexus()\nFailed to retrieve Nexus API data, error: ", e)
-        flash("A problem occurred while retrieving your tracked mods from the Tracking Centre on Nexus.  \nClick 'Re-Sync with Nexus Tracking Centre' button on your Nexus Tracked Mods modlist to reattempt sync.", "danger")
+        if progress:
+            progress(errors=1)
+        flash_sync_message("A problem occurred while retrieving your tracked mods from the Tracking Centre on Nexus.  \nClick 'Re-Sync with Nexus Tracking Centre' button on your Nexus Tracked Mods modlist to reattempt sync.", "danger")
+        raise
     else:
         try:
             tracked_mod_ids = sync_tracked_modlist_mods_db(user_id, nexus_tracked_data, unpublished_ids)
         except Exception as e:
             print('sync_tracked_modlist_mods_db() Error:\n  ', e)
-            flash(f"An error was encountered syncing mods in your Nexus Tracked Mods modlist to the official Nexus Tracking Centre records.  \nIf mods displayed in your Nexus Tracked Mods modlist are inaccurate, click 'Re-Sync with Nexus Tracking Centre' button to reattempt sync.", "warning")
+            if progress:
+                progress(errors=1)
+            flash_sync_message(f"An error was encountered syncing mods in your Nexus Tracked Mods modlist to the official Nexus Tracking Centre records.  \nIf mods displayed in your Nexus Tracked Mods modlist are inaccurate, click 'Re-Sync with Nexus Tracking Centre' button to reattempt sync.", "warning")
+            raise
 
     return tracked_mod_ids
 
 
+def update_tracked_mod_db(user_id, game_domain_name, mod_id, track_action, headers=None):
+    """Applies one mod's change in the Nexus Tracking Centre to the 
+    user's Nexus Tracked Mods modlist, instead of re-syncing the 
+    whole modlist with update_tracked_mods_from_nexus().
+
+    - 'add': if the mod isn't in the db yet it is fetched with a 
+      single get_mod_nxs() call, then one modlist_mod row is inserted.
+    - 'delete': the mod's modlist_mod row is deleted.
+    
+    Returns True if modlist reflects the change, False if the mod 
+    could not be added (game unknown, mod not published or its 
+    data rejected by the db), or raises Exception."""
+
+    tracked_modlist_id = (
+        db.select(Modlist.id)
+        .where(Modlist.user_id == user_id)
+        .where(Modlist.is_tracked == True)
+    )
+
+    try:
+        if track_action == 'delete':
+            db.session.execute(
+                db.delete(modlist_mod)
+                .where(modlist_mod.c.modlist_id == tracked_modlist_id.scalar_subquery())
+                .where(modlist_mod.c.mod_id == mod_id)
+            )
+            db.session.commit()
+            return True
+
+        mod_in_db = db.session.execute(
+            db.select(db.exists().where(Mod.id == mod_id))
+        ).scalar()
+
+        if not mod_in_db:
+            game = get_game_db(game_domain_name)
+            if not game:
+                return False
+
+            nexus_mod = get_mod_nxs(game_domain_name, mod_id, headers=headers)
+            db_ready_mods = filter_nxs_data([nexus_mod], 'mods')
+            if not db_ready_mods:
+                return False
+
+            if update_list_mods_db(db_ready_mods).failed_ids:
+                return False
+            link_mods_to_game(db_ready_mods, game)
+
+        db.session.execute(
+            insert(modlist_mod)
+            .from_select(['modlist_id', 'mod_id'], tracked_modlist_id.add_columns(db.literal(mod_id)))
+            .on_conflict_do_nothing()
+        )
+        db.session.commit()
+
+    except Exception as e:
+        db.session.rollback()
+        print(f"Page: Mod page\nFunction: update_tracked_mod_db()\nFailed to {track_action} mod #{mod_id} in user #{user_id}'s tracked modlist, error: ", e)
+        raise e
+
+    return True
+
+
 def filter_nxs_data(data_list, list_type):
     """Takes list of data from Nexus API call and 
     filters out unneeded data for db entry.
@@ -472,24 +760,56 @@ def format_time(updated_time):
         formatted_time = edited_datetime[:12] + edited_datetime[13:]
 
 
+def count_upserted_rows(rows_passed, returned_rows):
+    """Takes number of rows passed to an upsert and its 
+    returned (id, inserted) rows. Rows the upsert's WHERE 
+    skipped aren't returned, so they are the unchanged ones.
+
+    Returns UpsertCounts."""
+
+    inserted = sum(1 for row in returned_rows if row.inserted)
+    updated = len(returned_rows) - inserted
+
+    return UpsertCounts(inserted, updated, rows_passed - inserted - updated)
+
+
 def update_all_games_db(db_ready_games):
     """Takes updated list of Nexus game data and 
     updates the stored db values.
+
+    Rows whose data hasn't changed are left alone, so a refresh 
+    with no changes writes nothing. If any game was inserted or 
+    updated, the games version is bumped in the same transaction 
+    so every process rebuilds its games catalogue.
     
-    Returns True if successful, or Exception details."""
+    Returns UpsertCounts if successful, or Exception details."""
+
+    # a row can only be upserted once per statement, last one wins
+    db_ready_games = list({game['id']: game for game in db_ready_games}.values())
+    if not db_ready_games:
+        return UpsertCounts(0, 0, 0)
 
     try:
         stmt = insert(Game).values(db_ready_games)
         stmt = stmt.on_conflict_do_update(
             constraint="games_pkey",
             set_={
-                'id': stmt.excluded.id,
                 'domain_name': stmt.excluded.domain_name,
                 'name': stmt.excluded.name,
                 'downloads': stmt.excluded.downloads
-            }
-        )
-        db.session.execute(stmt)
+            },
+            where=db.or_(
+                Game.downloads.is_distinct_from(stmt.excluded.downloads),
+                Game.domain_name.is_distinct_from(stmt.excluded.domain_name),
+                Game.name.is_distinct_from(stmt.excluded.name)
+            )
+        ).returning(Game.id, RETURNING_INSERTED)
+        upsert_counts = count_upserted_rows(len(db_ready_games), db.session.execute(stmt).all())
+
+        changed_games = upsert_counts.inserted or upsert_counts.updated
+        if changed_games:
+            DataVersion.bump_version(GAMES_VERSION_NAME)
+            notify_invalidation('games')
 
         db.session.commit()
 
@@ -497,42 +817,114 @@ def update_all_games_db(db_ready_games):
         db.session.rollback()
         print("Page: login()\nFunction: update_all_games_db()\nFailed to commit inserts/updates to games in db, error: ", e)
         return e
+
+    if changed_games:
+        invalidate_games_catalogue()
         
-    return True
+    return upsert_counts
+
+
+def upsert_mods_chunk_db(db_ready_mods):
+    """Upserts one chunk of mods in a savepoint and commits it. 
+    Rows whose data hasn't changed are left alone. If the db 
+    rejects the chunk only its savepoint is rolled back, work 
+    the caller has pending in db.session is kept.
+
+    Returns UpsertCounts, or raises Exception."""
+
+    stmt = insert(Mod).values(db_ready_mods)
+    stmt = stmt.on_conflict_do_update(
+        constraint="mods_pkey",
+        set_={
+            'name': stmt.excluded.name,
+            'summary': stmt.excluded.summary,
+            'is_nsfw': stmt.excluded.is_nsfw,
+            'picture_url': stmt.excluded.picture_url,
+            'updated_timestamp': stmt.excluded.updated_timestamp,
+            'uploaded_by': stmt.excluded.uploaded_by
+        },
+        where=db.or_(
+            Mod.updated_timestamp.is_distinct_from(stmt.excluded.updated_timestamp),
+            Mod.name.is_distinct_from(stmt.excluded.name),
+            Mod.summary.is_distinct_from(stmt.excluded.summary),
+            Mod.is_nsfw.is_distinct_from(stmt.excluded.is_nsfw),
+            Mod.picture_url.is_distinct_from(stmt.excluded.picture_url),
+            Mod.uploaded_by.is_distinct_from(stmt.excluded.uploaded_by)
+        )
+    ).returning(Mod.id, RETURNING_INSERTED)
 
+    with db.session.begin_nested():
+        upsert_counts = count_upserted_rows(len(db_ready_mods), db.session.execute(stmt).all())
 
-def update_list_mods_db(db_ready_mods):
+    db.session.commit()
+
+    return upsert_counts
+
+
+def upsert_mods_isolating_failures_db(db_ready_mods, failed_ids):
+    """Upserts mods, and if a row's data is rejected by the db, 
+    splits the rows in half and retries each half until the 
+    rejected rows are found alone. Each attempt has its own 
+    savepoint, so a rejected attempt only undoes itself. Rejected 
+    ids are appended to failed_ids and every other row is committed.
+
+    Returns UpsertCounts of committed rows, or raises Exception 
+    for errors that aren't caused by a row's data."""
+
+    try:
+        return upsert_mods_chunk_db(db_ready_mods)
+
+    except (DataError, IntegrityError) as e:
+        if len(db_ready_mods) == 1:
+            print(f"Function: upsert_mods_isolating_failures_db()\nMod #{db_ready_mods[0]['id']} was rejected by the db and skipped, error: ", e)
+            failed_ids.append(db_ready_mods[0]['id'])
+            return UpsertCounts(0, 0, 0)
+
+        middle = len(db_ready_mods) // 2
+        first = upsert_mods_isolating_failures_db(db_ready_mods[:middle], failed_ids)
+        second = upsert_mods_isolating_failures_db(db_ready_mods[middle:], failed_ids)
+
+        return UpsertCounts(*(a + b for a, b in zip(first, second)))
+
+
+def update_list_mods_db(db_ready_mods, batch_size=MOD_UPSERT_BATCH_SIZE):
     """Takes list of mod data that has been filtered 
     to only contain: 'id', 'name', 'summary', 'is_nsfw', 'picture_url', 'updated_timestamp', 'uploaded_by' and inserts or updates each mod
     from the list in the db.
+
+    Mods are upserted and committed batch_size rows at a time, 
+    so a long list never builds one giant statement. A row the 
+    db rejects is isolated and skipped, the rest of its chunk 
+    and every other chunk still land. Rows whose data hasn't 
+    changed are left alone, so page views showing mods that 
+    haven't changed on Nexus write nothing.
     
-    Returns True if successful, or raises Exception details."""
+    Returns ChunkedUpsertCounts, or raises Exception details if 
+    the db failed for a reason other than a row's data."""
+
+    # a row can only be upserted once per statement, last one wins
+    db_ready_mods = list({mod['id']: mod for mod in db_ready_mods}.values())
+
+    totals = UpsertCounts(0, 0, 0)
+    failed_ids = []
+    chunks = []
 
     try:
-        stmt = insert(Mod).values(db_ready_mods)
-        stmt = stmt.on_conflict_do_update(
-            constraint="mods_pkey",
-            set_={
-                'id': stmt.excluded.id,
-                'name': stmt.excluded.name,
-                'summary': stmt.excluded.summary,
-                'is_nsfw': stmt.excluded.is_nsfw,
-                'picture_url': stmt.excluded.picture_url,
-                'updated_timestamp': stmt.excluded.updated_timestamp,
-                'uploaded_by': stmt.excluded.uploaded_by
-            }
-        )
+        for chunk_start in range(0, len(db_ready_mods), batch_size):
+            chunk = db_ready_mods[chunk_start:chunk_start + batch_size]
+            failed_before = len(failed_ids)
+            start = perf_counter()
 
-        db.session.execute(stmt)
+            chunk_counts = upsert_mods_isolating_failures_db(chunk, failed_ids)
 
-        db.session.commit()
+            chunks.append(UpsertChunk(len(chunk), *chunk_counts, len(failed_ids) - failed_before, perf_counter() - start))
+            totals = UpsertCounts(*(a + b for a, b in zip(totals, chunk_counts)))
 
     except Exception as e:
-        db.session.rollback()
         print("Page: Game page or Mod page\nFunction: update_list_mods_db() in:\n____add_missing_tracked_mods_db(), or in\n____Game or Mod page routes\nFailed to retrieve Nexus API data, error: ", e)
         raise e
-            
-    return True
+
+    return ChunkedUpsertCounts(*totals, failed_ids, chunks)
 
 
 def link_mods_to_game(db_ready_mods, game):
@@ -540,16 +932,23 @@ def link_mods_to_game(db_ready_mods, game):
     Access mod from game obj: 'subject_of_mods'
     Access game from mod obj: 'for_games'
 
-    Returns nothing -> adds mod in game.subject_of_mods to 
+    Returns nothing -> inserts missing game_mod rows to 
     be committed after the function, or raises Exception.
     """
 
-    for m in db_ready_mods:
-        mod = db.session.scalars(db.select(Mod).where(Mod.id==m['id'])).first()
-
-        if mod and mod not in game.subject_of_mods:
-            game.subject_of_mods.append(mod)
+    mod_ids = [m['id'] for m in db_ready_mods]
+    if not mod_ids:
+        return
 
+    mods_to_link = (
+        db.select(db.literal(game.id), Mod.id)
+        .where(Mod.id.in_(mod_ids))
+    )
+    db.session.execute(
+        insert(game_mod)
+        .from_select(['game_id', 'mod_id'], mods_to_link)
+        .on_conflict_do_nothing()
+    )
 
 
 def add_mod_modlist_choices(user_id, mod):
@@ -568,15 +967,20 @@ def add_mod_modlist_choices(user_id, mod):
 
     modlists = db.session.scalars(db.select(Modlist).where(Modlist.user_id==user_id).order_by(Modlist.name)).all()
 
+    modlist_ids_w_mod = set(db.session.scalars(
+        db.select(modlist_mod.c.modlist_id)
+        .where(modlist_mod.c.mod_id == mod.id)
+    ).all())
+
     users_empty_modlist_choices = []
     users_modlist_choices = []
     modlists_w_mod = []
 
     for modlist in modlists:
-        if modlist.name == "Nexus Tracked Mods":
+        if modlist.is_tracked:
             continue
 
-        if modlist.id in [modlist.id for modlist in mod.in_modlists]:
+        if modlist.id in modlist_ids_w_mod:
             modlists_w_mod.append(modlist)
             continue
 
@@ -594,6 +998,221 @@ def add_mod_modlist_choices(user_id, mod):
     return return_obj
 
 
+def get_editable_modlists_db(user_id, game_ids=None):
+    """Gets the user's modlists that mods can be added to 
+    or removed from, leaving out the Nexus Tracked Mods modlist. 
+    If game_ids is passed, only modlists for one of those games 
+    or with no game yet are included.
+
+    Returns list of modlists ordered by name, with for_games loaded."""
+
+    stmt = (
+        db.select(Modlist)
+        .where(Modlist.user_id == user_id)
+        .where(Modlist.is_tracked == False)
+        .options(selectinload(Modlist.for_games))
+        .order_by(Modlist.name)
+    )
+
+    if game_ids is not None:
+        stmt = stmt.where(db.or_(
+            ~Modlist.for_games.any(),
+            Modlist.for_games.any(Game.id.in_(game_ids))
+        ))
+
+    return db.session.execute(stmt).scalars().all()
+
+
+def add_mod_to_modlists_db(mod, modlist_ids):
+    """Adds a mod to every modlist in modlist_ids in a single 
+    transaction. Mod is inserted into modlist_mod with one bulk 
+    statement that skips modlists already containing the mod, 
+    then the modlists it was added to are assigned to the mod's 
+    games, marked nsfw if the mod is nsfw, and have their 
+    last_updated timestamp refreshed in bulk.
+
+    Note: ownership of the modlists is not checked here, only 
+    pass in ids of modlists owned by the signed-in user.
+
+    Returns set of ids of the modlists the mod was added to, 
+    or raises Exception after rolling back the transaction."""
+
+    if not modlist_ids:
+        return set()
+
+    try:
+        insert_stmt = (
+            insert(modlist_mod)
+            .values([{'modlist_id': modlist_id, 'mod_id': mod.id} for modlist_id in modlist_ids])
+            .on_conflict_do_nothing()
+            .returning(modlist_mod.c.modlist_id)
+        )
+        added_ids = set(db.session.execute(insert_stmt).scalars().all())
+
+        if added_ids:
+            mod_game_ids = db.session.execute(
+                db.select(game_mod.c.game_id)
+                .where(game_mod.c.mod_id == mod.id)
+            ).scalars().all()
+
+            if mod_game_ids:
+                game_stmt = (
+                    insert(game_modlist)
+                    .values([
+                        {'modlist_id': modlist_id, 'game_id': game_id} 
+                        for modlist_id in added_ids for game_id in mod_game_ids
+                    ])
+                    .on_conflict_do_nothing()
+                )
+                db.session.execute(game_stmt)
+
+            modlist_values = {'last_updated': datetime.now(timezone.utc)}
+            if mod.is_nsfw:
+                modlist_values['has_nsfw'] = True
+
+            db.session.execute(
+                db.update(Modlist)
+                .where(Modlist.id.in_(sorted(added_ids)))
+                .values(modlist_values)
+                .execution_options(synchronize_session=False)
+            )
+            for modlist_id in sorted(added_ids):
+                notify_invalidation('modlist', modlist_id)
+
+        db.session.commit()
+        # the event reaches other workers, drop this worker's copies now
+        for modlist_id in sorted(added_ids):
+            cache.invalidate_tag(f'modlist:{modlist_id}')
+
+    except Exception as e:
+        db.session.rollback()
+        print(f"Page: modlist_add_mod\nFunction: add_mod_to_modlists_db()\nFailed to add mod to modlists in db, error: {e}\nError context: mod.id: {mod.id}; modlist_ids: {modlist_ids}")
+        raise e
+
+    return added_ids
+
+
+def bulk_modlist_mods_db(modlist_id, mod_ids, bulk_action):
+    """Adds or deletes a list of mods to/from a modlist with 
+    set-based statements against modlist_mod, then updates the 
+    modlist's game assignment, has_nsfw and last_updated once 
+    and commits.
+
+    Valid bulk_action inputs: 'add', 'delete'
+
+    Mods are only added if they are for the modlist's assigned 
+    game, the others are skipped and reported. If the modlist has 
+    no game yet, all selected mods must be for the same game, 
+    otherwise a ValueError is raised.
+
+    Note: ownership and editability of the modlist is not 
+    checked here, use check_modlist_uneditable() first.
+
+    Returns BulkModsResult of the ids of the mods that were added 
+    or deleted, and the ids of mods skipped for being for another 
+    game, or raises Exception after rolling back the transaction."""
+
+    if not mod_ids:
+        return BulkModsResult([], set())
+
+    other_game_ids = set()
+
+    try:
+        if bulk_action == 'add':
+            modlist_game_ids = db.session.execute(
+                db.select(game_modlist.c.game_id)
+                .where(game_modlist.c.modlist_id == modlist_id)
+            ).scalars().all()
+
+            if not modlist_game_ids:
+                modlist_game_ids = db.session.execute(
+                    db.select(game_mod.c.game_id)
+                    .where(game_mod.c.mod_id.in_(mod_ids))
+                    .distinct()
+                ).scalars().all()
+                if len(modlist_game_ids) > 1:
+                    raise ValueError("Mods for more than one game can not be added to the same modlist.")
+
+            mods_for_game = (
+                db.select(db.literal(modlist_id), game_mod.c.mod_id)
+                .where(game_mod.c.mod_id.in_(mod_ids))
+                .where(game_mod.c.game_id.in_(modlist_game_ids))
+                .distinct()
+            )
+            stmt = (
+                insert(modlist_mod)
+                .from_select(['modlist_id', 'mod_id'], mods_for_game)
+                .on_conflict_do_nothing()
+                .returning(modlist_mod.c.mod_id)
+            )
+            changed_ids = db.session.execute(stmt).scalars().all()
+
+            mod_ids_for_game = db.session.execute(
+                db.select(game_mod.c.mod_id)
+                .where(game_mod.c.mod_id.in_(mod_ids))
+                .where(game_mod.c.game_id.in_(modlist_game_ids))
+            ).scalars().all()
+            other_game_ids = set(mod_ids) - set(mod_ids_for_game)
+
+            if changed_ids:
+                game_stmt = (
+                    insert(game_modlist)
+                    .values([{'modlist_id': modlist_id, 'game_id': game_id} for game_id in modlist_game_ids])
+                    .on_conflict_do_nothing()
+                )
+                db.session.execute(game_stmt)
+
+        elif bulk_action == 'delete':
+            stmt = (
+                db.delete(modlist_mod)
+                .where(modlist_mod.c.modlist_id == modlist_id)
+                .where(modlist_mod.c.mod_id.in_(mod_ids))
+                .returning(modlist_mod.c.mod_id)
+            )
+            changed_ids = db.session.execute(stmt).scalars().all()
+
+            if changed_ids:
+                has_mods = db.session.execute(
+                    db.select(db.exists().where(modlist_mod.c.modlist_id == modlist_id))
+                ).scalar()
+                if not has_mods:
+                    db.session.execute(
+                        db.delete(game_modlist)
+                        .where(game_modlist.c.modlist_id == modlist_id)
+                    )
+
+        else:
+            raise ValueError(f"Invalid bulk_action '{bulk_action}', use 'add' or 'delete'.")
+
+        if changed_ids:
+            has_nsfw = (
+                db.select(db.exists()
+                    .where(modlist_mod.c.modlist_id == modlist_id)
+                    .where(modlist_mod.c.mod_id == Mod.id)
+                    .where(Mod.is_nsfw == True))
+                .scalar_subquery()
+            )
+            db.session.execute(
+                db.update(Modlist)
+                .where(Modlist.id == modlist_id)
+                .values(has_nsfw=has_nsfw, last_updated=datetime.now(timezone.utc))
+                .execution_options(synchronize_session=False)
+            )
+            notify_invalidation('modlist', modlist_id)
+
+        db.session.commit()
+        # the event reaches other workers, drop this worker's copies now
+        if changed_ids:
+            cache.invalidate_tag(f'modlist:{modlist_id}')
+
+    except Exception as e:
+        db.session.rollback()
+        print(f"Page: modlist_bulk_mods\nFunction: bulk_modlist_mods_db()\nFailed to {bulk_action} mods for modlist in db, error: {e}\nError context: modlist_id: {modlist_id}; mod_ids: {mod_ids}")
+        raise e
+
+    return BulkModsResult(changed_ids, other_game_ids)
+
+
 def flash_modlist_action_messages(mod_name, successfully_added, unowned_modlists, already_in_modlists, encountered_error):
     """Helper function to flash messages for modlist actions.
     Args:
@@ -613,93 +1232,172 @@ def flash_modlist_action_messages(mod_name, successfully_added, unowned_modlists
         flash(f"An error occurred while saving '{mod_name}' to: {', '.join(encountered_error)}. Please try again.", "danger")
 
 
-def get_recent_modlists_by_game(user_id):
-    """Get list of user's modlists ordered by last_updated
-    and grouped by game. Also indicates privacy status of all 
-    modlists for each game - if all modlists are marked as 
-    private, entire game will not be shown on public profile page.
-    
-    Return list of games and mods:
-    [{'game':game, 'all_private':bool, 'modlists':[modlist, modlist]}]"""
+def get_modlists_by_game(user_id, public_only=False):
+    """Get user's modlists ordered by last_updated and grouped 
+    by game, along with user's empty modlists, from a single 
+    query that joins each modlist to its game.
 
-    all_recent_modlists = db.session.scalars(db.select(Modlist).join(Modlist.user.and_(User.id == user_id)).order_by(Modlist.last_updated.desc())).all()
+    Also indicates privacy status of all modlists for each 
+    game - if all modlists are marked as private, entire game 
+    will not be shown on public profile page. Pass 
+    public_only=True to leave private modlists out of results.
 
-    return_list = order_modlists_by_game(all_recent_modlists)
+    Empty modlists are modlists not assigned to a game, 
+    excluding the Nexus Tracked Mods modlist, ordered by name.
 
-    return return_list
+    Preview mods are the 3 most recently updated mods of each 
+    grouped modlist, keyed by modlist id.
 
+    Return object containing grouped modlists, empty modlists and preview mods:
+    {'modlists_by_game':[{'game':game, 'all_private':bool, 'modlists':[modlist, modlist]}], 
+    'empty_modlists':[modlist, modlist], 'preview_mods':{modlist_id:[mod, mod, mod]}}"""
 
-def get_public_modlists_by_game(user_id):
-    """Get list of user's modlists ordered by last_updated
-    and grouped by game, with all empty and private content 
-    removed.
-    
-    Return list of games and mods:
-    [{'game':game, 'modlists':[modlist, modlist]}]"""
+    stmt = (
+        db.select(Modlist, Game)
+        .outerjoin(game_modlist, game_modlist.c.modlist_id == Modlist.id)
+        .outerjoin(Game, Game.id == game_modlist.c.game_id)
+        .where(Modlist.user_id == user_id)
+        .order_by(Modlist.last_updated.desc(), Modlist.id, Game.id)
+    )
+
+    if public_only:
+        stmt = stmt.where(Modlist.private == False)
 
-    recent_public_modlists = db.session.scalars(db.select(Modlist).filter_by(private=False).join(Modlist.user.and_(User.id == user_id)).order_by(Modlist.last_updated.desc())).all()
+    modlists_by_game = []
+    empty_modlists = []
+    game_groups = {}
+    seen_modlist_ids = set()
 
-    return_list = order_modlists_by_game(recent_public_modlists)
+    for modlist, game in db.session.execute(stmt).all():
+        # a modlist only gets grouped under the first game it is assigned to
+        if modlist.id in seen_modlist_ids:
+            continue
+        seen_modlist_ids.add(modlist.id)
 
-    for game in return_list:
-        del game['all_private']
+        if game is None:
+            if not modlist.is_tracked:
+                empty_modlists.append(modlist)
+            continue
 
-    return return_list
+        game_group = game_groups.get(game.id)
+        if game_group is None:
+            game_group = {'game':game, 'all_private':True, 'modlists':[]}
+            game_groups[game.id] = game_group
+            modlists_by_game.append(game_group)
 
+        game_group['modlists'].append(modlist)
+        if modlist.private == False:
+            game_group['all_private'] = False
 
-def order_modlists_by_game(modlist_list):
-    """Take a list of modlists and return them ordered by game.
-    Order from modlist_list will be respected - first modlist's 
-    game will be first game in list of games. Also indicates 
-    privacy status of all modlists for each game.
-    
-    Return list of games and mods:
-    [{'game':game, 'all_private':bool, 'modlists':[modlist, modlist]}]"""
+    empty_modlists.sort(key=lambda modlist: modlist.name)
 
-    return_list = []
-    recent_games = []
-    all_private = True
+    grouped_modlist_ids = [modlist.id for game_group in modlists_by_game for modlist in game_group['modlists']]
+    preview_mods = get_preview_mods_db(grouped_modlist_ids)
 
-    for modlist in modlist_list:
-         if modlist.for_games != [] and modlist.for_games[0].id not in [game.id for game in recent_games]:
-            recent_games.append(modlist.for_games[0])
+    return_obj = {'modlists_by_game':modlists_by_game, 'empty_modlists':empty_modlists, 'preview_mods':preview_mods}
 
-    for game in recent_games:
-        game_modlists = {'game':game, 'modlists':[]}
-        for modlist in modlist_list:
-            if len(modlist.for_games) != 0 and modlist.for_games[0].id == game.id:
-                game_modlists['modlists'].append(modlist)
-                if modlist.private == False:
-                    all_private = False
-        game_modlists['all_private'] = all_private
-        return_list.append(game_modlists)
+    return return_obj
 
-    return return_list
 
+def get_public_modlists_by_game(user_id):
+    """Get user's public modlists grouped by game, as shown on 
+    their public profile page, from the cache or built from 
+    get_modlists_by_game() and cached.
+
+    Games, modlists and preview mods are plain dicts of the 
+    fields the page shows, so they can be stored in a shared 
+    cache. The entry is tagged with every one of the user's 
+    modlists, private ones included, and the user's 
+    'user_modlists' tag, so editing any of them or creating a 
+    new modlist drops it.
+
+    Return object containing grouped public modlists and preview mods:
+    {'modlists_by_game':[{'game':{'id', 'name', 'domain_name'}, 'all_private':False, 
+    'modlists':[{'id', 'name', 'private'}]}], 'preview_mods':{modlist_id:[{'id', 'name'}]}}"""
+
+    cache_key = f'public_modlists:{user_id}'
+    public_modlists = cache.get(cache_key)
+    if public_modlists is not None:
+        return public_modlists
+
+    profile_modlists = get_modlists_by_game(user_id)
+
+    modlists_by_game = []
+    for game_group in profile_modlists['modlists_by_game']:
+        if game_group['all_private']:
+            continue
+        game = game_group['game']
+        modlists_by_game.append({
+            'game': {'id': game.id, 'name': game.name, 'domain_name': game.domain_name},
+            'all_private': False,
+            'modlists': [
+                {'id': modlist.id, 'name': modlist.name, 'private': False}
+                for modlist in game_group['modlists'] if not modlist.private
+            ]
+        })
+
+    public_modlist_ids = {modlist['id'] for game_group in modlists_by_game for modlist in game_group['modlists']}
+    preview_mods = {
+        modlist_id: [{'id': mod.id, 'name': mod.name} for mod in mods]
+        for modlist_id, mods in profile_modlists['preview_mods'].items() if modlist_id in public_modlist_ids
+    }
 
-def get_empty_modlists(user_id):
-    """Get list of user's modlists that are not 
-    assigned to a game and contain no mods.
-    
-    Return list of empty modlists:
-    [modlist, modlist]"""
+    all_modlist_ids = [modlist.id for game_group in profile_modlists['modlists_by_game'] for modlist in game_group['modlists']]
+    all_modlist_ids += [modlist.id for modlist in profile_modlists['empty_modlists']]
+
+    public_modlists = {'modlists_by_game': modlists_by_game, 'preview_mods': preview_mods}
+    cache.set(
+        cache_key, 
+        public_modlists, 
+        ttl=PUBLIC_MODLISTS_TTL, 
+        tags=[f'user_modlists:{user_id}'] + [f'modlist:{modlist_id}' for modlist_id in all_modlist_ids]
+    )
 
-    recent_modlists = db.session.scalars(db.select(Modlist).join(Modlist.user.and_(User.id == user_id)).order_by(Modlist.name)).all()
+    return public_modlists
 
-    return_list = []
 
-    for modlist in recent_modlists:
-        if len(modlist.for_games) == 0 and modlist.name != 'Nexus Tracked Mods':
-            return_list.append(modlist)
+def get_preview_mods_db(modlist_ids, per_modlist=3):
+    """Gets the most recently updated mods of each modlist in 
+    modlist_ids with one windowed query, without loading the 
+    full list of mods for any modlist.
+    
+    Return object of modlist ids and their mods:
+    {modlist_id:[mod, mod, mod]}"""
+
+    if not modlist_ids:
+        return {}
+
+    preview_rank = db.func.row_number().over(
+        partition_by=modlist_mod.c.modlist_id,
+        order_by=Mod.updated_timestamp.desc()
+    ).label('preview_rank')
+
+    ranked_mods = (
+        db.select(modlist_mod.c.modlist_id, modlist_mod.c.mod_id, preview_rank)
+        .join(Mod, Mod.id == modlist_mod.c.mod_id)
+        .where(modlist_mod.c.modlist_id.in_(modlist_ids))
+        .subquery()
+    )
+
+    stmt = (
+        db.select(ranked_mods.c.modlist_id, Mod)
+        .join(Mod, Mod.id == ranked_mods.c.mod_id)
+        .where(ranked_mods.c.preview_rank <= per_modlist)
+        .order_by(ranked_mods.c.modlist_id, ranked_mods.c.preview_rank)
+    )
+
+    preview_mods = {}
+    for modlist_id, mod in db.session.execute(stmt).all():
+        preview_mods.setdefault(modlist_id, []).append(mod)
 
-    return return_list
+    return preview_mods
 
 
 def check_modlist_uneditable(modlist, g_user_id, ):
     """Determine if selected modlist is a invalid modlist for 
     the user to edit. A user can NOT edit a modlist if the 
     modlist does not belong to the signed in user, or if the 
-    modlist is named 'Nexus Tracked Mods'.
+    modlist is the user's 'Nexus Tracked Mods' modlist.
 
     Returns False if modlist is editable, or the message to 
     flash if it can not be edited by the signed-in user user."""
@@ -707,7 +1405,7 @@ def check_modlist_uneditable(modlist, g_user_id, ):
     if modlist.user_id != int(g_user_id):
         return "A modlist can only be edited or deleted by the owner of the modlist."
 
-    elif modlist.name == 'Nexus Tracked Mods':
+    elif modlist.is_tracked:
         return "The 'Nexus Tracked Mods' modlist is not editable or deleted."
 
     else:
@@ -0,0 +1,33 @@
+"""Runs background jobs from the jobs table outside the web process
+
+    python worker.py [--threads N]
+
+Start web processes with JOB_WORKER_THREADS=0 when jobs are left
+to worker processes. Any number of workers can run at once."""
+
+import argparse
+from threading import Event, Thread
+from app import app
+from jobs import work
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Run ModList background jobs.")
+    parser.add_argument('--threads', type=int, default=1, help="jobs run at the same time")
+    args = parser.parse_args()
+
+    stop = Event()
+    threads = [
+        Thread(target=work, args=(app, stop), name=f'job-worker-{number}')
+        for number in range(max(args.threads, 1))
+    ]
+    for thread in threads:
+        thread.start()
+
+    try:
+        for thread in threads:
+            thread.join()
+    except KeyboardInterrupt:
+        # let running jobs finish, queued ones wait for the next worker
+        stop.set()
+        for thread in threads:
+            thread.join()
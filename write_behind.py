@@ -0,0 +1,146 @@
+"""Write-behind buffer for mod upserts driven by page views, for app.py
+
+Game and mod pages render from Nexus' API response and hand the
+mods to mod_upsert_buffer instead of writing them to the db during
+the request. A flusher thread in each process writes everything
+buffered as one batched upsert every MOD_FLUSH_INTERVAL seconds, or
+sooner once MOD_FLUSH_SIZE mods are waiting.
+
+Buffered writes of the same mod id collapse into one, the latest
+data wins, so a mod shown on many page views between flushes is
+written once. Buffered mods are only cached copies of Nexus data:
+if a flush fails they are dropped and the next page view showing
+them buffers them again."""
+
+import atexit
+import os
+from threading import Event, Lock, Thread
+from sqlalchemy.dialects.postgresql import insert
+from models import db, game_mod
+from utilities import update_list_mods_db
+
+MOD_FLUSH_INTERVAL = 0.25 # seconds
+MOD_FLUSH_SIZE = 200 # buffered mods that trigger an early flush
+
+
+class ModUpsertBuffer:
+    """Coalescing buffer of db ready mod dicts and the games they
+    are linked to, flushed to the db by a background thread."""
+
+    def __init__(self, flush_interval=MOD_FLUSH_INTERVAL, flush_size=MOD_FLUSH_SIZE):
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self._mods = {} # {mod_id: db ready mod dict}
+        self._game_ids = {} # {mod_id: {game_id}}
+        self._lock = Lock()
+        self._wake = Event()
+        self._flusher_pid = None
+        self.added = 0
+        self.coalesced = 0
+        self.flushed = 0
+        self.unchanged = 0
+        self.batches = 0
+
+    def __len__(self):
+        return len(self._mods)
+
+    def add(self, db_ready_mods, game_id):
+        """Buffers mods, filtered by filter_nxs_data(), to be upserted
+        and linked to the game with game_id on the next flush."""
+
+        with self._lock:
+            for mod in db_ready_mods:
+                if mod['id'] in self._mods:
+                    self.coalesced += 1
+                self._mods[mod['id']] = mod
+                self._game_ids.setdefault(mod['id'], set()).add(game_id)
+                self.added += 1
+            buffered = len(self._mods)
+
+        if buffered >= self.flush_size:
+            self._wake.set()
+
+    def flush(self):
+        """Upserts every buffered mod with update_list_mods_db(), then
+        links them to their games. Needs an app context.
+
+        Returns number of mods flushed, changed or not."""
+
+        with self._lock:
+            mods, self._mods = self._mods, {}
+            game_ids, self._game_ids = self._game_ids, {}
+
+        if not mods:
+            return 0
+
+        try:
+            upsert_counts = update_list_mods_db(list(mods.values()))
+            # mods the db rejected were skipped, there's nothing to link
+            game_links = [
+                {'game_id': game_id, 'mod_id': mod_id}
+                for mod_id, mod_game_ids in game_ids.items()
+                if mod_id not in upsert_counts.failed_ids
+                for game_id in mod_game_ids
+            ]
+            if game_links:
+                db.session.execute(insert(game_mod).values(game_links).on_conflict_do_nothing())
+                db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"Function: ModUpsertBuffer.flush()\nDropped {len(mods)} buffered mod upserts, they are rewritten on their next page view; error: ", e)
+            return 0
+
+        with self._lock:
+            self.flushed += len(mods)
+            self.unchanged += upsert_counts.unchanged
+            self.batches += 1
+
+        return len(mods)
+
+    def stats(self):
+        """Returns dict of buffer counters."""
+
+        with self._lock:
+            return {
+                'buffered': len(self._mods),
+                'added': self.added,
+                'coalesced': self.coalesced,
+                'flushed': self.flushed,
+                'unchanged': self.unchanged,
+                'batches': self.batches
+            }
+
+    def run_flusher(self, app):
+        """Flusher thread loop: flushes every flush_interval,
+        or as soon as add() fills the buffer."""
+
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush_in_app_context(app)
+
+    def flush_in_app_context(self, app):
+        with app.app_context():
+            try:
+                self.flush()
+            finally:
+                db.session.remove()
+
+    def start_flusher(self, app):
+        """Starts this process' flusher thread if it isn't running.
+        Safe to call on every request, each forked web worker pid
+        starts its own. Mods still buffered at exit are flushed."""
+
+        if self._flusher_pid == os.getpid():
+            return
+
+        with self._lock:
+            if self._flusher_pid == os.getpid():
+                return
+
+            Thread(target=self.run_flusher, args=(app,), name='mod-write-behind', daemon=True).start()
+            atexit.register(self.flush_in_app_context, app)
+            self._flusher_pid = os.getpid()
+
+
+mod_upsert_buffer = ModUpsertBuffer()